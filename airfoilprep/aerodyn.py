@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# encoding: utf-8
+"""
+aerodyn.py
+
+Bulk reader and writer of AeroDyn (v13.0) airfoil files. The numeric block of every
+table is parsed with a single numpy call and written with a single vectorized format,
+and the tables of a file can be iterated one at a time so that large files are never
+held in memory at once.
+
+"""
+
+from __future__ import print_function
+import numpy as np
+
+# Header of the files written by Hydrofoil.writeToAerodynFile.
+AERODYN_HEADER = ("AeroDyn airfoil file.", "Compatible with AeroDyn v13.0.", "Generated by airfoilprep.py")
+# Labels of the unsteady aerodynamics parameters written after the Reynolds number of every table.
+UNSTEADY_LABELS = ("Control setting",
+                   "Stall angle (deg)",
+                   "Angle of attack for zero Cn for linear Cn curve (deg)",
+                   "Cn slope for zero lift for linear Cn curve (1/rad)",
+                   "Cn at stall value for positive angle of attack for linear Cn curve",
+                   "Cn at stall value for negative angle of attack for linear Cn curve",
+                   "Angle of attack for minimum CD (deg)",
+                   "Minimum CD value")
+# Format of a row of the (alpha, cl, cd, cm) block of a table.
+ROW_FORMAT = "%-10f\t%-10f\t%-10f\t%-10f\n"
+
+
+def _parse_block(lines, filename):
+    """parse the (alpha, cl, cd, cm) rows of a table in a single call"""
+
+    data = np.array(" ".join(lines).split(), dtype=float)
+    if data.size % 4 != 0:
+        raise ValueError("Table of file {0} does not have 4 columns.".format(filename))
+    return data.reshape(-1, 4)
+
+
+def iter_aerodyn_tables(filename):
+    """Iterate over the tables of an AeroDyn airfoil file, reading one table at a time.
+
+    Parameters
+    ----------
+    filename : str
+        path/name of an AeroDyn file
+
+    Returns
+    -------
+    tables : generator of dict
+        one dict per table with the Reynolds number ('Re'), the unsteady parameters
+        ('unsteady', None if the table has none) and the 'alpha', 'cl', 'cd' and 'cm' arrays
+
+    Notes
+    -----
+    The header has a fixed length: the three description lines of AERODYN_HEADER in the
+    files written by write_aerodyn_file, a single description line otherwise (as the
+    original reader expects), so a description starting with a number is never taken
+    for the number of tables. A table ends with an EOT line, an empty line or the end
+    of the file.
+
+    """
+
+    with open(filename, "r") as f:
+
+        # skip through header, three lines in the v13.0 style and one line otherwise
+        line = f.readline()
+        if line.rstrip("\n") == AERODYN_HEADER[0]:
+            for _ in AERODYN_HEADER[1:]:
+                f.readline()
+        tokens = f.readline().split()
+        if not tokens or not tokens[0].isdigit():
+            raise ValueError("File {0} does not have the number of airfoil tables.".format(filename))
+        numTables = int(tokens[0])
+
+        for i in range(numTables):
+
+            line = f.readline()
+            if not line.strip():
+                raise ValueError("File {0} has {1} tables instead of {2}.".format(filename, i, numTables))
+            Re = float(line.split()[0])*1e6
+
+            # unsteady aerodynamics parameters, written only in the v13.0 style
+            unsteady = None
+            rows = []
+            line = f.readline()
+            if UNSTEADY_LABELS[0] in line:
+                unsteady = [float(line.split()[0])]
+                for _ in UNSTEADY_LABELS[1:]:
+                    unsteady.append(float(f.readline().split()[0]))
+                unsteady = tuple(unsteady)
+                line = f.readline()
+
+            # collect the rows of the table, they are parsed at once
+            while line and "EOT" not in line and line.strip():
+                rows.append(line)
+                line = f.readline()
+
+            data = _parse_block(rows, filename)
+            yield {'Re': Re, 'unsteady': unsteady,
+                   'alpha': data[:, 0], 'cl': data[:, 1], 'cd': data[:, 2], 'cm': data[:, 3]}
+
+
+def read_aerodyn_file(filename):
+    """Read every table of an AeroDyn airfoil file.
+
+    Parameters
+    ----------
+    filename : str
+        path/name of an AeroDyn file
+
+    Returns
+    -------
+    tables : list of dict
+        see iter_aerodyn_tables
+
+    """
+
+    return list(iter_aerodyn_tables(filename))
+
+
+def format_aerodyn_table(Re, unsteady, alpha, cl, cd, cm):
+    """Format a table of an AeroDyn airfoil file, EOT line included.
+
+    Parameters
+    ----------
+    Re : float
+        Reynolds number
+    unsteady : tuple of floats
+        unsteady aerodynamics parameters (see Polar.unsteadyparam), the block is
+        omitted if None
+    alpha, cl, cd, cm : ndarray
+        angle of attack (deg) and coefficients of the table
+
+    Returns
+    -------
+    text : str
+
+    """
+
+    text = ["{0:<10f}\t{1:40}\n".format(Re/1e6, "Reynolds number in millions.")]
+    if unsteady is not None:
+        text.extend("{0:<10f}\t{1:40}\n".format(value, label) for value, label in zip(unsteady, UNSTEADY_LABELS))
+    data = np.column_stack((alpha, cl, cd, cm))
+    # a single format of the whole block, as np.savetxt does row by row
+    text.append((ROW_FORMAT*len(data)) % tuple(data.ravel().tolist()))
+    text.append("EOT\n")
+    return "".join(text)
+
+
+def write_aerodyn_file(filename, tables, numTables=None):
+    """Write tables to a file using AeroDyn input file style.
+
+    Parameters
+    ----------
+    filename : str
+        name (+ relative path) of where to write file
+    tables : iterable of tuple
+        (Re, unsteady, alpha, cl, cd, cm) of every table, it is consumed one table
+        at a time so a generator can stream a large library to the file
+    numTables : int, optional
+        number of tables, required if tables has no length
+
+    """
+
+    if numTables is None:
+        numTables = len(tables)
+
+    with open(filename, "w") as f:
+        f.write("".join(line + "\n" for line in AERODYN_HEADER))
+        f.write("{0:<10d}\t\t{1:40}\n".format(numTables, "Number of airfoil tables in this file"))
+        for table in tables:
+            f.write(format_aerodyn_table(*table))
@@ -25,8 +25,17 @@ from __future__ import print_function
 from math import pi, sin, cos, radians, degrees, tan, ceil, floor
 import numpy as np
 import copy
+from collections import OrderedDict
+try:
+    from .aerodyn import iter_aerodyn_tables, write_aerodyn_file
+except ImportError:
+    # run as a script
+    from aerodyn import iter_aerodyn_tables, write_aerodyn_file
 # from scipy.interpolate import RectBivariateSpline
 
+# number of interpolated polars memoized by the getPolar of a frozen Hydrofoil
+POLAR_CACHE_SIZE = 256
+
 
 
 class Polar(object):
@@ -60,6 +69,49 @@ class Polar(object):
         self.cm = np.array(cm)
 
 
+    def freeze(self):
+        """Make the arrays of this polar read-only views, so that it can be
+        shared between callers instead of copied
+
+        Returns
+        -------
+        polar : Polar
+            this polar
+
+        Notes
+        -----
+        The methods of Polar never modify the arrays in place, they return a new
+        Polar, hence a frozen polar behaves as a mutable one. Use copy to get a
+        writable polar.
+
+        """
+
+        for values in (self.alpha, self.cl, self.cd, self.cm):
+            values.flags.writeable = False
+
+        return self
+
+
+    @property
+    def frozen(self):
+        """True if the arrays of this polar are read-only"""
+
+        return not self.alpha.flags.writeable
+
+
+    def copy(self):
+        """Writable deep copy of this polar
+
+        Returns
+        -------
+        polar : Polar
+            copy of this polar
+
+        """
+
+        return copy.deepcopy(self)
+
+
     def blend(self, other, weight):
         """Blend this polar with another one with the specified weighting
 
@@ -186,7 +238,7 @@ class Polar(object):
 
 
 
-    def extrapolate(self, cdmax, AR=None, cdmin=0.001, nalpha=15):
+    def extrapolate(self, cdmax, AR=None, cdmin=0.001, nalpha=15, vectorized_cm=True):
         """Extrapolates force coefficients up to +/- 180 degrees using Viterna's method
         :cite:`Viterna1982Theoretical-and`.
 
@@ -202,6 +254,9 @@ class Polar(object):
             with this extrapolation method
         nalpha: int, optional
             number of points to add in each segment of Viterna method
+        vectorized_cm: bool, optional
+            if True the CM extension is computed for all angles at once with masked
+            array operations, otherwise angle by angle (equal to rounding)
 
         Returns
         -------
@@ -323,12 +378,16 @@ class Polar(object):
             cd_cm = np.interp(alpha_cm, np.degrees(alpha), cd)  # get cd for applicable alphas
             alpha_low_deg = self.alpha[0]
             alpha_high_deg = self.alpha[-1]
-            for i in range(len(alpha_cm)):
-                cm_new = self.__getCM(i, cmCoef, alpha_cm, cl_cm, cd_cm, alpha_low_deg, alpha_high_deg)
-                if cm_new is None:
-                    pass  # For when it reaches the range of cm's that the user provides
-                else:
-                    cm_ext[i] = cm_new
+            if vectorized_cm:
+                outside = (alpha_cm < alpha_low_deg) | (alpha_cm > alpha_high_deg)
+                cm_ext[outside] = self.__getCMVectorized(cmCoef, alpha_cm[outside], cl_cm[outside], cd_cm[outside])
+            else:
+                for i in range(len(alpha_cm)):
+                    cm_new = self.__getCM(i, cmCoef, alpha_cm, cl_cm, cd_cm, alpha_low_deg, alpha_high_deg)
+                    if cm_new is None:
+                        pass  # For when it reaches the range of cm's that the user provides
+                    else:
+                        cm_ext[i] = cm_new
         cm = np.interp(np.degrees(alpha), alpha_cm, cm_ext)
         return type(self)(self.Re, np.degrees(alpha), cl, cd, cm)
 
@@ -406,6 +465,33 @@ class Polar(object):
                       "(near +/-180 deg). Program will stop.")
         return cm_new
 
+    def __getCMVectorized(self, cmCoef, alpha, cl_ext, cd_ext):
+        """private method to extrapolate Cm at all the angles outside the polar at once"""
+
+        cm_new = np.zeros(len(alpha))
+
+        # -165 < alpha < 165, Viterna extension (mirrored for negative angles, theta = |alpha|)
+        inner = np.abs(alpha) < 165
+        viterna = inner & (np.abs(alpha) >= 0.01)
+        positive = alpha[viterna] > 0
+        theta = np.abs(np.radians(alpha[viterna]))
+        x = cmCoef * np.tan(theta - pi/2) + 0.25
+        cl_signed = np.where(positive, cl_ext[viterna], -cl_ext[viterna])
+        cm_viterna = self.cm0 - x * (cl_signed * np.cos(theta) + cd_ext[viterna] * np.sin(theta))
+        cm_new[viterna] = np.where(positive, cm_viterna, -cm_viterna)
+        cm_new[inner & ~viterna] = self.cm0
+
+        # |alpha| >= 165, tabulated values
+        table_alpha = np.array([-180, -175, -170, -165, 165, 170, 175, 180])
+        table_cm = np.array([0, 0.2, 0.4, 0.35, -0.4, -0.5, -0.25, 0])
+        index = np.minimum(np.searchsorted(table_alpha, alpha[~inner]), len(table_alpha) - 1)
+        found = table_alpha[index] == alpha[~inner]
+        if not np.all(found):
+            print("Angle encountered for which there is no CM table value "
+                  "(near +/-180 deg). Program will stop.")
+        cm_new[~inner] = np.where(found, table_cm[index], 0)
+        return cm_new
+
     def unsteadyparam(self, alpha_linear_min=-5, alpha_linear_max=5):
         """compute unsteady aero parameters used in AeroDyn input file
 
@@ -519,13 +605,15 @@ class Hydrofoil(object):
 
     """
 
-    def __init__(self, polars):
+    def __init__(self, polars, frozen=False):
         """Constructor
 
         Parameters
         ----------
         polars : list(Polar)
             list of Polar objects
+        frozen : bool, optional
+            if True the airfoil is frozen with copies of the polars (see freeze)
 
         """
 
@@ -535,57 +623,61 @@ class Hydrofoil(object):
         # save type of polar we are using
         self.polar_type = polars[0].__class__
 
+        self.frozen = False
+        if frozen:
+            self.freeze()
 
-    @classmethod
-    def initFromAerodynFile(cls, aerodynFile, polarType=Polar):
-        """Construct Airfoil object from AeroDyn file
+
+    def freeze(self, cache_size=POLAR_CACHE_SIZE):
+        """Freeze the polars of this airfoil, so that getPolar returns shared
+        read-only polars instead of copies
 
         Parameters
         ----------
-        aerodynFile : str
-            path/name of a properly formatted Aerodyn file
+        cache_size : int, optional
+            number of interpolated polars memoized by getPolar
 
         Returns
         -------
         obj : Hydrofoil
+            this airfoil
+
+        Notes
+        -----
+        Out-of-range lookups return the stored polars themselves and interpolated
+        lookups are memoized by Reynolds number (least recently used first out).
+        The airfoil keeps frozen copies of its writable polars, so the polars of
+        the caller stay writable.
 
         """
-        # initialize
-        polars = []
 
-        # open aerodyn file
-        f = open(aerodynFile, "r")
+        self.polars = [p if p.frozen else p.copy().freeze() for p in self.polars]
 
-        # skip through header
-        description = f.readline().rstrip()  # remove newline
-        numTables = int(f.readline().split()[0])
+        self.frozen = True
+        self.cache_size = cache_size
+        self._Relist = np.array([p.Re for p in self.polars])
+        self._polar_cache = OrderedDict()
 
-        # loop through tables
-        for i in range(numTables):
+        return self
 
-            # read Reynolds number
-            Re = float(f.readline().split()[0])*1e6
 
-            alpha = []
-            cl = []
-            cd = []
-            cm = []
-
-            # read polar information line by line
-            while True:
-                line = f.readline()
-                if "EOT" in line:
-                    break
-                data = [float(s) for s in line.split()]
-                if len(data) == 0: break
-                alpha.append(data[0])
-                cl.append(data[1])
-                cd.append(data[2])
-                cm.append(data[3])
+    @classmethod
+    def initFromAerodynFile(cls, aerodynFile, polarType=Polar):
+        """Construct Airfoil object from AeroDyn file
 
-            polars.append(polarType(Re, alpha, cl, cd, cm))
+        Parameters
+        ----------
+        aerodynFile : str
+            path/name of a properly formatted Aerodyn file
 
-        f.close()
+        Returns
+        -------
+        obj : Hydrofoil
+
+        """
+        # every table block is parsed at once
+        polars = [polarType(table['Re'], table['alpha'], table['cl'], table['cd'], table['cm'])
+                  for table in iter_aerodyn_tables(aerodynFile)]
 
         return cls(polars)
 
@@ -608,11 +700,16 @@ class Hydrofoil(object):
         -----
         Interpolates as necessary. If Reynolds number is larger than or smaller than
         the stored Polars, it returns the Polar with the closest Reynolds number.
+        The polars of a frozen airfoil are shared read-only instances, otherwise
+        a new Polar is returned.
 
         """
 
         p = self.polars
 
+        if self.frozen:
+            return self.__getFrozenPolar(Re)
+
         if Re <= p[0].Re:
             return copy.deepcopy(p[0])
 
@@ -626,6 +723,34 @@ class Hydrofoil(object):
             return p[i-1].blend(p[i], weight)
 
 
+    def __getFrozenPolar(self, Re):
+        """shared and memoized polars of a frozen airfoil"""
+
+        p = self.polars
+
+        if Re <= p[0].Re:
+            return p[0]
+
+        elif Re >= p[-1].Re:
+            return p[-1]
+
+        Re = float(Re)
+        polar = self._polar_cache.get(Re)
+        if polar is not None:
+            self._polar_cache.move_to_end(Re)
+            return polar
+
+        i = np.searchsorted(self._Relist, Re)
+        weight = (Re - self._Relist[i-1]) / (self._Relist[i] - self._Relist[i-1])
+        polar = p[i-1].blend(p[i], weight).freeze()
+
+        self._polar_cache[Re] = polar
+        if len(self._polar_cache) > self.cache_size:
+            self._polar_cache.popitem(last=False)
+
+        return polar
+
+
 
     def blend(self, other, weight):
         """Blend this Airfoil with another one with the specified weighting.
@@ -705,7 +830,7 @@ class Hydrofoil(object):
         return Hydrofoil(polars)
 
 
-    def extrapolate(self, cdmax, AR=None, cdmin=0.001):
+    def extrapolate(self, cdmax, AR=None, cdmin=0.001, vectorized_cm=True):
         """apply high alpha extensions to each polar in airfoil
 
         Parameters
@@ -716,6 +841,8 @@ class Hydrofoil(object):
             blade aspect ratio (rotor radius / chord at 75% radius).  if included
             it is used to estimate cdmax
         cdmin: minimum drag coefficient
+        vectorized_cm: bool, optional
+            if True the CM extension is computed with masked array operations
 
         Returns
         -------
@@ -731,7 +858,7 @@ class Hydrofoil(object):
         n = len(self.polars)
         polars = [0]*n
         for idx, p in enumerate(self.polars):
-            polars[idx] = p.extrapolate(cdmax, AR, cdmin)
+            polars[idx] = p.extrapolate(cdmax, AR, cdmin, vectorized_cm=vectorized_cm)
 
         return Hydrofoil(polars)
 
@@ -782,27 +909,9 @@ class Hydrofoil(object):
         # aerodyn and wtperf require common set of angles of attack
         af = self.interpToCommonAlpha()
 
-        f = open(filename, "w")
-
-        f.write("AeroDyn airfoil file.\n")
-        f.write("Compatible with AeroDyn v13.0.\n")
-        f.write("Generated by airfoilprep.py\n")
-        f.write("{0:<10d}\t\t{1:40}\n".format(len(af.polars), "Number of airfoil tables in this file"))
-        for p in af.polars:
-            f.write("{0:<10f}\t{1:40}\n".format(p.Re/1e6, "Reynolds number in millions."))
-            param = p.unsteadyparam()
-            f.write("{0:<10f}\t{1:40}\n".format(param[0], "Control setting"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[1], "Stall angle (deg)"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[2], "Angle of attack for zero Cn for linear Cn curve (deg)"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[3], "Cn slope for zero lift for linear Cn curve (1/rad)"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[4], "Cn at stall value for positive angle of attack for linear Cn curve"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[5], "Cn at stall value for negative angle of attack for linear Cn curve"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[6], "Angle of attack for minimum CD (deg)"))
-            f.write("{0:<10f}\t{1:40}\n".format(param[7], "Minimum CD value"))
-            for a, cl, cd, cm in zip(p.alpha, p.cl, p.cd, p.cm):
-                f.write("{:<10f}\t{:<10f}\t{:<10f}\t{:<10f}\n".format(a, cl, cd, cm))
-            f.write("EOT\n")
-        f.close()
+        # tables are formatted one at a time, each block with a single vectorized format
+        tables = ((p.Re, p.unsteadyparam(), p.alpha, p.cl, p.cd, p.cm) for p in af.polars)
+        write_aerodyn_file(filename, tables, numTables=len(af.polars))
 
 
     def createDataGrid(self):
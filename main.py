@@ -3,16 +3,17 @@
 # ====================================================================================================================================================
 
 # Required Libraries
-from utils.preprocessing import hydrofoils_data_check
-from utils.preprocessing import hydrofoils_data_rearrange
-from utils.preprocessing import fluid_properties_data_check
-from utils.preprocessing import operative_state_data_check
+from utils.preprocessing import load_hydrofoils
+from utils.preprocessing import load_fluid_properties
+from utils.preprocessing import load_operative_state
 from utils.optimal_bemt import OptimalRotor
 from utils.extrapolation import create_objects
 from utils.extrapolation import extrapolate_hydrofoil_data
 from utils.extrapolation import save_aerodyn_files
+from utils.extrapolation_cache import ExtrapolationCache
 from utils.preprocessing import hydrofoils_ext_data_rearrange
 from utils.evaluation_bemt import StandardRotor
+from utils.results_writer import ResultsWriter
 
 # SECTION 1. Defining the paths of the required data files.
 HYDROFOIL_FOLDER_PATH = "hydrofoils"
@@ -21,13 +22,13 @@ FLUID_PROPERTIES_FILE_PATH = "turbine/fluid_properties.yml"
 OPERATIVE_STATE_FILE_PATH = "turbine/operative_state.yml"
 POLAR_PLOTS_FOLDER_PATH = "resources/polar plots"
 OPTIMAL_ROTOR_FOLDER_PATH = "resources/optimal_rotor"
+EXTRAPOLATION_CACHE_FOLDER_PATH = "resources/extrapolation_cache"
 
-# SECTION 2. Check if the hydrofoil data, fluid properties data, and operative state data
-# are available and have the correct data structure required for the analysis.
-files_hydrofoils = hydrofoils_data_check(path=HYDROFOIL_FOLDER_PATH)                                # Check the hydrofoil data.
-file_hydrofoils = hydrofoils_data_rearrange(files=files_hydrofoils, path=HYDROFOIL_FOLDER_PATH)     # Rearrange the hydrofoil data.
-file_fluid_properties = fluid_properties_data_check(path=FLUID_PROPERTIES_FILE_PATH)                # Check the fluid property data.
-file_operative_state = operative_state_data_check(path=OPERATIVE_STATE_FILE_PATH)                   # Check the operative state data.
+# SECTION 2. Load the hydrofoil data, fluid properties data, and operative state data. Every file is
+# parsed once and validated against the data structure required for the analysis.
+file_hydrofoils = load_hydrofoils(path=HYDROFOIL_FOLDER_PATH)                                       # Load the hydrofoil data.
+file_fluid_properties = load_fluid_properties(path=FLUID_PROPERTIES_FILE_PATH)                      # Load the fluid property data.
+file_operative_state = load_operative_state(path=OPERATIVE_STATE_FILE_PATH)                         # Load the operative state data.
 
 # SECTION 3. Compute the optimal chord and twist angle for the ocean current turbine.
 # The optimal chord and twist angle are computed using the Blade Element Momentum Theory (BEMT).
@@ -35,14 +36,18 @@ optimal_rotor = OptimalRotor(fluid_properties=file_fluid_properties,
                              operative_state=file_operative_state,                  # OptimalRotor object requires the fluid properties
                              hydrofoils=file_hydrofoils)                            # and operative state data to be defined.
 optimal_rotor.get_design_points()                                                   # Define the design points.
-optimal_rotor.get_optimal_chord_twist(path=POLAR_PLOTS_FOLDER_PATH)                 # Compute the optimal chord and twist.
+optimal_rotor.get_optimal_chord_twist()                                             # Compute the optimal chord and twist.
+polar_plots = optimal_rotor.save_polar_plots(path=POLAR_PLOTS_FOLDER_PATH,          # Save the polar plots in a background
+                                             background=True)                       # thread while the analysis continues.
 optimal_rotor.save_properties(path=OPTIMAL_ROTOR_FOLDER_PATH)                       # Save the optimal rotor properties.
 
 # SECTION 4. Once the optimal chord and twist angle are computed, it is required to extrapolate
 # the hydrofoil data to the entire rotor blade possible configurations. This is done by using the
 # AirfoilPrep library developed by the NREL. Available at: https://github.com/WISDEM/AirfoilPreppy.git
 [polar_obj, hydrofoils_obj] = create_objects(hydrofoils=file_hydrofoils)                # Create the Polar and Hydrofoil objects.
-hydrofoils_obj_extrapolated = extrapolate_hydrofoil_data(hydrofoils=hydrofoils_obj)     # Extrapolate the hydrofoil data.
+extrapolation_cache = ExtrapolationCache(path=EXTRAPOLATION_CACHE_FOLDER_PATH)          # Unchanged hydrofoils are not extrapolated again.
+hydrofoils_obj_extrapolated = extrapolate_hydrofoil_data(hydrofoils=hydrofoils_obj,     # Extrapolate the hydrofoil data.
+                                                         cache=extrapolation_cache)
 save_aerodyn_files(hydrofoils_extra=hydrofoils_obj_extrapolated, path=HYDROFOIL_EXT_FOLDER_PATH)  # Save the aerodynamic data files.
 
 # SECTION 5. The hydrofoil extrapolated data is now ready to be used for the BEMT analysis.
@@ -67,6 +72,14 @@ results = {
     "radial_design_points": standard_rotor.radial_design_points
 }
 # Save the results as a csv file
-import pandas as pd
-df = pd.DataFrame(results)
-df.to_csv(f"resources/parameters_operative_{standard_rotor.tip_speed_ratio}_.csv", index=False)
\ No newline at end of file
+with ResultsWriter(f"resources/parameters_operative_{standard_rotor.tip_speed_ratio}_.csv") as writer:
+    writer.write_frame(results)
+
+# SECTION 7. The performance curves (Cp, Ct and Cq) of the StandardRotor are computed in a single sweep
+# over the Tip Speed Ratios, reusing the polar interpolators and the geometry of the rotor. Every operating
+# point is written to the file as soon as it is solved, so large sweeps keep a bounded memory.
+with ResultsWriter("resources/performance_curve.csv") as writer:
+    standard_rotor.evaluate_sweep(tip_speed_ratios=[3, 4, 5, 6, 7], writer=writer)
+
+# Wait until the polar plots are saved.
+polar_plots.join()
@@ -0,0 +1,126 @@
+import os
+import numpy as np
+from airfoilprep import Polar, Hydrofoil
+from airfoilprep.aerodyn import read_aerodyn_file, write_aerodyn_file, AERODYN_HEADER
+from utils.preprocessing import hydrofoils_data_check, hydrofoils_data_rearrange
+from utils.extrapolation import create_objects, extrapolate_hydrofoil, extrapolate_hydrofoil_data, extrapolation_parameters
+from utils.extrapolation_cache import ExtrapolationCache, CACHE_EVICTION_RATIO
+
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_hydrofoil_objects():
+    """
+    Function for creating the Hydrofoil objects of the bundled hydrofoil data.
+    :return: hydrofoils_obj: dict, Hydrofoil objects keyed by hydrofoil.
+    """
+    path = os.path.join(PACKAGE_PATH, 'hydrofoils')
+    hydrofoils = hydrofoils_data_rearrange(hydrofoils_data_check(path), path)
+    return create_objects(hydrofoils)[1]
+
+
+def test_parallel_extrapolation_matches_serial():
+    hydrofoils_obj = load_hydrofoil_objects()
+    serial = extrapolate_hydrofoil_data(hydrofoils_obj, max_workers=1)
+    parallel = extrapolate_hydrofoil_data(hydrofoils_obj, max_workers=2, chunk_size=3)
+    assert list(parallel) == list(serial)
+    for name, hydrofoil in serial.items():
+        for polar, parallel_polar in zip(hydrofoil.polars, parallel[name].polars):
+            assert polar.Re == parallel_polar.Re
+            for attribute in ('alpha', 'cl', 'cd', 'cm'):
+                np.testing.assert_array_equal(getattr(parallel_polar, attribute), getattr(polar, attribute))
+
+
+def test_vectorized_cm_matches_angle_by_angle_cm():
+    for name, hydrofoil in load_hydrofoil_objects().items():
+        # The bundled polars have no pitching moment (cm = 0), which skips the CM extension, hence a CM is given.
+        polar = hydrofoil.polars[0]
+        polar = Polar(polar.Re, polar.alpha, polar.cl, polar.cd, -0.02 - 0.1 * polar.cl)
+        cd_max = 1.11 + 0.018 * 10
+        vectorized = polar.extrapolate(cd_max, AR=10, cdmin=np.min(polar.cd), vectorized_cm=True)
+        scalar = polar.extrapolate(cd_max, AR=10, cdmin=np.min(polar.cd), vectorized_cm=False)
+        assert np.count_nonzero(scalar.cm[np.abs(scalar.alpha) > 30]) > 0, name
+        for attribute in ('alpha', 'cl', 'cd'):
+            np.testing.assert_array_equal(getattr(vectorized, attribute), getattr(scalar, attribute), err_msg=name)
+        # np.tan may differ from math.tan in the last bit.
+        np.testing.assert_allclose(vectorized.cm, scalar.cm, rtol=1e-13, atol=1e-15, err_msg=name)
+
+
+def test_aerodyn_round_trip_is_byte_identical(tmp_path):
+    for name, hydrofoil in load_hydrofoil_objects().items():
+        written = tmp_path / f"{name}.dat"
+        rewritten = tmp_path / f"{name}_rewritten.dat"
+        extrapolate_hydrofoil(hydrofoil).writeToAerodynFile(str(written))
+        tables = read_aerodyn_file(str(written))
+        write_aerodyn_file(str(rewritten), [(table['Re'], table['unsteady'], table['alpha'], table['cl'], table['cd'],
+                                             table['cm']) for table in tables])
+        assert rewritten.read_bytes() == written.read_bytes(), name
+
+
+def test_extrapolation_cache_hits_evicts_and_invalidates(tmp_path):
+    hydrofoils_obj = load_hydrofoil_objects()
+    serial = extrapolate_hydrofoil_data(hydrofoils_obj)
+    cache = ExtrapolationCache(str(tmp_path / 'cache'))
+    # The parallel path reads and writes the cache in the calling process, so its counters are kept.
+    extrapolated = extrapolate_hydrofoil_data(hydrofoils_obj, max_workers=2, chunk_size=3, cache=cache)
+    assert (cache.hits, cache.misses, cache.no_entries) == (0, len(hydrofoils_obj), len(hydrofoils_obj))
+    assert cache.total_bytes == sum(entry[1] for entry in cache.entries())
+    cached = extrapolate_hydrofoil_data(hydrofoils_obj, cache=cache)
+    assert (cache.hits, cache.misses) == (len(hydrofoils_obj), len(hydrofoils_obj))
+    for name, hydrofoil in serial.items():
+        for result in (extrapolated, cached):
+            for attribute in ('alpha', 'cl', 'cd', 'cm'):
+                np.testing.assert_array_equal(getattr(result[name].polars[0], attribute), getattr(hydrofoil.polars[0], attribute))
+    # An invalidated polar is a miss again.
+    [name, hydrofoil] = next(iter(hydrofoils_obj.items()))
+    parameters = extrapolation_parameters(hydrofoil)
+    assert cache.invalidate(hydrofoil.polars[0], **parameters)
+    assert not cache.invalidate(hydrofoil.polars[0], **parameters)
+    assert cache.no_entries == len(hydrofoils_obj) - 1
+    extrapolate_hydrofoil(hydrofoil, cache)
+    assert cache.misses == len(hydrofoils_obj) + 1
+    # The least recently used entries are evicted down to CACHE_EVICTION_RATIO of the bounds.
+    bounded = ExtrapolationCache(str(tmp_path / 'cache'), max_entries=5)
+    assert bounded.no_entries == len(hydrofoils_obj)
+    key = bounded.key(hydrofoil.polars[0], **parameters)
+    assert bounded.get(key, Polar) is not None
+    bounded.put(key + '0', bounded.get(key, Polar))
+    assert bounded.no_entries == len(bounded.entries()) == int(CACHE_EVICTION_RATIO * 5)
+    assert bounded.get(key, Polar) is not None
+
+
+def test_aerodyn_header_and_tables_without_unsteady_block(tmp_path):
+    alpha = np.array([-10.0, 0.0, 10.0])
+    [cl, cd, cm] = [np.array([-0.8, 0.2, 1.1]), np.array([0.02, 0.01, 0.03]), np.zeros(3)]
+    written = tmp_path / 'written.dat'
+    write_aerodyn_file(str(written), [(3e5, None, alpha, cl, cd, cm), (5e5, None, alpha, cl + 0.1, cd, cm)])
+    tables = read_aerodyn_file(str(written))
+    assert [(table['Re'], table['unsteady']) for table in tables] == [(3e5, None), (5e5, None)]
+    np.testing.assert_array_equal(tables[1]['cl'], [-0.7, 0.3, 1.2])
+    # A single description line starting with a number is not taken for the number of tables.
+    legacy = tmp_path / 'legacy.dat'
+    legacy.write_text("1 m blade section, NACA 63-812\n" + written.read_text().split("\n", len(AERODYN_HEADER))[-1])
+    tables = read_aerodyn_file(str(legacy))
+    assert [table['Re'] for table in tables] == [3e5, 5e5]
+    np.testing.assert_array_equal(tables[0]['alpha'], alpha)
+
+
+def test_frozen_hydrofoil_shares_memoized_polars():
+    polar = load_hydrofoil_objects()['NACA-63815'].polars[0]
+    polars = [polar, Polar(2 * polar.Re, polar.alpha, polar.cl + 0.1, polar.cd, polar.cm)]
+    frozen = Hydrofoil(polars, frozen=True)
+    # The polars of the caller are copied, not frozen in place.
+    assert not polars[0].frozen and not polars[1].frozen
+    assert all(p.frozen for p in frozen.polars)
+    interpolated = frozen.getPolar(1.5 * polar.Re)
+    assert interpolated.frozen and frozen.getPolar(1.5 * polar.Re) is interpolated
+    assert frozen.getPolar(0.5 * polar.Re) is frozen.polars[0]
+    expected = Hydrofoil(polars).getPolar(1.5 * polar.Re)
+    for attribute in ('alpha', 'cl', 'cd', 'cm'):
+        np.testing.assert_array_equal(getattr(interpolated, attribute), getattr(expected, attribute))
+    # The interpolated polars are memoized up to the size of the cache.
+    frozen = Hydrofoil(polars).freeze(cache_size=2)
+    first = frozen.getPolar(1.2 * polar.Re)
+    frozen.getPolar(1.4 * polar.Re)
+    frozen.getPolar(1.6 * polar.Re)
+    assert frozen.getPolar(1.2 * polar.Re) is not first
@@ -0,0 +1,517 @@
+import os
+import importlib
+import numpy as np
+import pandas as pd
+import shutil
+import pytest
+import yaml
+from airfoilprep import Polar, Hydrofoil
+from utils.preprocessing import hydrofoils_data_check, hydrofoils_data_rearrange, hydrofoils_ext_data_rearrange
+from utils.preprocessing import fluid_properties_data_check, operative_state_data_check
+from utils.preprocessing import validate_data, load_hydrofoils, OPERATIVE_STATE_SCHEMA
+from utils.extrapolation import create_objects, extrapolate_hydrofoil_data
+from utils.evaluation_bemt import StandardRotor
+from utils.optimal_bemt import OptimalRotor, CHORD_INCREMENT, INNER_TOLERANCE, fit_polar
+from utils import parallel_sweep
+from utils.parallel_sweep import evaluate_operating_points, operating_grid
+from utils.optimization import RotorSensitivities
+from utils.convergence import ConvergenceController
+from utils.blade_definition import BladeDefinition, design_positions
+from utils.results_writer import ResultsWriter
+from utils.station_results import StationResults, STANDARD_ROTOR_FIELDS, OPTIMAL_ROTOR_FIELDS
+from utils import batch_design
+from utils.batch_design import design_rotors, operative_state_grid
+from utils.benchmark import run_benchmarks, compare_benchmarks
+from utils import polar_store
+from utils.polar_store import load_polar_store, read_hydrofoil_file
+from utils.polar_interpolation import get_polar_interpolator, clear_polar_interpolators, INTERPOLATOR_CACHE_SIZE
+from utils.polar_interpolation import PolarTable, StackedReynoldsInterpolator, polar_content_hash
+from scipy.interpolate import make_interp_spline
+from scipy import integrate
+
+PACKAGE_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_hydrofoils_data():
+    """
+    Function for loading the bundled hydrofoil data.
+    :return: hydrofoils: dict, dictionary containing the hydrofoil data.
+    """
+    path = os.path.join(PACKAGE_PATH, 'hydrofoils')
+    return hydrofoils_data_rearrange(hydrofoils_data_check(path), path)
+
+
+def create_rotor(tip_speed_ratio: float = 7.0, **settings):
+    """
+    Function for creating the StandardRotor of the bundled turbine, hydrofoils and optimal rotor properties.
+    :param tip_speed_ratio: float, tip speed ratio of the rotor.
+    :param settings: dict, optional arguments of the StandardRotor (e.g. induction_engine).
+    :return: rotor: StandardRotor.
+    """
+    [_, hydrofoils_obj] = create_objects(load_hydrofoils_data())
+    hydrofoils_ext = hydrofoils_ext_data_rearrange(extrapolate_hydrofoil_data(hydrofoils_obj))
+    fluid_properties = fluid_properties_data_check(os.path.join(PACKAGE_PATH, 'turbine', 'fluid_properties.yml'))
+    operative_state = operative_state_data_check(os.path.join(PACKAGE_PATH, 'turbine', 'operative_state.yml'))
+    optimal_rotor = pd.read_csv(os.path.join(PACKAGE_PATH, 'resources', 'optimal_rotor', 'optimal_rotor_properties.csv'))
+    return StandardRotor(fluid_properties, operative_state, hydrofoils_ext, optimal_rotor['Optimal Chord [m]'].tolist(),
+                         optimal_rotor['Optimal Twist Angle [deg]'].tolist(), tip_speed_ratio, **settings)
+
+
+def create_optimal_rotor(**settings):
+    """
+    Function for creating the OptimalRotor of the bundled turbine and hydrofoils, with its design points.
+    :param settings: dict, optional arguments of the OptimalRotor (e.g. induction_engine).
+    :return: rotor: OptimalRotor.
+    """
+    hydrofoils = load_hydrofoils_data()
+    fluid_properties = fluid_properties_data_check(os.path.join(PACKAGE_PATH, 'turbine', 'fluid_properties.yml'))
+    operative_state = operative_state_data_check(os.path.join(PACKAGE_PATH, 'turbine', 'operative_state.yml'))
+    rotor = OptimalRotor(fluid_properties, operative_state, hydrofoils, **settings)
+    rotor.get_design_points()
+    return rotor
+
+
+def test_batched_bemt_matches_station_by_station():
+    rotor = create_rotor()
+    rotor.evaluate_bemt()
+    expected = pd.DataFrame(rotor.station_results())
+    rotor.evaluate_bemt(batched=True)
+    batched = pd.DataFrame(rotor.station_results())
+    pd.testing.assert_frame_equal(batched, expected, check_exact=False, rtol=1e-9, atol=1e-12)
+
+
+def test_induction_engines_match_fsolve():
+    expected = create_rotor(induction_engine='fsolve')
+    expected.evaluate_bemt()
+    expected_performance = expected.evaluate_performance()
+    analytic = create_rotor(induction_engine='analytic')
+    analytic.evaluate_bemt()
+    np.testing.assert_allclose(analytic.induction_axial, expected.induction_axial, rtol=1e-10)
+    np.testing.assert_allclose(analytic.induction_tangential, expected.induction_tangential, rtol=1e-10)
+    np.testing.assert_allclose(analytic.evaluate_performance(), expected_performance, rtol=1e-10)
+    # The bracketed engine solves Ning's residual in phi, it converges to the same state within the iteration tolerance.
+    bracketed = create_rotor(induction_engine='bracketed')
+    bracketed.evaluate_bemt()
+    np.testing.assert_allclose(bracketed.induction_axial, expected.induction_axial, rtol=1e-2)
+    np.testing.assert_allclose(bracketed.evaluate_performance(), expected_performance, rtol=5e-3)
+
+
+def test_solve_chord_matches_increment_search():
+    rotor = create_optimal_rotor()
+    rotor.get_optimal_chord_twist(chord_solver='brent', progress=False)
+    for i in (len(rotor.design_points) - 2, len(rotor.design_points) - 1):
+        fit = rotor.polar_fits[i]
+        station = dict(local_radius=rotor.design_points[i], alpha=fit['optimal_alpha'], coeff_lift=fit['optimal_cl'],
+                       coeff_drag=fit['optimal_cd'])
+        # Legacy search (with converged inductions), the chord is increased until the target induction is reached.
+        # It is started 20 steps below the solved chord instead of at 1% of the blade radius.
+        [chord, a, b] = [rotor.optimal_chord[i] - 20 * CHORD_INCREMENT, 0.0, 0.0]
+        while a < 1 / 3:
+            [a, b] = rotor.solve_station(chord=chord, a=a, b=b, tolerance=INNER_TOLERANCE, **station)[:2]
+            chord = chord + CHORD_INCREMENT
+        # The search stops one step after the first chord that reaches the target.
+        assert 0 <= chord - rotor.optimal_chord[i] <= 2 * CHORD_INCREMENT
+        assert rotor.solve_chord(solver='bisection', **station) == pytest.approx(rotor.optimal_chord[i], abs=1e-6)
+
+
+def test_polar_interpolators_are_cached_by_content():
+    [name, data] = next(iter(load_hydrofoils_data().items()))
+    clear_polar_interpolators()
+    interpolator = get_polar_interpolator(name, data, 'cubic')
+    assert get_polar_interpolator(name, dict(data), 'cubic') is interpolator
+    alpha = np.linspace(data['alpha'][0], data['alpha'][-1], 101)
+    spline = make_interp_spline(data['alpha'], np.column_stack((data['cl'], data['cd'])), k=3)
+    np.testing.assert_allclose(np.column_stack(interpolator(alpha)), spline(alpha), rtol=1e-12, atol=1e-14)
+    # A polar that only differs in cm builds another table.
+    table = get_polar_interpolator(name, data, 'table')
+    changed = get_polar_interpolator(name, {**data, 'cm': np.asarray(data['cm']) + 0.1}, 'table')
+    assert changed is not table
+    np.testing.assert_allclose(changed.table.lookup(alpha, (2,))[0], table.table.lookup(alpha, (2,))[0] + 0.1)
+    # The cache is bounded, the least recently used interpolators are dropped.
+    for i in range(INTERPOLATOR_CACHE_SIZE):
+        get_polar_interpolator(f"{name} {i}", data)
+    assert get_polar_interpolator(name, data, 'cubic') is not interpolator
+    clear_polar_interpolators()
+
+
+def test_polar_table_matches_np_interp():
+    for name, data in load_hydrofoils_data().items():
+        table = PolarTable(data['alpha'], data['cl'], data['cd'], data['cm'])
+        alpha = np.concatenate((np.linspace(data['alpha'][0] - 5, data['alpha'][-1] + 5, 997), [np.nan]))
+        for values, key in zip(table.lookup(alpha), ('cl', 'cd', 'cm')):
+            np.testing.assert_allclose(values, np.interp(alpha, data['alpha'], data[key]), rtol=1e-12, atol=1e-12, err_msg=name)
+    linear = create_rotor()
+    linear.evaluate_bemt(batched=True)
+    table = create_rotor(polar_interpolation='table')
+    table.evaluate_bemt(batched=True)
+    np.testing.assert_allclose(table.evaluate_performance(), linear.evaluate_performance(), rtol=1e-12)
+
+
+def test_sweep_keeps_the_input_order_and_restores_the_rotor():
+    rotor = create_rotor()
+    rotor.evaluate_bemt()
+    performance = rotor.evaluate_performance()
+    axial = list(rotor.induction_axial)
+    sweep = rotor.evaluate_sweep([7.0, 3.0, 5.0], [1.0, 1.5])
+    assert sweep['tip_speed_ratio'].tolist() == [7.0, 3.0, 5.0, 7.0, 3.0, 5.0]
+    assert sweep['inflow_speed'].tolist() == [1.0, 1.0, 1.0, 1.5, 1.5, 1.5]
+    # The points are solved in ascending order whatever the input order, hence the rows are the ones of a sorted sweep.
+    ascending = create_rotor().evaluate_sweep([3.0, 5.0, 7.0], [1.0, 1.5])
+    pd.testing.assert_frame_equal(sweep, ascending.iloc[[2, 0, 1, 5, 3, 4]].reset_index(drop=True))
+    assert rotor.tip_speed_ratio == 7.0
+    assert (rotor.total_thrust, rotor.total_power) == performance
+    assert rotor.induction_axial == axial
+
+    # The rotor is restored as well if the sweep fails.
+    def failing_performance(*args, **kwargs):
+        raise RuntimeError("failed operating point")
+
+    rotor.evaluate_performance = failing_performance
+    with pytest.raises(RuntimeError):
+        rotor.evaluate_sweep([3.0, 5.0], [1.0])
+    del rotor.evaluate_performance
+    assert (rotor.tip_speed_ratio, rotor.optimal_speed) == (7.0, 1.5)
+    assert (rotor.total_thrust, rotor.total_power) == performance
+    assert rotor.induction_axial == axial
+
+
+def test_integration_rules_match_quad():
+    rotor = create_rotor()
+    rotor.evaluate_bemt()
+    # The analytic rule is the exact integral of the segments of the quad rule (loads frozen at the lower bound).
+    np.testing.assert_allclose(rotor.evaluate_performance(integration='analytic'), rotor.evaluate_performance(integration='quad'),
+                               rtol=1e-12)
+    # The trapezoid and Simpson rules approximate the integral of the loads interpolated along the blade.
+    radius = np.asarray(rotor.radial_design_points)
+    a = lambda r: np.interp(r, radius, rotor.induction_axial)
+    b = lambda r: np.interp(r, radius, rotor.induction_tangential)
+    F = lambda r: np.interp(r, radius, rotor.total_losses)
+    bounds = (rotor.initial_point_pctg * rotor.blade_radius, rotor.blade_radius)
+    thrust = integrate.quad(lambda r: 4 * np.pi * rotor.density * rotor.optimal_speed ** 2 * a(r) * (1 - a(r)) * F(r) * r,
+                            *bounds, points=radius, limit=200)[0]
+    power = integrate.quad(lambda r: 4 * np.pi * rotor.density * rotor.optimal_speed * rotor.omega * b(r) * (1 - a(r)) * F(r) * r ** 3,
+                           *bounds, points=radius, limit=200)[0]
+    for integration in ('trapezoid', 'simpson'):
+        np.testing.assert_allclose(rotor.evaluate_performance(interpolation_range=700, integration=integration), (thrust, power),
+                                   rtol=1e-5)
+        np.testing.assert_allclose(rotor.evaluate_performance(integration=integration), (thrust, power), rtol=1e-3)
+
+
+def test_benchmark_report_and_comparison():
+    report = run_benchmarks(station_counts=(8,), tsr_counts=(1,), cases=('evaluate_bemt', 'evaluate_performance'), repeats=1)
+    cases = [(result['case'], result.get('batched'), result.get('integration')) for result in report['results']]
+    assert cases == [('evaluate_bemt', False, None), ('evaluate_bemt', True, None), ('evaluate_performance', None, 'analytic'),
+                     ('evaluate_performance', None, 'quad')]
+    assert all(result['repeats'] == 1 and result['min'] > 0 for result in report['results'])
+    with pytest.raises(ValueError):
+        run_benchmarks(station_counts=(8,), cases=('unknown',))
+    # A case twice as slow as the baseline is a regression, the unchanged ones are not.
+    slower = {**report, 'results': [dict(result) for result in report['results']]}
+    slower['results'][0]['min'] *= 2
+    comparison = compare_benchmarks(report, slower)
+    assert len(comparison) == len(report['results'])
+    assert [result['regression'] for result in comparison] == [True, False, False, False]
+    np.testing.assert_allclose(comparison[0]['ratio'], 2)
+
+
+def test_polar_fits_are_recorded_and_plotted_afterwards(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    rotor = create_optimal_rotor()
+    rotor.get_optimal_chord_twist(progress=False)
+    # The design loop only records the fits, no figure is written.
+    assert list(tmp_path.iterdir()) == []
+    assert sorted(fit['hydrofoil'] for fit in rotor.polar_fits) == sorted(rotor.hydrofoils_data)
+    for fit in rotor.polar_fits:
+        expected = fit_polar(fit['hydrofoil'], rotor.hydrofoils_data[fit['hydrofoil']])
+        assert (fit['optimal_alpha'], fit['optimal_cl'], fit['optimal_cd']) == \
+               (expected['optimal_alpha'], expected['optimal_cl'], expected['optimal_cd'])
+    thread = rotor.save_polar_plots(path=str(tmp_path), background=True, dpi=20)
+    thread.join()
+    assert sorted(path.name for path in tmp_path.iterdir()) == \
+           sorted(f"hydrofoil_{fit['hydrofoil']}_efficiency.png" for fit in rotor.polar_fits)
+
+
+def test_convergence_controller_caps_and_reports_the_iterations():
+    # The map a -> 1 - a oscillates between 0 and 1 with the plain update, under-relaxation reaches its fixed point 0.5.
+    for controller, status, iterations in ((ConvergenceController(max_iterations=5), 'max_iterations', 5),
+                                           (ConvergenceController(relaxation=0.5), 'converged', 2),
+                                           (ConvergenceController(acceleration='aitken'), 'converged', 3)):
+        state = controller.start(np.zeros(2), np.zeros(2))
+        while np.any(state.active):
+            index = np.flatnonzero(state.active)
+            state.update(index, 1 - state.a[index], 1 - state.b[index])
+        assert list(state.status) == [status, status]
+        assert list(state.iterations) == [iterations, iterations]
+        if status == 'converged':
+            np.testing.assert_allclose(state.a, 0.5)
+    with pytest.raises(ValueError):
+        ConvergenceController(acceleration='unknown')
+    # Every station of the rotor reports its iterations and status.
+    rotor = create_rotor(convergence=ConvergenceController(max_iterations=1))
+    rotor.evaluate_bemt(batched=True)
+    assert set(rotor.convergence_report['status']) <= {'max_iterations', 'converged'}
+    assert 'max_iterations' in set(rotor.convergence_report['status'])
+    assert (rotor.convergence_report['iterations'] == 1).all()
+    # With a tight tolerance the accelerated iteration converges to the state of the plain one.
+    expected = create_rotor(convergence=ConvergenceController(tolerance=1e-10))
+    expected.evaluate_bemt()
+    rotor = create_rotor(convergence=ConvergenceController(tolerance=1e-10, acceleration='anderson'))
+    rotor.evaluate_bemt()
+    assert (rotor.convergence_report['status'] == 'converged').all()
+    assert rotor.convergence_report['iterations'].sum() < expected.convergence_report['iterations'].sum()
+    np.testing.assert_allclose(rotor.evaluate_performance(), expected.evaluate_performance(), rtol=1e-8)
+
+
+def test_polar_store_parses_only_the_changed_files(tmp_path, monkeypatch):
+    path = tmp_path / 'hydrofoils'
+    shutil.copytree(os.path.join(PACKAGE_PATH, 'hydrofoils'), path)
+    parsed = []
+
+    def read_file(file):
+        parsed.append(os.path.basename(file))
+        return read_hydrofoil_file(file)
+
+    monkeypatch.setattr(polar_store, 'read_hydrofoil_file', read_file)
+    expected = load_hydrofoils_data()
+    hydrofoils = load_polar_store(str(path))
+    assert sorted(parsed) == sorted(os.listdir(path)) and list(hydrofoils) == list(expected)
+    for name, data in expected.items():
+        for key in ('alpha', 'cl', 'cd', 'cm'):
+            np.testing.assert_array_equal(hydrofoils[name][key], data[key], err_msg=name)
+    # A second load is a single read of the store, a changed file is parsed again.
+    parsed.clear()
+    load_polar_store(str(path))
+    assert parsed == []
+    [file, name] = (path / 'NACA-63815.yml', 'NACA-63815')
+    file.write_text(file.read_text().replace('- 0.138517', '- 0.238517'))
+    os.utime(file, ns=(os.stat(file).st_atime_ns, os.stat(file).st_mtime_ns + 10 ** 9))
+    hydrofoils = load_polar_store(str(path))
+    assert parsed == ['NACA-63815.yml']
+    with open(file, 'r') as f:
+        np.testing.assert_array_equal(hydrofoils[name]['cl'], yaml.safe_load(f)['cl'])
+
+
+def test_validation_collects_every_error(tmp_path, capsys):
+    operative_state = {'optimal_speed': 'fast', 'tip_speed_ratio': 5.0, 'angular_speed': 15, 'rpm': 143.239,
+                       'blade_radius': 0.5, 'no_blades': 3.5, 'radius_hub_pctg': 0.2, 'initial_point_pctg': 0.3,
+                       'final_point_pctg': 1.0, 'operative_reynolds': 298000}
+    errors = validate_data(operative_state, OPERATIVE_STATE_SCHEMA, 'operative_state.yml')[1]
+    assert sorted(errors) == sorted(["operative_state.yml: key 'optimal_speed' must be of type float, found 'fast'.",
+                                     "operative_state.yml: key 'no_blades' must be of type int, found 3.5.",
+                                     "operative_state.yml: missing key 'no_design_points'."])
+    # Every problem of a folder is reported at once.
+    path = tmp_path / 'hydrofoils'
+    shutil.copytree(os.path.join(PACKAGE_PATH, 'hydrofoils'), path)
+    with open(path / 'NACA-63812.yml', 'r') as f:
+        data = yaml.safe_load(f)
+    with open(path / 'NACA-63812.yml', 'w') as f:
+        yaml.safe_dump({**data, 'cl': data['cl'][:-1]}, f)
+    with open(path / 'NACA-63813.yml', 'w') as f:
+        yaml.safe_dump({key: value for key, value in data.items() if key != 'cd'}, f)
+    (path / 'notes.txt').write_text("")
+    capsys.readouterr()
+    assert load_hydrofoils(str(path)) is None
+    output = capsys.readouterr().out
+    assert output.startswith("3 problems found")
+    assert "NACA-63812.yml: the arrays have different lengths" in output
+    assert "NACA-63813.yml: missing key 'cd'." in output
+    assert "notes.txt: the file does not have the correct extension (.yml)." in output
+
+
+def test_parallel_sweep_matches_serial_sweep_in_order():
+    rotor = create_rotor()
+    operating_points = operating_grid([7.0, 4.0, 5.5], [1.5, 1.0])
+    serial = evaluate_operating_points(rotor, operating_points, max_workers=1)
+    # The serial path does not keep the rotor in the module.
+    assert parallel_sweep._worker_rotor is None
+    parallel = evaluate_operating_points(rotor, operating_points, max_workers=2, chunk_size=2)
+    np.testing.assert_array_equal(parallel['tip_speed_ratio'], operating_points['tip_speed_ratio'])
+    np.testing.assert_array_equal(parallel['inflow_speed'], operating_points['inflow_speed'])
+    pd.testing.assert_frame_equal(parallel, serial, check_exact=True)
+
+
+def test_sensitivities_match_finite_differences():
+    rotor = create_rotor()
+    sensitivities = RotorSensitivities(rotor)
+    no_stations = sensitivities.no_stations
+    chord = np.array(rotor.blade_chord[:no_stations], dtype=float)
+    twist = np.array(rotor.blade_twist[:no_stations], dtype=float)
+    results = sensitivities.evaluate(chord, twist, 7.0)
+
+    def central_difference(variable, index, step):
+        values = {'chord': chord, 'twist': twist, 'tip_speed_ratio': np.array([7.0])}
+        forward = {key: value.copy() for key, value in values.items()}
+        backward = {key: value.copy() for key, value in values.items()}
+        forward[variable][index] += step
+        backward[variable][index] -= step
+        forward = sensitivities.evaluate(forward['chord'], forward['twist'], forward['tip_speed_ratio'][0])
+        backward = sensitivities.evaluate(backward['chord'], backward['twist'], backward['tip_speed_ratio'][0])
+        return [(forward[key] - backward[key]) / (2 * step) for key in ('Cp', 'Ct')]
+
+    for index in (0, no_stations // 2, no_stations - 2):
+        for variable, step in (('chord', 1e-6), ('twist', 1e-5)):
+            [d_cp, d_ct] = central_difference(variable, index, step)
+            np.testing.assert_allclose(results[f"dCp_d{variable}"][index], d_cp, rtol=1e-4, atol=1e-8)
+            np.testing.assert_allclose(results[f"dCt_d{variable}"][index], d_ct, rtol=1e-4, atol=1e-8)
+    [d_cp, d_ct] = central_difference('tip_speed_ratio', 0, 1e-5)
+    np.testing.assert_allclose(results['dCp_dtip_speed_ratio'], d_cp, rtol=1e-4)
+    np.testing.assert_allclose(results['dCt_dtip_speed_ratio'], d_ct, rtol=1e-4)
+
+
+def test_reynolds_interpolator_matches_get_polar():
+    [_, hydrofoils_obj] = create_objects(load_hydrofoils_data())
+    extrapolated = extrapolate_hydrofoil_data(hydrofoils_obj)
+    # With a single polar per station, the lookup at the local Reynolds numbers is the linear mode.
+    linear = create_rotor()
+    linear.evaluate_bemt()
+    rotor = create_rotor(reynolds_hydrofoils=extrapolated)
+    rotor.evaluate_bemt()
+    np.testing.assert_allclose(rotor.evaluate_performance(), linear.evaluate_performance(), rtol=1e-12)
+    assert len(rotor.reynolds_numbers) == len(rotor.induction_axial) and np.all(np.asarray(rotor.reynolds_numbers) > 0)
+    # With several polars, the coefficients are blended in Re as Hydrofoil.getPolar does.
+    [first, second] = list(extrapolated.values())[:2]
+    polar = first.polars[0]
+    hydrofoil = Hydrofoil([polar, Polar(2 * polar.Re, polar.alpha, 1.1 * polar.cl, 0.9 * polar.cd, polar.cm)])
+    interpolator = StackedReynoldsInterpolator([second, hydrofoil])
+    alpha = np.linspace(-40, 40, 161)[:, np.newaxis]
+    for reynolds in (0.5 * polar.Re, 1.3 * polar.Re, 1.7 * polar.Re, 3 * polar.Re):
+        expected = hydrofoil.getPolar(reynolds)
+        [cl, cd] = interpolator(alpha, [1], reynolds)
+        np.testing.assert_allclose(cl[:, 0], np.interp(alpha[:, 0], expected.alpha, expected.cl), rtol=1e-12, atol=1e-12)
+        np.testing.assert_allclose(cd[:, 0], np.interp(alpha[:, 0], expected.alpha, expected.cd), rtol=1e-12, atol=1e-12)
+
+
+def test_blade_definition_blends_and_shares_the_station_polars():
+    [_, hydrofoils_obj] = create_objects(load_hydrofoils_data())
+    hydrofoils_ext = hydrofoils_ext_data_rearrange(extrapolate_hydrofoil_data(hydrofoils_obj))
+    [inner, outer] = ['NACA-63821', 'NACA-63812']
+    blade = BladeDefinition([0.3, 0.7], [inner, outer], hydrofoils_ext)
+    positions = [0.2, 0.3, 0.4, 0.7, 0.9]
+    stations = blade.station_hydrofoils(positions)
+    assert blade.station_hydrofoils(list(positions)) is stations
+    assert [stations[0], stations[1]] == [blade.hydrofoils[inner]] * 2
+    assert [stations[3], stations[4]] == [blade.hydrofoils[outer]] * 2
+    # The station at 0.4 blends a quarter of the outer hydrofoil.
+    alpha = np.linspace(-180, 180, 721)
+    for key in ('cl', 'cd'):
+        expected = 0.75 * np.interp(alpha, hydrofoils_ext[inner]['alpha'], hydrofoils_ext[inner][key]) + \
+                   0.25 * np.interp(alpha, hydrofoils_ext[outer]['alpha'], hydrofoils_ext[outer][key])
+        polar = stations[2].polars[0]
+        np.testing.assert_allclose(np.interp(alpha, polar.alpha, getattr(polar, key)), expected, rtol=1e-12, atol=1e-12)
+    # The rotors of the same design points share the stacked polars, and match a rotor of the blended polars.
+    rotor = create_rotor(blade=blade)
+    assert create_rotor(blade=blade).get_stacked_polars() is rotor.get_stacked_polars()
+    expected = create_rotor()
+    expected.hydrofoils = rotor.hydrofoils
+    expected.evaluate_bemt()
+    rotor.evaluate_bemt()
+    assert rotor.evaluate_performance() == expected.evaluate_performance()
+    rotor.evaluate_bemt(batched=True)
+    expected.evaluate_bemt(batched=True)
+    assert rotor.evaluate_performance() == expected.evaluate_performance()
+
+
+def test_design_rotors_methods_match_and_share_the_blade_fits(monkeypatch):
+    hydrofoils = load_hydrofoils_data()
+    fluid_properties = fluid_properties_data_check(os.path.join(PACKAGE_PATH, 'turbine', 'fluid_properties.yml'))
+    operative_state = operative_state_data_check(os.path.join(PACKAGE_PATH, 'turbine', 'operative_state.yml'))
+    blade = BladeDefinition.from_hydrofoils(hydrofoils, operative_state)
+    candidates = operative_state_grid(operative_state, blade_radius=[0.5, 1.0], no_design_points=[6, 10])
+    shared = []
+    initialize_worker = batch_design._initialize_worker
+    monkeypatch.setattr(batch_design, '_initialize_worker', lambda design, polar_fits: shared.append(polar_fits) or
+                        initialize_worker(design, polar_fits))
+    vectorized = design_rotors(fluid_properties, candidates, blade=blade, max_workers=1, chunk_size=3)
+    # The fits of the stations of every candidate grid are computed in the main process and sent to the workers.
+    assert {(name, polar_content_hash(data)) for state in candidates.to_dict(orient='records')
+            for name, data in blade.station_data(design_positions(state)).items()} <= set(shared[0])
+    rotor = design_rotors(fluid_properties, candidates, blade=blade, method='rotor', max_workers=1, chunk_size=3)
+    assert len(vectorized) == len(rotor) == 2 * (6 + 10)
+    pd.testing.assert_frame_equal(vectorized.drop(columns=['chord', 'twist', 'total_losses', 'status']),
+                                  rotor.drop(columns=['chord', 'twist', 'total_losses', 'status']))
+    np.testing.assert_allclose(vectorized['chord'], rotor['chord'], atol=1e-5)
+    np.testing.assert_allclose(vectorized['twist'], rotor['twist'], atol=1e-2)
+
+
+def test_rotor_geometry_matches_the_per_iteration_formulas():
+    rotor = create_rotor()
+    geometry = rotor.get_geometry()
+    assert rotor.get_geometry() is geometry
+    [Radius, Nb, radius_hub] = [rotor.blade_radius, rotor.no_blades, rotor.radius_hub_pctg * rotor.blade_radius]
+    phi_radians = np.deg2rad(np.linspace(2, 80, 7))
+    for i, radius in enumerate(rotor.radial_design_points):
+        # Solidity and losses as the original solver computed them on every iteration.
+        sigma_r = Nb * rotor.blade_chord[i] / (2 * np.pi * radius)
+        F_tip = (2 / np.pi) * np.arccos(np.exp(-(((Nb / 2) * (1 - (radius / Radius))) / ((radius / Radius) * (np.sin(phi_radians))))))
+        F_root = (2 / np.pi) * np.arccos(np.exp(-((Nb / 2) * ((radius - radius_hub) / (radius * np.sin(phi_radians))))))
+        assert geometry.solidity[i] == pytest.approx(sigma_r, rel=1e-15)
+        np.testing.assert_allclose(geometry.losses(phi_radians, i), F_tip * F_root, rtol=1e-12)
+        assert geometry.tangential_speed(rotor.omega, i) == rotor.omega * radius
+    # The geometry is frozen and rebuilt when the blade changes.
+    with pytest.raises(AttributeError):
+        geometry.chord = geometry.chord
+    with pytest.raises(ValueError):
+        geometry.chord[0] = 1.0
+    rotor.blade_chord = [1.1 * chord for chord in rotor.blade_chord]
+    assert rotor.get_geometry() is not geometry
+    np.testing.assert_allclose(rotor.get_geometry().solidity, 1.1 * geometry.solidity, rtol=1e-14)
+    [segmented_radius, thrust_weights, power_weights] = geometry.segment_weights(10)
+    np.testing.assert_allclose(segmented_radius, np.linspace(rotor.initial_point_pctg * Radius, Radius, 11))
+    segments = list(zip(segmented_radius[:-1], segmented_radius[1:]))
+    np.testing.assert_allclose(thrust_weights, [integrate.quad(lambda r: r, *bounds)[0] for bounds in segments], rtol=1e-12)
+    np.testing.assert_allclose(power_weights, [integrate.quad(lambda r: r ** 3, *bounds)[0] for bounds in segments], rtol=1e-12)
+
+
+def test_results_writer_streams_chunks(tmp_path):
+    rows = [{'tip_speed_ratio': i, 'thrust': 10.0 * i, 'power': 0.5 * i} for i in range(7)]
+    frame = pd.DataFrame({'tip_speed_ratio': [7.5, 8.0, 8.5, 9.0], 'thrust': [75.0, 80.0, 85.0, 90.0], 'power': 0.0})
+    expected = pd.concat([pd.DataFrame(rows), frame], ignore_index=True).astype(float)
+    read = {'csv': pd.read_csv, 'npy': lambda path: pd.DataFrame(np.load(path)),
+            'parquet': pd.read_parquet, 'feather': pd.read_feather}
+    formats = ['csv', 'npy'] + (['parquet', 'feather'] if importlib.util.find_spec('pyarrow') else [])
+    for file_format in formats:
+        path = str(tmp_path / f"sweep.{file_format}")
+        with ResultsWriter(path, chunk_rows=3) as writer:
+            writer.write_rows(rows)
+            # Only the complete chunks are written, the CSV and .npy files can be read while the writer is open.
+            assert writer.no_rows == 6 and len(writer.rows) == 1
+            if file_format in ('csv', 'npy'):
+                pd.testing.assert_frame_equal(read[file_format](path).astype(float), expected.iloc[:6])
+            writer.write_frame(frame)
+        assert writer.no_rows == len(expected)
+        # The integer column of the first chunk keeps the fractional values of the later ones.
+        pd.testing.assert_frame_equal(read[file_format](path).astype(float), expected, check_exact=True)
+    with pytest.raises(ValueError):
+        ResultsWriter(str(tmp_path / 'sweep.xlsx'))
+    with pytest.raises(ValueError):
+        with ResultsWriter(str(tmp_path / 'names.npy')) as writer:
+            writer.write({'hydrofoil': 'NACA-63812', 'chord': 0.1})
+
+
+def test_station_results_fill_the_rotor_attributes():
+    results = StationResults(4, ('thrust', 'power'))
+    assert len(results) == 4 and results.fields == ('thrust', 'power') and np.isnan(results['thrust']).all()
+    # Scalars and one-element arrays of one station, or arrays of several stations in the order of the indices.
+    results.store(0, thrust=np.array([1.0]), power=2.0)
+    results.store([3, 1], thrust=np.array([4.0, 2.0]), power=np.array([8.0, 4.0]))
+    lists = results.to_lists()
+    assert all(type(value) is float for value in lists['thrust'])
+    np.testing.assert_array_equal(lists['thrust'], [1.0, 2.0, np.nan, 4.0])
+    np.testing.assert_array_equal(results.to_frame()['power'], [2.0, 4.0, np.nan, 8.0])
+
+    rotor = create_rotor()
+    for batched in (False, True):
+        rotor.evaluate_bemt(batched=batched)
+        assert rotor.results.fields == STANDARD_ROTOR_FIELDS and len(rotor.results) == len(rotor.radial_design_points)
+        for name in STANDARD_ROTOR_FIELDS:
+            assert all(type(value) is float for value in getattr(rotor, name))
+            np.testing.assert_array_equal(getattr(rotor, name), rotor.results[name])
+        # The Reynolds numbers are only stored by the Reynolds-aware evaluation, the other stations are all solved.
+        frame = rotor.results.to_frame()
+        assert frame['reynolds_numbers'].isna().all() and not frame.drop(columns='reynolds_numbers').isna().any().any()
+    optimal_rotor = create_optimal_rotor()
+    optimal_rotor.get_optimal_chord_twist(progress=False)
+    assert optimal_rotor.results.fields == OPTIMAL_ROTOR_FIELDS
+    for name in OPTIMAL_ROTOR_FIELDS:
+        assert all(type(value) is float for value in getattr(optimal_rotor, name))
+        np.testing.assert_array_equal(getattr(optimal_rotor, name), optimal_rotor.results[name])
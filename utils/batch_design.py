@@ -0,0 +1,259 @@
+import io
+import itertools
+import contextlib
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utils.optimal_bemt import OptimalRotor, INNER_TOLERANCE, get_polar_fit, cached_polar_fits, update_polar_fits
+from utils.induction import momentum_coefficients, tangential_induction
+from utils.convergence import ConvergenceController
+from utils.blade_definition import design_positions
+
+# Available methods of the batch design.
+# vectorized: all the design points of a chunk of candidates are solved at once (target induction imposed).
+# rotor:      every candidate is designed by OptimalRotor.get_optimal_chord_twist (chord solvers and induction engines).
+DESIGN_METHODS = ('vectorized', 'rotor')
+
+# Keys of the operative state used by the design, the integer ones are cast from the candidate table.
+DESIGN_KEYS = ('optimal_speed', 'tip_speed_ratio', 'blade_radius', 'no_blades', 'radius_hub_pctg', 'initial_point_pctg',
+               'final_point_pctg', 'no_design_points')
+INTEGER_KEYS = ('no_blades', 'no_design_points')
+
+# Design settings of the worker process, they are sent once through the initializer of the pool.
+_worker_design = None
+
+
+def operative_state_grid(operative_state: dict, **parameters):
+    """
+    Function for creating the full-factorial table of candidate operative states. The parameters that are
+    not varied are taken from the base operative state.
+    :param operative_state: dict, base operative state data.
+    :param parameters: list or ndarray, values of the varied keys (e.g. blade_radius=[0.5, 1.0], no_blades=[2, 3]).
+    :return: operative_states: pd.DataFrame, one row per candidate with the keys of the operative state as columns.
+    """
+    unknown = [key for key in parameters if key not in DESIGN_KEYS]
+    if unknown:
+        raise ValueError(f"Keys {unknown} are not design parameters. Please select some of {DESIGN_KEYS}.")
+    keys = list(parameters.keys())
+    grid = pd.DataFrame(list(itertools.product(*[np.atleast_1d(parameters[key]) for key in keys])), columns=keys)
+    for key in DESIGN_KEYS:
+        if key not in grid:
+            grid[key] = operative_state[key]
+    return grid[list(DESIGN_KEYS)]
+
+
+def design_stations(radius, blade_radius, radius_hub, no_blades, speed, omega, alpha, coeff_lift, coeff_drag,
+                    target_induction: float = 1 / 3, convergence: ConvergenceController = None):
+    """
+    Function to design several design points (of any number of candidates) at once. With the axial induction
+    factor imposed at the target one, the axial momentum equation gives the local solidity,
+    sigma = 4 F sin(phi)^2 k_a / C_x with k_a = a / (1 - a), and the tangential momentum equation becomes a
+    fixed-point iteration in the tangential induction factor alone. The chord, c = 2 pi r sigma / Nb, is then
+    the root of a(chord) = target_induction that OptimalRotor.solve_chord brackets design point by design point.
+    :param radius: ndarray, local radius of the design points [m].
+    :param blade_radius: ndarray, blade radius of the design points [m].
+    :param radius_hub: ndarray, hub radius of the design points [m].
+    :param no_blades: ndarray, number of blades of the design points.
+    :param speed: ndarray, inflow speed of the design points [m/s].
+    :param omega: ndarray, angular speed of the design points [rad/s].
+    :param alpha: ndarray, optimal angle of attack of the design points [deg].
+    :param coeff_lift: ndarray, lift coefficient at the optimal angle of attack.
+    :param coeff_drag: ndarray, drag coefficient at the optimal angle of attack.
+    :param target_induction: float, axial induction factor of the optimal rotor.
+    :param convergence: ConvergenceController, settings of the fixed-point iteration (plain iteration if None).
+    :return: chord, twist, b, F_total, status: ndarray, chord [m], twist [deg], tangential induction factor,
+    total losses and convergence status of every design point.
+    """
+    convergence = ConvergenceController() if convergence is None else convergence
+    no_points = len(radius)
+    a = np.full(no_points, target_induction)
+    k_a = target_induction / (1 - target_induction)
+    [chord, twist, F_total] = [np.zeros(no_points) for _ in range(3)]
+    state = convergence.start(a, np.zeros(no_points), INNER_TOLERANCE)
+    while np.any(state.active):
+        index = np.flatnonzero(state.active)
+        b = state.b[index]
+        r = radius[index]
+        R = blade_radius[index]
+        Nb = no_blades[index]
+
+        # Compute the inflow angle of the relative velocities.
+        phi_radians = np.arctan(speed[index] * (1 - target_induction) / (omega[index] * r * (1 + b)))
+        C_x = coeff_lift[index] * np.cos(phi_radians) + coeff_drag[index] * np.sin(phi_radians)
+        C_y = coeff_lift[index] * np.sin(phi_radians) - coeff_drag[index] * np.cos(phi_radians)
+
+        # Compute the tip and root losses.
+        F_tip = (2 / np.pi) * np.arccos(np.exp(-(((Nb / 2) * (1 - (r / R))) / ((r / R) * (np.sin(phi_radians))))))
+        F_root = (2 / np.pi) * np.arccos(np.exp(-((Nb / 2) * ((r - radius_hub[index]) / (r * np.sin(phi_radians))))))
+        F = F_tip * F_root
+
+        # Solidity of the target axial induction factor and the resulting tangential induction factor.
+        sigma_r = 4 * F * np.sin(phi_radians) ** 2 * k_a / C_x
+        [_, k_b] = momentum_coefficients(sigma_r, C_x, C_y, F, phi_radians)
+        state.update(index, a[index], tangential_induction(k_b))
+
+        chord[index] = 2 * np.pi * r * sigma_r / Nb
+        twist[index] = np.rad2deg(phi_radians) - alpha[index]
+        F_total[index] = F
+    return chord, twist, state.b, F_total, state.status.astype(str)
+
+
+def candidate_design_points(operative_state: dict, hydrofoils: dict = None, blade=None):
+    """
+    Function to get the design points of a candidate and their hydrofoils, as OptimalRotor defines them.
+    :param operative_state: dict, operative state data of the candidate.
+    :param hydrofoils: dict, dictionary containing the hydrofoil data (one per design point, legacy layout).
+    :param blade: BladeDefinition, radial layout of the hydrofoils (any number of design points).
+    :return: design_points, names, hydrofoils_data: ndarray, list, dict.
+    """
+    design_points = np.linspace(operative_state['initial_point_pctg'] * operative_state['blade_radius'],
+                                operative_state['final_point_pctg'] * operative_state['blade_radius'], operative_state['no_design_points'])
+    design_points[-1] = design_points[-1] * 0.975
+    hydrofoils_data = hydrofoils if blade is None else blade.station_data(design_positions(operative_state))
+    return design_points, list(hydrofoils_data.keys())[::-1], hydrofoils_data
+
+
+def _initialize_worker(design: dict, polar_fits: dict):
+    """
+    Function for initializing a worker process with the design settings and the shared polynomial fits.
+    :param design: dict, fluid properties, hydrofoils, blade and solver settings of the design.
+    :param polar_fits: dict, polynomial fits of the hydrofoils computed by the main process.
+    """
+    global _worker_design
+    _worker_design = design
+    update_polar_fits(polar_fits)
+    return None
+
+
+def _design_candidate(candidate: int, operative_state: dict):
+    """
+    Function for designing the blade of a candidate operative state with the settings of the worker process.
+    :param candidate: int, index of the candidate.
+    :param operative_state: dict, operative state data of the candidate.
+    :return: records: list, one record per design point (chord, twist, angle of attack and convergence status).
+    """
+    design = _worker_design
+    rotor = OptimalRotor(fluid_properties=design['fluid_properties'], operative_state=operative_state,
+                         hydrofoils=design['hydrofoils'], induction_engine=design['induction_engine'],
+                         convergence=design['convergence'], blade=design['blade'])
+    # The messages of the design are replaced by the status column of the records.
+    with contextlib.redirect_stdout(io.StringIO()):
+        rotor.get_design_points()
+        rotor.get_optimal_chord_twist(chord_solver=design['chord_solver'], chord_tolerance=design['chord_tolerance'],
+                                      target_induction=design['target_induction'], progress=False)
+    report = rotor.convergence_report
+    status = report['status'].tolist() if len(report) == len(rotor.optimal_chord) else ['solved'] * len(rotor.optimal_chord)
+    names = list(rotor.hydrofoils_data.keys())[::-1]
+    return [{'candidate': candidate, **{key: operative_state[key] for key in DESIGN_KEYS}, 'station': i, 'hydrofoil': names[i],
+             'radius': float(rotor.design_points[i]), 'chord': float(rotor.optimal_chord[i]), 'twist': float(rotor.optimal_betas[i]),
+             'alpha': float(rotor.optimal_alphas[i]), 'total_losses': float(rotor.total_losses[i]), 'status': status[i]}
+            for i in range(len(rotor.optimal_chord))]
+
+
+def _design_chunk_vectorized(candidates: list):
+    """
+    Function for designing a chunk of candidates at once (see design_stations) with the settings of the worker process.
+    :param candidates: list, (index, operative state) of the candidates of the chunk.
+    :return: design: pd.DataFrame, one row per design point of the chunk.
+    """
+    design = _worker_design
+    columns = {key: [] for key in ('candidate', 'station', 'hydrofoil', 'radius', 'alpha', 'coeff_lift', 'coeff_drag')}
+    columns.update({key: [] for key in DESIGN_KEYS})
+    for candidate, operative_state in candidates:
+        [design_points, names, hydrofoils_data] = candidate_design_points(operative_state, design['hydrofoils'], design['blade'])
+        fits = [get_polar_fit(name, hydrofoils_data[name]) for name in names]
+        columns['candidate'].extend([candidate] * len(names))
+        columns['station'].extend(range(len(names)))
+        columns['hydrofoil'].extend(names)
+        columns['radius'].extend(design_points)
+        columns['alpha'].extend(fit['optimal_alpha'] for fit in fits)
+        columns['coeff_lift'].extend(fit['optimal_cl'] for fit in fits)
+        columns['coeff_drag'].extend(fit['optimal_cd'] for fit in fits)
+        for key in DESIGN_KEYS:
+            columns[key].extend([operative_state[key]] * len(names))
+    points = pd.DataFrame(columns)
+    [radius, blade_radius, no_blades, speed] = [points[key].to_numpy(dtype=float) for key in ('radius', 'blade_radius', 'no_blades', 'optimal_speed')]
+    omega = points['tip_speed_ratio'].to_numpy(dtype=float) * speed / blade_radius
+    radius_hub = points['radius_hub_pctg'].to_numpy(dtype=float) * blade_radius
+    [chord, twist, _, F_total, status] = design_stations(radius, blade_radius, radius_hub, no_blades, speed, omega, points['alpha'].to_numpy(),
+                                                         points['coeff_lift'].to_numpy(), points['coeff_drag'].to_numpy(),
+                                                         design['target_induction'], design['convergence'])
+    points = points.drop(columns=['coeff_lift', 'coeff_drag'])
+    points = points.assign(chord=chord, twist=twist, total_losses=F_total, status=status)
+    return points[['candidate', *DESIGN_KEYS, 'station', 'hydrofoil', 'radius', 'chord', 'twist', 'alpha', 'total_losses', 'status']]
+
+
+def _design_chunk(candidates: list):
+    """
+    Function for designing a chunk of candidates with the settings of the worker process.
+    :param candidates: list, (index, operative state) of the candidates of the chunk.
+    :return: design: pd.DataFrame, one row per design point of the chunk.
+    """
+    if _worker_design['method'] == 'vectorized':
+        return _design_chunk_vectorized(candidates)
+    return pd.DataFrame([record for candidate, operative_state in candidates for record in _design_candidate(candidate, operative_state)])
+
+
+def design_rotors(fluid_properties: dict, operative_states, hydrofoils: dict = None, blade=None, method: str = 'vectorized',
+                  induction_engine: str = 'analytic', convergence=None, chord_solver: str = 'brent', chord_tolerance: float = None,
+                  target_induction: float = 1 / 3, max_workers: int = None, chunk_size: int = 256):
+    """
+    Function for designing the optimal chord and twist distributions of a table of candidate operative states
+    (e.g. different radii, blade counts, tip speed ratios and hub ratios) with a process pool. The polynomial
+    fits and optimal angles of attack of the hydrofoils (or of the stations of every grid of the blade definition)
+    are computed once and sent to every worker through the initializer of the pool with the rest of the settings,
+    so only the operative states are pickled per task. The candidates are split in chunks and the results are
+    returned in the same order as the candidates.
+    The 'vectorized' method solves all the design points of a chunk at once (see design_stations), its chords
+    match the ones of the 'rotor' method within the chord tolerance, and the induction engine and chord solver
+    only apply to the 'rotor' method.
+    :param fluid_properties: dict, dictionary containing the fluid properties.
+    :param operative_states: pd.DataFrame or list, candidate operative states (see operative_state_grid).
+    :param hydrofoils: dict, dictionary containing the hydrofoil data (one per design point, legacy layout).
+    :param blade: BladeDefinition, radial layout of the hydrofoils (any number of design points).
+    :param method: str, design method ('vectorized' or 'rotor').
+    :param induction_engine: str, engine for the induction factors ('fsolve', 'analytic', 'glauert' or 'bracketed').
+    :param convergence: ConvergenceController, settings of the fixed-point iteration (plain iteration if None).
+    :param chord_solver: str, solver for a(chord) = target_induction ('increment', 'bisection', 'secant' or 'brent').
+    :param chord_tolerance: float, tolerance of the optimal chord [m] (step of the 'increment' solver, see get_optimal_chord_twist).
+    :param target_induction: float, axial induction factor of the optimal rotor.
+    :param max_workers: int, number of worker processes (by default the number of processors). With
+    max_workers=1 the candidates are designed in the current process.
+    :param chunk_size: int, number of candidates sent to a worker per task.
+    :return: design: pd.DataFrame, one row per candidate and design point with the keys of the operative state,
+    radius, chord, twist, angle of attack, total losses and convergence status.
+    """
+    if method not in DESIGN_METHODS:
+        raise ValueError(f"Design method {method} is not available. Please select one of {DESIGN_METHODS}.")
+    if hydrofoils is None and blade is None:
+        raise ValueError("The hydrofoil data or the blade definition must be provided.")
+    if isinstance(operative_states, pd.DataFrame):
+        operative_states = operative_states.to_dict(orient='records')
+    operative_states = [{**state, **{key: int(state[key]) for key in INTEGER_KEYS}} for state in operative_states]
+    if blade is None:
+        mismatched = [i for i, state in enumerate(operative_states) if state['no_design_points'] != len(hydrofoils)]
+        if mismatched:
+            raise ValueError(f"Candidates {mismatched} do not have one design point per hydrofoil, please use a blade definition.")
+
+    # Fit the polars of the hydrofoils (or of the stations of every grid of the blade) once, the workers share the fits.
+    if blade is None:
+        grids = [hydrofoils]
+    else:
+        positions = {design_positions(state).tobytes(): design_positions(state) for state in operative_states}
+        grids = [blade.station_data(grid) for grid in positions.values()]
+    for grid in grids:
+        for name, data in grid.items():
+            get_polar_fit(name, data)
+    polar_fits = cached_polar_fits()
+    design = {'method': method, 'fluid_properties': fluid_properties, 'hydrofoils': hydrofoils, 'blade': blade, 'induction_engine': induction_engine,
+              'convergence': convergence, 'chord_solver': chord_solver, 'chord_tolerance': chord_tolerance,
+              'target_induction': target_induction}
+    candidates = list(enumerate(operative_states))
+    chunks = [candidates[i:i + chunk_size] for i in range(0, len(candidates), chunk_size)]
+    if max_workers == 1:
+        _initialize_worker(design, polar_fits)
+        results = [_design_chunk(chunk) for chunk in chunks]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker, initargs=(design, polar_fits)) as executor:
+            results = list(executor.map(_design_chunk, chunks))
+    return pd.concat(results, ignore_index=True)
@@ -0,0 +1,328 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tempfile
+import datetime
+import subprocess
+import contextlib
+import numpy as np
+import scipy
+from airfoilprep import Polar
+from airfoilprep import Hydrofoil
+from utils.optimal_bemt import OptimalRotor
+from utils.evaluation_bemt import StandardRotor
+from utils.polar_interpolation import clear_polar_interpolators
+
+# Default number of radial stations (i.e. hydrofoils) and Tip Speed Ratios of the benchmark cases.
+STATION_COUNTS = (8, 64, 512, 4096)
+TSR_COUNTS = (1, 8)
+# Largest number of stations of the optimal design case (it solves the chord of every station in Python).
+DESIGN_MAX_STATIONS = 512
+# Available benchmark cases.
+BENCHMARK_CASES = ('optimal_chord_twist', 'evaluate_bemt', 'evaluate_performance', 'extrapolate', 'write_aerodyn')
+
+# Fluid properties and operative state of the synthetic rotors (same turbine as the turbine folder).
+SYNTHETIC_FLUID_PROPERTIES = {'density': 1025, 'kinematic_viscosity': 8.6114e-07, 'dynamic_viscosity': 0.0008829,
+                              'salinity': 35, 'temperature': 29}
+SYNTHETIC_OPERATIVE_STATE = {'optimal_speed': 1.5, 'tip_speed_ratio': 5.0, 'angular_speed': 15, 'rpm': 143.239,
+                             'blade_radius': 0.5, 'no_blades': 3, 'radius_hub_pctg': 0.20, 'initial_point_pctg': 0.30,
+                             'final_point_pctg': 1.00, 'no_design_points': 8, 'operative_reynolds': 298000}
+
+
+def synthetic_hydrofoils(no_stations: int, reynolds: float = 298000):
+    """
+    Function for creating reproducible synthetic hydrofoil data with the structure of the hydrofoil files.
+    The polars are smooth NACA-63-like curves between -4 and 20 deg, and the thickness of the hydrofoils
+    decreases linearly from the root to the tip, so every station has a slightly different polar.
+    :param no_stations: int, number of hydrofoils (i.e. design points).
+    :param reynolds: float, Reynolds number of the polars.
+    :return: hydrofoils: dict, dictionary containing the hydrofoil data.
+    """
+    alpha = np.arange(-4.0, 21.0, 2.0)
+    hydrofoils = {}
+    for i, thickness in enumerate(np.linspace(0.21, 0.12, no_stations)):
+        scale = (thickness - 0.12) / 0.09
+        cl = (0.595 + 0.105 * alpha - 0.0036 * alpha ** 2) * (1 - 0.05 * scale)
+        cd = (0.0165 + 0.00012 * (alpha - 1) ** 2 + 3e-8 * (alpha + 4) ** 5) * (1 + 0.10 * scale)
+        name = f"SYN-{i:04d}"
+        hydrofoils[name] = {'alpha': alpha.tolist(), 'cl': cl.tolist(), 'cd': cd.tolist(), 'cm': np.zeros(len(alpha)).tolist(),
+                            'efficiency': (cl / cd).tolist(), 'hydrofoil': name, 'reynolds': reynolds, 'source': 'synthetic'}
+    return hydrofoils
+
+
+def synthetic_operative_state(no_stations: int, tip_speed_ratio: float = 5.0):
+    """
+    Function for creating the operative state of a synthetic rotor with the given number of design points.
+    :param no_stations: int, number of design points.
+    :param tip_speed_ratio: float, design Tip Speed Ratio.
+    :return: operative_state: dict, dictionary containing the operative state data.
+    """
+    operative_state = dict(SYNTHETIC_OPERATIVE_STATE)
+    operative_state['no_design_points'] = no_stations
+    operative_state['tip_speed_ratio'] = tip_speed_ratio
+    return operative_state
+
+
+def synthetic_extrapolated_hydrofoils(hydrofoils: dict):
+    """
+    Function for extrapolating the synthetic hydrofoil data to -180 to 180 degrees, as extrapolate_hydrofoil_data does.
+    :param hydrofoils: dict, dictionary containing the hydrofoil data.
+    :return: hydrofoils_extended: dict, dictionary containing the extrapolated hydrofoil data.
+    """
+    hydrofoils_extended = {}
+    for name, data in hydrofoils.items():
+        polar = Polar(Re=data['reynolds'], alpha=data['alpha'], cl=data['cl'], cd=data['cd'], cm=data['cm'])
+        polar = polar.extrapolate(cdmax=1.11 + 0.018 * 10, AR=10, cdmin=np.min(data['cd']))
+        hydrofoils_extended[name] = {'alpha': polar.alpha, 'cl': polar.cl, 'cd': polar.cd, 'cm': polar.cm, 'reynolds': polar.Re}
+    return hydrofoils_extended
+
+
+def synthetic_blade(hydrofoils: dict, operative_state: dict):
+    """
+    Function for computing the Betz-optimal chord and twist of a synthetic rotor, so a StandardRotor can be
+    evaluated without running the optimal design first. The stations use the hydrofoils in reversed order,
+    as the OptimalRotor and StandardRotor objects do.
+    :param hydrofoils: dict, dictionary containing the hydrofoil data.
+    :param operative_state: dict, dictionary containing the operative state data.
+    :return: blade_chord, blade_twist: list, chord [m] and twist [deg] of every station.
+    """
+    Radius = operative_state['blade_radius']
+    radius = np.linspace(operative_state['initial_point_pctg'], operative_state['final_point_pctg'],
+                         operative_state['no_design_points']) * Radius
+    radius[-1] = radius[-1] * 0.975
+    blade_chord = []
+    blade_twist = []
+    for local_radius, name in zip(radius, list(hydrofoils.keys())[::-1]):
+        efficiency = np.asarray(hydrofoils[name]['cl']) / np.asarray(hydrofoils[name]['cd'])
+        optimal = np.argmax(efficiency)
+        lambda_r = operative_state['tip_speed_ratio'] * local_radius / Radius
+        phi = (2 / 3) * np.arctan(1 / lambda_r)
+        blade_chord.append(8 * np.pi * local_radius * (1 - np.cos(phi)) / (operative_state['no_blades'] * hydrofoils[name]['cl'][optimal]))
+        blade_twist.append(np.rad2deg(phi) - hydrofoils[name]['alpha'][optimal])
+    return blade_chord, blade_twist
+
+
+def time_function(function, repeats: int = 3):
+    """
+    Function for timing a callable. The standard output of the callable is discarded.
+    :param function: callable, function without arguments to be timed.
+    :param repeats: int, number of timed calls.
+    :return: timing: dict, minimum, median and mean wall time [s] of the calls.
+    """
+    times = []
+    for _ in range(repeats):
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            start = time.perf_counter()
+            function()
+            times.append(time.perf_counter() - start)
+    return {'repeats': repeats, 'min': float(np.min(times)), 'median': float(np.median(times)), 'mean': float(np.mean(times))}
+
+
+def benchmark_optimal_chord_twist(no_stations: int, repeats: int):
+    """
+    Function for timing OptimalRotor.get_optimal_chord_twist (without polar plots) on a synthetic rotor.
+    :param no_stations: int, number of design points.
+    :param repeats: int, number of timed calls.
+    :return: timing: dict.
+    """
+    hydrofoils = synthetic_hydrofoils(no_stations)
+    operative_state = synthetic_operative_state(no_stations)
+
+    def run():
+        rotor = OptimalRotor(fluid_properties=SYNTHETIC_FLUID_PROPERTIES, operative_state=operative_state, hydrofoils=hydrofoils)
+        rotor.get_design_points()
+        rotor.get_optimal_chord_twist()
+
+    return time_function(run, repeats)
+
+
+def benchmark_evaluate_bemt(rotor: StandardRotor, tip_speed_ratios, repeats: int, batched: bool):
+    """
+    Function for timing StandardRotor.evaluate_bemt over a set of Tip Speed Ratios.
+    :param rotor: StandardRotor, rotor to be evaluated.
+    :param tip_speed_ratios: ndarray, Tip Speed Ratios evaluated per call.
+    :param repeats: int, number of timed calls.
+    :param batched: bool, if True all the radial stations are solved at once.
+    :return: timing: dict.
+    """
+    def run():
+        for tsr in tip_speed_ratios:
+            rotor.tip_speed_ratio = tsr
+            rotor.omega = rotor.optimal_speed * tsr / rotor.blade_radius
+            rotor.evaluate_bemt(batched=batched)
+
+    return time_function(run, repeats)
+
+
+def benchmark_evaluate_performance(rotor: StandardRotor, repeats: int, integration: str):
+    """
+    Function for timing StandardRotor.evaluate_performance on a solved rotor.
+    :param rotor: StandardRotor, solved rotor.
+    :param repeats: int, number of timed calls.
+    :param integration: str, integration rule of the thrust and power.
+    :return: timing: dict.
+    """
+    return time_function(lambda: rotor.evaluate_performance(integration=integration), repeats)
+
+
+def benchmark_extrapolate(hydrofoils: dict, repeats: int):
+    """
+    Function for timing Polar.extrapolate on every synthetic polar.
+    :param hydrofoils: dict, dictionary containing the hydrofoil data.
+    :param repeats: int, number of timed calls.
+    :return: timing: dict.
+    """
+    polars = [Polar(Re=data['reynolds'], alpha=data['alpha'], cl=data['cl'], cd=data['cd'], cm=data['cm']) for data in hydrofoils.values()]
+    return time_function(lambda: [polar.extrapolate(cdmax=1.11 + 0.018 * 10, AR=10, cdmin=np.min(polar.cd)) for polar in polars], repeats)
+
+
+def benchmark_write_aerodyn(hydrofoils: dict, repeats: int, path: str):
+    """
+    Function for timing Hydrofoil.writeToAerodynFile on every extrapolated synthetic hydrofoil.
+    :param hydrofoils: dict, dictionary containing the hydrofoil data.
+    :param repeats: int, number of timed calls.
+    :param path: str, path to the folder where the AeroDyn files are saved.
+    :return: timing: dict.
+    """
+    hydrofoils_obj = {}
+    for name, data in hydrofoils.items():
+        polar = Polar(Re=data['reynolds'], alpha=data['alpha'], cl=data['cl'], cd=data['cd'], cm=data['cm'])
+        hydrofoils_obj[name] = Hydrofoil([polar]).extrapolate(cdmax=1.11 + 0.018 * 10, AR=10, cdmin=np.min(data['cd']))
+    return time_function(lambda: [hydrofoil.writeToAerodynFile(f"{path}/{name}.dat") for name, hydrofoil in hydrofoils_obj.items()],
+                         repeats)
+
+
+def git_commit():
+    """
+    Function for getting the current git commit of the repository (None outside a git repository).
+    :return: commit: str, hash of the current commit.
+    """
+    try:
+        return subprocess.check_output(['git', 'rev-parse', 'HEAD'], stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmarks(station_counts=STATION_COUNTS, tsr_counts=TSR_COUNTS, cases=BENCHMARK_CASES, repeats: int = 3,
+                   design_max_stations: int = DESIGN_MAX_STATIONS):
+    """
+    Function for running the benchmark suite of the BEMT design and evaluation pipeline on synthetic rotors.
+    Every case is timed at every number of stations (and of Tip Speed Ratios for evaluate_bemt).
+    :param station_counts: list, numbers of radial stations (i.e. hydrofoils).
+    :param tsr_counts: list, numbers of Tip Speed Ratios (between 3 and 7) evaluated by evaluate_bemt.
+    :param cases: list, benchmark cases to be run (see BENCHMARK_CASES).
+    :param repeats: int, number of timed calls of every case.
+    :param design_max_stations: int, largest number of stations of the optimal_chord_twist case.
+    :return: report: dict, environment and results of the benchmark suite.
+    """
+    for case in cases:
+        if case not in BENCHMARK_CASES:
+            raise ValueError(f"Benchmark case {case} is not available. Please select one of {BENCHMARK_CASES}.")
+    report = {'commit': git_commit(), 'date': datetime.datetime.now().isoformat(timespec='seconds'),
+              'python': platform.python_version(), 'numpy': np.__version__, 'scipy': scipy.__version__,
+              'platform': platform.platform(), 'processors': os.cpu_count(), 'results': []}
+    with tempfile.TemporaryDirectory() as path:
+        for no_stations in station_counts:
+            hydrofoils = synthetic_hydrofoils(no_stations)
+            if 'optimal_chord_twist' in cases and no_stations <= design_max_stations:
+                timing = benchmark_optimal_chord_twist(no_stations, repeats)
+                report['results'].append({'case': 'optimal_chord_twist', 'stations': no_stations, **timing})
+            if 'extrapolate' in cases:
+                report['results'].append({'case': 'extrapolate', 'stations': no_stations, **benchmark_extrapolate(hydrofoils, repeats)})
+            if 'write_aerodyn' in cases:
+                timing = benchmark_write_aerodyn(hydrofoils, repeats, path)
+                report['results'].append({'case': 'write_aerodyn', 'stations': no_stations, **timing})
+            if 'evaluate_bemt' not in cases and 'evaluate_performance' not in cases:
+                continue
+            operative_state = synthetic_operative_state(no_stations)
+            [blade_chord, blade_twist] = synthetic_blade(hydrofoils, operative_state)
+            clear_polar_interpolators()
+            rotor = StandardRotor(fluid_properties=SYNTHETIC_FLUID_PROPERTIES, operative_state=operative_state,
+                                  hydrofoils=synthetic_extrapolated_hydrofoils(hydrofoils), blade_chord=blade_chord,
+                                  blade_twist=blade_twist, tip_speed_ratio=operative_state['tip_speed_ratio'])
+            if 'evaluate_bemt' in cases:
+                for no_tsr in tsr_counts:
+                    tip_speed_ratios = np.linspace(3, 7, no_tsr) if no_tsr > 1 else [operative_state['tip_speed_ratio']]
+                    for batched in (False, True):
+                        timing = benchmark_evaluate_bemt(rotor, tip_speed_ratios, repeats, batched)
+                        report['results'].append({'case': 'evaluate_bemt', 'stations': no_stations, 'tsr_count': no_tsr,
+                                                  'batched': batched, **timing})
+            if 'evaluate_performance' in cases:
+                rotor.evaluate_bemt(batched=True)
+                for integration in ('analytic', 'quad'):
+                    timing = benchmark_evaluate_performance(rotor, repeats, integration)
+                    report['results'].append({'case': 'evaluate_performance', 'stations': no_stations, 'integration': integration,
+                                              **timing})
+    return report
+
+
+def compare_benchmarks(baseline: dict, current: dict, threshold: float = 1.10):
+    """
+    Function for comparing two benchmark reports (e.g. of two commits). The cases are matched by all their
+    parameters and compared by the minimum wall time.
+    :param baseline: dict, benchmark report of the reference commit.
+    :param current: dict, benchmark report of the new commit.
+    :param threshold: float, ratio current/baseline above which a case is reported as a regression.
+    :return: comparison: list, one dict per matched case with the baseline and current times and their ratio.
+    """
+    timing_keys = ('repeats', 'min', 'median', 'mean')
+
+    def key(result):
+        return tuple(sorted((name, value) for name, value in result.items() if name not in timing_keys))
+
+    baseline_results = {key(result): result for result in baseline['results']}
+    comparison = []
+    for result in current['results']:
+        if key(result) not in baseline_results:
+            continue
+        reference = baseline_results[key(result)]['min']
+        ratio = result['min'] / reference if reference > 0 else float('inf')
+        comparison.append({**dict(key(result)), 'baseline': reference, 'current': result['min'], 'ratio': ratio,
+                           'regression': ratio > threshold})
+    return comparison
+
+
+def main(arguments=None):
+    """
+    Command line interface of the benchmark suite, e.g.
+    python -m utils.benchmark --stations 8 64 --output benchmark.json --compare baseline.json
+    """
+    parser = argparse.ArgumentParser(description="Benchmark suite of the BEMT design and evaluation pipeline.")
+    parser.add_argument('--stations', type=int, nargs='+', default=list(STATION_COUNTS), help="numbers of radial stations")
+    parser.add_argument('--tsr', type=int, nargs='+', default=list(TSR_COUNTS), help="numbers of Tip Speed Ratios")
+    parser.add_argument('--cases', nargs='+', default=list(BENCHMARK_CASES), choices=BENCHMARK_CASES, help="benchmark cases")
+    parser.add_argument('--repeats', type=int, default=3, help="number of timed calls of every case")
+    parser.add_argument('--design-max-stations', type=int, default=DESIGN_MAX_STATIONS,
+                        help="largest number of stations of the optimal_chord_twist case")
+    parser.add_argument('--output', default=None, help="path of the JSON report (standard output if not given)")
+    parser.add_argument('--compare', default=None, help="path of a JSON report to compare with")
+    parser.add_argument('--threshold', type=float, default=1.10, help="time ratio reported as a regression")
+    arguments = parser.parse_args(arguments)
+
+    report = run_benchmarks(arguments.stations, arguments.tsr, arguments.cases, arguments.repeats, arguments.design_max_stations)
+    if arguments.output is None:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    else:
+        with open(arguments.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Benchmark report saved in {arguments.output}. (\u2713)")
+    if arguments.compare is not None:
+        with open(arguments.compare, 'r') as f:
+            baseline = json.load(f)
+        regressions = 0
+        for result in compare_benchmarks(baseline, report, arguments.threshold):
+            parameters = ', '.join(f"{name}={value}" for name, value in result.items()
+                                   if name not in ('baseline', 'current', 'ratio', 'regression'))
+            status = "(x)" if result['regression'] else "(\u2713)"
+            regressions += result['regression']
+            print(f"{parameters}: {result['baseline']:.4f} s -> {result['current']:.4f} s ({result['ratio']:.2f}x) {status}")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,187 @@
+import numpy as np
+from airfoilprep import Polar, Hydrofoil
+from utils.polar_interpolation import check_interpolation_mode, PolarInterpolator, StackedPolarInterpolator
+
+# Tolerance of the radial positions (fractions of the blade radius) of a station placed at a section.
+POSITION_TOLERANCE = 1e-9
+
+
+def design_positions(operative_state: dict):
+    """
+    Function for getting the radial positions at which the polars of a blade definition are blended for the design,
+    i.e. the design points with the last one at 97.5% of its radius (where it is evaluated).
+    :param operative_state: dict, dictionary containing the operative state data.
+    :return: positions: ndarray, radial positions of the design points as fractions of the blade radius.
+    """
+    positions = np.linspace(operative_state['initial_point_pctg'], operative_state['final_point_pctg'],
+                            operative_state['no_design_points'])
+    positions[-1] = positions[-1] * 0.975
+    return positions
+
+
+class BladeDefinition:
+    """
+    Class for the radial layout of the hydrofoil sections of a blade. Every section gives the hydrofoil at a
+    radial position (as a fraction of the blade radius), and the polars of any evaluation station are blended
+    with Hydrofoil.blend between its two neighbouring sections (the end sections are used outside of them).
+    The blended polars and their stacked interpolators are computed once per station grid and cached, hence
+    refining the radial grid does not require new polar files and the rotors (and their sweeps) reuse the same tables.
+    """
+
+    def __init__(self, positions, sections: list, hydrofoils: dict):
+        """
+        Constructor of the BladeDefinition class.
+        :param positions: list or ndarray, radial positions of the sections as fractions of the blade radius (increasing).
+        :param sections: list, names of the hydrofoils of the sections.
+        :param hydrofoils: dict, dictionary containing the hydrofoil data ('alpha', 'cl', 'cd', 'cm' and 'reynolds').
+        """
+        self.positions = np.asarray(positions, dtype=float)
+        self.sections = list(sections)
+        if self.positions.ndim != 1 or len(self.positions) != len(self.sections) or len(self.sections) == 0:
+            raise ValueError("The blade definition must have one hydrofoil for every radial position.")
+        if np.any(np.diff(self.positions) <= 0):
+            raise ValueError("The radial positions of the blade definition must be strictly increasing.")
+        missing = [name for name in self.sections if name not in hydrofoils]
+        if missing:
+            raise ValueError(f"Hydrofoils {missing} of the blade definition are not available.")
+        # Frozen hydrofoils, their polars are shared by the blends instead of copied.
+        self.hydrofoils = {name: Hydrofoil([Polar(hydrofoils[name]['reynolds'], hydrofoils[name]['alpha'], hydrofoils[name]['cl'],
+                                                  hydrofoils[name]['cd'], hydrofoils[name]['cm'])], frozen=True)
+                           for name in dict.fromkeys(self.sections)}
+        # Blended hydrofoils of the station grids computed so far, keyed by the station positions.
+        self.station_cache = {}
+        # Interpolators and stacked interpolators of the station grids computed so far, keyed by the station positions
+        # and the interpolation mode.
+        self.interpolator_cache = {}
+        self.stacked_cache = {}
+
+    @classmethod
+    def from_hydrofoils(cls, hydrofoils: dict, operative_state: dict):
+        """
+        Function to create the blade definition of the legacy layout, i.e. one hydrofoil per design point
+        in the reversed order of the hydrofoils dictionary. The dictionary follows the listing of the hydrofoils
+        folder, which is not sorted, hence an explicit layout is created with from_data (e.g. blade_definition.yml).
+        :param hydrofoils: dict, dictionary containing the hydrofoil data.
+        :param operative_state: dict, dictionary containing the operative state data.
+        :return: blade: BladeDefinition.
+        """
+        positions = np.linspace(operative_state['initial_point_pctg'], operative_state['final_point_pctg'], len(hydrofoils))
+        return cls(positions, list(hydrofoils.keys())[::-1], hydrofoils)
+
+    @classmethod
+    def from_data(cls, data: dict, hydrofoils: dict):
+        """
+        Function to create the blade definition of a blade definition data file (see load_blade_definition).
+        :param data: dict, dictionary containing the 'positions' and 'hydrofoils' of the sections.
+        :param hydrofoils: dict, dictionary containing the hydrofoil data.
+        :return: blade: BladeDefinition.
+        """
+        return cls(data['positions'], data['hydrofoils'], hydrofoils)
+
+    def station_sections(self, position: float):
+        """
+        Function to get the neighbouring sections of a station and the blending weight of the outer one.
+        :param position: float, radial position of the station as a fraction of the blade radius.
+        :return: lower, upper, weight: int, int, float (lower == upper for a station at a section or outside them).
+        """
+        upper = int(np.searchsorted(self.positions, position))
+        for j in (upper - 1, upper):
+            if 0 <= j < len(self.positions) and abs(self.positions[j] - position) <= POSITION_TOLERANCE:
+                return j, j, 0.0
+        if upper == 0 or upper == len(self.positions):
+            j = min(upper, len(self.positions) - 1)
+            return j, j, 0.0
+        weight = (position - self.positions[upper - 1]) / (self.positions[upper] - self.positions[upper - 1])
+        return upper - 1, upper, float(weight)
+
+    def station_hydrofoils(self, positions):
+        """
+        Function to get the blended hydrofoils of the evaluation stations. A station at a section takes its
+        hydrofoil, any other one blends the hydrofoils of the neighbouring sections linearly in radius.
+        :param positions: list or ndarray, radial positions of the stations as fractions of the blade radius.
+        :return: hydrofoils: list, Hydrofoil objects (airfoilprep) of the stations.
+        """
+        positions = np.asarray(positions, dtype=float)
+        key = positions.tobytes()
+        if key not in self.station_cache:
+            stations = []
+            for position in positions:
+                [lower, upper, weight] = self.station_sections(position)
+                if lower == upper:
+                    stations.append(self.hydrofoils[self.sections[lower]])
+                    continue
+                blended = self.hydrofoils[self.sections[lower]].blend(self.hydrofoils[self.sections[upper]], weight)
+                # Polars of different Reynolds numbers are blended into the same Reynolds number, keep only one of them.
+                polars = [polar for k, polar in enumerate(blended.polars) if k == 0 or polar.Re != blended.polars[k - 1].Re]
+                stations.append(Hydrofoil(polars, frozen=True))
+            self.station_cache[key] = stations
+        return self.station_cache[key]
+
+    def station_interpolators(self, positions, mode: str = 'linear'):
+        """
+        Function to get the interpolators of the polars of the evaluation stations. They are built once per station
+        grid and interpolation mode, hence the rotors of the same grid do not hash the blended polars again.
+        :param positions: list or ndarray, radial positions of the stations as fractions of the blade radius.
+        :param mode: str, interpolation mode ('linear', 'pchip', 'cubic' or 'table').
+        :return: interpolators: list, PolarInterpolator objects of the stations (from the first one to the last one).
+        """
+        positions = np.asarray(positions, dtype=float)
+        key = (positions.tobytes(), check_interpolation_mode(mode))
+        if key not in self.interpolator_cache:
+            polars = [hydrofoil.polars[0] for hydrofoil in self.station_hydrofoils(positions)]
+            self.interpolator_cache[key] = [PolarInterpolator(polar.alpha, polar.cl, polar.cd, mode, polar.cm) for polar in polars]
+        return self.interpolator_cache[key]
+
+    def station_polars(self, positions, mode: str = 'linear'):
+        """
+        Function to get the stacked interpolator of the polars of the evaluation stations (see get_stacked_polars
+        of the StandardRotor). It is built once per station grid and interpolation mode, hence the rotors of the
+        same grid do not stack the blended polars again.
+        :param positions: list or ndarray, radial positions of the stations as fractions of the blade radius.
+        :param mode: str, interpolation mode ('linear', 'pchip', 'cubic' or 'table').
+        :return: stacked_polars: StackedPolarInterpolator, stations from the first one to the last one.
+        """
+        positions = np.asarray(positions, dtype=float)
+        key = (positions.tobytes(), check_interpolation_mode(mode))
+        if key not in self.stacked_cache:
+            self.stacked_cache[key] = StackedPolarInterpolator(self.station_interpolators(positions, mode))
+        return self.stacked_cache[key]
+
+    def station_names(self, positions):
+        """
+        Function to get the names of the evaluation stations, i.e. the hydrofoil of a section or the
+        blended hydrofoils and the position of any other station.
+        :param positions: list or ndarray, radial positions of the stations as fractions of the blade radius.
+        :return: names: list.
+        """
+        names = []
+        for i, position in enumerate(np.asarray(positions, dtype=float)):
+            [lower, upper, _] = self.station_sections(position)
+            if lower == upper:
+                names.append(f"{i:03d} {self.sections[lower]}")
+            else:
+                names.append(f"{i:03d} {self.sections[lower]}+{self.sections[upper]} {position:.4f}")
+        return names
+
+    def station_data(self, positions):
+        """
+        Function to get the polars of the evaluation stations in the dictionary data structure of the rotors.
+        The rotors map the hydrofoils to the design points in reversed order, hence the stations are stored from
+        the last one to the first one.
+        :param positions: list or ndarray, radial positions of the stations as fractions of the blade radius.
+        :return: hydrofoils: dict, dictionary containing the hydrofoil data of every station.
+        """
+        stations = {}
+        for name, hydrofoil in reversed(list(zip(self.station_names(positions), self.station_hydrofoils(positions)))):
+            polar = hydrofoil.polars[0]
+            stations[name] = {'alpha': polar.alpha, 'cl': polar.cl, 'cd': polar.cd, 'cm': polar.cm, 'reynolds': polar.Re}
+        return stations
+
+    def station_reynolds_hydrofoils(self, positions):
+        """
+        Function to get the blended hydrofoils of the evaluation stations keyed as station_data, e.g. for the
+        Reynolds-aware evaluation of the StandardRotor (reynolds_hydrofoils).
+        :param positions: list or ndarray, radial positions of the stations as fractions of the blade radius.
+        :return: hydrofoils: dict, Hydrofoil objects of every station.
+        """
+        return dict(reversed(list(zip(self.station_names(positions), self.station_hydrofoils(positions)))))
@@ -0,0 +1,235 @@
+import numpy as np
+import pandas as pd
+
+# Available accelerations of the fixed-point iteration of the induction factors.
+# none:     plain (optionally under-relaxed) fixed-point update x = x + w * (G(x) - x) (legacy behaviour with w = 1).
+# aitken:   Aitken's dynamic relaxation, the relaxation factor of every station is updated from its last two residuals.
+# anderson: Anderson mixing of the last iterates of every station (depth anderson_depth).
+ACCELERATIONS = ('none', 'aitken', 'anderson')
+
+# Available warm starts of the induction factors.
+# none:      every station starts at a = b = 0 (legacy behaviour).
+# neighbour: every station starts at the solution of the previous station (station-by-station solvers).
+# previous:  every station starts at the last solution stored in the rotor (e.g. previous operating point).
+WARM_STARTS = ('none', 'neighbour', 'previous')
+
+
+class ConvergenceController:
+    """
+    Class for controlling the fixed-point iteration of the axial and tangential induction factors.
+    The controller holds the settings (tolerance, maximum number of iterations, relaxation, acceleration
+    and warm start) shared by the rotor classes, and creates a ConvergenceState for every solve. The
+    default settings reproduce the plain fixed-point update of the original solver.
+    """
+
+    def __init__(self, tolerance: float = 0.001, max_iterations: int = 500, relaxation: float = 1.0,
+                 acceleration: str = 'none', adaptive: bool = False, min_relaxation: float = 0.1,
+                 anderson_depth: int = 2, warm_start: str = 'none'):
+        """
+        Constructor of the ConvergenceController class.
+        :param tolerance: float, convergence tolerance of the axial and tangential induction factors.
+        :param max_iterations: int, maximum number of iterations of every station.
+        :param relaxation: float, (initial) relaxation factor of the fixed-point update, 0 < relaxation <= 1.
+        :param acceleration: str, acceleration of the fixed-point iteration ('none', 'aitken' or 'anderson').
+        :param adaptive: bool, if True the relaxation factor of a station is halved whenever its residual grows
+        and recovered while it decreases (only with acceleration 'none').
+        :param min_relaxation: float, lower bound of the adaptive and Aitken relaxation factors.
+        :param anderson_depth: int, number of previous iterates used by the Anderson mixing.
+        :param warm_start: str, initial induction factors of the stations ('none', 'neighbour' or 'previous').
+        """
+        if acceleration not in ACCELERATIONS:
+            raise ValueError(f"Acceleration {acceleration} is not available. Please select one of {ACCELERATIONS}.")
+        if warm_start not in WARM_STARTS:
+            raise ValueError(f"Warm start {warm_start} is not available. Please select one of {WARM_STARTS}.")
+        if not 0 < relaxation <= 1:
+            raise ValueError(f"Relaxation factor {relaxation} must be in (0, 1].")
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+        self.relaxation = relaxation
+        self.acceleration = acceleration
+        self.adaptive = adaptive
+        self.min_relaxation = min(min_relaxation, relaxation)
+        self.anderson_depth = anderson_depth
+        self.warm_start = warm_start
+
+    def start(self, a, b, tolerance: float = None, active=True):
+        """
+        Function to start the iteration of several radial stations.
+        :param a: ndarray, initial axial induction factors of the stations.
+        :param b: ndarray, initial tangential induction factors of the stations.
+        :param tolerance: float, convergence tolerance (the one of the controller if None).
+        :param active: bool or ndarray, stations to be iterated (e.g. False if they are solved otherwise).
+        :return: state: ConvergenceState.
+        """
+        return ConvergenceState(self, a, b, self.tolerance if tolerance is None else tolerance, active)
+
+
+class ConvergenceState:
+    """
+    Class for the iteration state of several radial stations, i.e. the current induction factors, the
+    relaxation factors, the history of the accelerations and the per-station diagnostics (iterations,
+    residuals and status). Stations are updated by index, so the batched solver can mask off the
+    converged ones.
+    """
+
+    def __init__(self, controller: ConvergenceController, a, b, tolerance: float, active=True):
+        """
+        Constructor of the ConvergenceState class.
+        :param controller: ConvergenceController, settings of the iteration.
+        :param a: ndarray, initial axial induction factors of the stations.
+        :param b: ndarray, initial tangential induction factors of the stations.
+        :param tolerance: float, convergence tolerance of the axial and tangential induction factors.
+        :param active: bool or ndarray, stations to be iterated.
+        """
+        self.controller = controller
+        self.tolerance = tolerance
+        self.a = np.array(a, dtype=float, ndmin=1)
+        self.b = np.array(b, dtype=float, ndmin=1)
+        no_stations = len(self.a)
+        self.active = np.broadcast_to(np.asarray(active, dtype=bool), (no_stations,)).copy()
+        self.iterations = np.zeros(no_stations, dtype=int)
+        self.residual_axial = np.zeros(no_stations)
+        self.residual_tangential = np.zeros(no_stations)
+        self.relaxation = np.full(no_stations, controller.relaxation)
+        self.status = np.where(self.active, 'iterating', 'solved').astype(object)
+        # Previous residuals (Aitken and adaptive relaxation) and history of the Anderson mixing.
+        self.previous_residual = np.full((no_stations, 2), np.nan)
+        depth = controller.anderson_depth
+        self.history_residual = np.zeros((no_stations, depth + 1, 2))
+        self.history_image = np.zeros((no_stations, depth + 1, 2))
+        self.history_length = np.zeros(no_stations, dtype=int)
+
+    def update(self, index, a_image, b_image):
+        """
+        Function to update the induction factors of the given stations from their fixed-point images.
+        Stations whose change is below the tolerance take the image and are masked off, as the plain
+        fixed-point iteration does. Stations reaching the maximum number of iterations or a non-finite
+        residual are masked off as well, and their status records why.
+        :param index: list or ndarray, indices of the updated stations.
+        :param a_image: ndarray, updated axial induction factors G(a, b) of the stations.
+        :param b_image: ndarray, updated tangential induction factors G(a, b) of the stations.
+        :return: a, b: ndarray, new induction factors of the stations.
+        """
+        index = np.atleast_1d(index)
+        image = np.column_stack((np.ravel(a_image), np.ravel(b_image)))
+        x = np.column_stack((self.a[index], self.b[index]))
+        residual = image - x
+        self.iterations[index] += 1
+        self.residual_axial[index] = np.abs(residual[:, 0])
+        self.residual_tangential[index] = np.abs(residual[:, 1])
+
+        x_new = self.accelerate(index, x, image, residual)
+
+        # Stations whose change is below the tolerance (or not finite) keep the image and stop.
+        finite = np.all(np.isfinite(residual), axis=1)
+        converged = finite & np.all(np.abs(residual) <= self.tolerance, axis=1)
+        stopped = converged | ~finite
+        x_new[stopped] = image[stopped]
+        exhausted = ~stopped & (self.iterations[index] >= self.controller.max_iterations)
+        self.status[index[converged]] = 'converged'
+        self.status[index[~finite]] = 'non_finite'
+        self.status[index[exhausted]] = 'max_iterations'
+        self.active[index] = ~(stopped | exhausted)
+        self.a[index] = x_new[:, 0]
+        self.b[index] = x_new[:, 1]
+        return self.a[index], self.b[index]
+
+    def accelerate(self, index, x, image, residual):
+        """
+        Function to compute the next iterate of the given stations with the relaxation and acceleration of the controller.
+        :param index: ndarray, indices of the updated stations.
+        :param x: ndarray, current induction factors (stations, 2).
+        :param image: ndarray, fixed-point images of the induction factors (stations, 2).
+        :param residual: ndarray, image - x (stations, 2).
+        :return: x_new: ndarray, next induction factors (stations, 2).
+        """
+        controller = self.controller
+        previous = self.previous_residual[index]
+        has_previous = np.all(np.isfinite(previous), axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            if controller.acceleration == 'aitken':
+                # Aitken's dynamic relaxation, w_k = -w_(k-1) * r_(k-1) . (r_k - r_(k-1)) / |r_k - r_(k-1)|^2.
+                difference = residual - previous
+                aitken = -self.relaxation[index] * np.sum(previous * difference, axis=1) / np.sum(difference ** 2, axis=1)
+                aitken = np.clip(np.nan_to_num(aitken, nan=controller.relaxation), controller.min_relaxation, 1.0)
+                self.relaxation[index] = np.where(has_previous, aitken, self.relaxation[index])
+            elif controller.adaptive:
+                # Halve the relaxation factor of the stations whose residual grows, recover it otherwise.
+                growing = has_previous & (np.max(np.abs(residual), axis=1) > np.max(np.abs(previous), axis=1))
+                self.relaxation[index] = np.where(growing, np.maximum(0.5 * self.relaxation[index], controller.min_relaxation),
+                                                  np.minimum(1.5 * self.relaxation[index], controller.relaxation))
+        self.previous_residual[index] = residual
+        relaxation = self.relaxation[index][:, np.newaxis]
+        # A full step takes the image itself, so the default settings match the plain fixed-point update.
+        x_new = np.where(relaxation == 1.0, image, x + relaxation * residual)
+        if controller.acceleration == 'anderson':
+            x_new = self.anderson(index, x, image, residual, relaxation, x_new)
+        return x_new
+
+    def anderson(self, index, x, image, residual, relaxation, x_relaxed):
+        """
+        Function to compute the Anderson mixing of the last iterates of the given stations. The small least-squares
+        problem of every station is solved at once through its (regularized) normal equations, and the relaxed
+        update is kept for the stations whose mixed iterate is not physical.
+        :param index: ndarray, indices of the updated stations.
+        :param x: ndarray, current induction factors (stations, 2).
+        :param image: ndarray, fixed-point images of the induction factors (stations, 2).
+        :param residual: ndarray, image - x (stations, 2).
+        :param relaxation: ndarray, relaxation factors of the stations (stations, 1).
+        :param x_relaxed: ndarray, relaxed fixed-point update (stations, 2).
+        :return: x_new: ndarray, next induction factors (stations, 2).
+        """
+        depth = self.controller.anderson_depth
+        self.history_residual[index, :-1] = self.history_residual[index, 1:]
+        self.history_image[index, :-1] = self.history_image[index, 1:]
+        self.history_residual[index, -1] = residual
+        self.history_image[index, -1] = image
+        self.history_length[index] = np.minimum(self.history_length[index] + 1, depth + 1)
+
+        # Differences of the residuals and images, the columns without history are set to zero.
+        valid = np.arange(depth)[np.newaxis, :] >= (depth + 1 - self.history_length[index])[:, np.newaxis]
+        delta_residual = np.diff(self.history_residual[index], axis=1) * valid[..., np.newaxis]
+        delta_image = np.diff(self.history_image[index], axis=1) * valid[..., np.newaxis]
+        normal = np.einsum('kmi,kni->kmn', delta_residual, delta_residual)
+        scale = np.trace(normal, axis1=1, axis2=2)[:, np.newaxis, np.newaxis]
+        normal = normal + (1e-10 * scale + 1e-300) * np.eye(depth)
+        gamma = np.linalg.solve(normal, np.einsum('kmi,ki->km', delta_residual, residual)[..., np.newaxis])[..., 0]
+        delta_x = delta_image - delta_residual
+        x_new = x + relaxation * residual - np.einsum('kmi,km->ki', delta_x + relaxation[..., np.newaxis] * delta_residual, gamma)
+
+        # Keep the relaxed update (and restart the history) where the mixing is not physical.
+        physical = np.all(np.isfinite(x_new), axis=1) & (x_new[:, 0] < 1.0) & (x_new[:, 0] > -1.0)
+        self.history_length[index[~physical]] = 0
+        return np.where(physical[:, np.newaxis], x_new, x_relaxed)
+
+    def records(self, radius=None):
+        """
+        Function to get the per-station diagnostics of the iteration.
+        :param radius: ndarray, local radius of the stations [m] (optional).
+        :return: records: list, one dict per station (iterations, residuals, relaxation factor and status).
+        """
+        records = []
+        for i in range(len(self.a)):
+            record = {'station': i, 'iterations': int(self.iterations[i]), 'residual_axial': float(self.residual_axial[i]),
+                      'residual_tangential': float(self.residual_tangential[i]), 'relaxation': float(self.relaxation[i]),
+                      'status': self.status[i]}
+            if radius is not None:
+                record['radius'] = float(radius[i])
+            records.append(record)
+        return records
+
+
+def convergence_report(records: list):
+    """
+    Function for creating the convergence report of a rotor from the per-station diagnostics.
+    A message is printed if any station did not converge.
+    :param records: list, per-station diagnostics (see ConvergenceState.records).
+    :return: report: pd.DataFrame, one row per station.
+    """
+    report = pd.DataFrame(records)
+    if len(report) > 0:
+        failed = report[~report['status'].isin(['converged', 'solved'])]
+        for _, row in failed.iterrows():
+            print(f"Station {row['station']} did not converge ({row['status']}) after {row['iterations']} iterations, "
+                  f"residuals {row['residual_axial']:.2e} (axial) and {row['residual_tangential']:.2e} (tangential). (x)")
+    return report
@@ -1,8 +1,25 @@
 import numpy as np
+import pandas as pd
 from tqdm import tqdm
-from scipy.interpolate import make_interp_spline
-from scipy.optimize import fsolve
 import scipy.integrate as integrate
+from utils.induction import check_induction_engine, momentum_coefficients, induction_update
+from utils.induction import axial_induction, tangential_induction, inflow_residual, solve_inflow_angle
+from utils.polar_interpolation import check_interpolation_mode, get_polar_interpolator, StackedPolarInterpolator
+from utils.polar_interpolation import StackedReynoldsInterpolator
+from utils.convergence import ConvergenceController, convergence_report
+from utils.blade_definition import BladeDefinition
+from utils.rotor_geometry import RotorGeometry
+from utils.results_writer import ResultsWriter
+from utils.station_results import StationResults, STANDARD_ROTOR_FIELDS
+
+# Available rules for the integration of the thrust and power along the blade.
+INTEGRATION_RULES = ('analytic', 'trapezoid', 'simpson', 'quad')
+# Lagged update of the local Reynolds numbers of the bracketed engine (maximum passes and relative tolerance).
+REYNOLDS_PASSES = 10
+REYNOLDS_TOLERANCE = 1e-3
+# State of the StandardRotor restored after a sweep (operating point and results of its last evaluation).
+SWEEP_STATE = ('optimal_speed', 'tip_speed_ratio', 'omega', 'pitch', 'results', 'total_thrust', 'total_power',
+               'convergence_report') + STANDARD_ROTOR_FIELDS
 
 
 class StandardRotor:
@@ -13,7 +30,9 @@ class StandardRotor:
     """
 
     def __init__(self, fluid_properties: dict, operative_state: dict, hydrofoils: dict,
-                 blade_chord: list, blade_twist: list, tip_speed_ratio: float):
+                 blade_chord: list, blade_twist: list, tip_speed_ratio: float, induction_engine: str = 'analytic',
+                 polar_interpolation: str = 'linear', convergence: ConvergenceController = None,
+                 reynolds_hydrofoils: dict = None, blade: BladeDefinition = None):
         """
         Constructor of the StandardRotor class.
         :param fluid_properties: dict, dictionary containing the fluid properties.
@@ -21,6 +40,14 @@ class StandardRotor:
         :param hydrofoils: dict, dictionary containing the hydrofoil data.
         :param blade_chord: list, list containing the chord values of the rotor blade.
         :param blade_twist: list, list containing the twist values of the rotor blade.
+        :param induction_engine: str, engine for the induction factors ('fsolve', 'analytic', 'glauert' or 'bracketed').
+        :param polar_interpolation: str, interpolation mode of the polar coefficients ('linear', 'pchip', 'cubic' or 'table').
+        :param convergence: ConvergenceController, settings of the fixed-point iteration (plain iteration if None).
+        :param reynolds_hydrofoils: dict, Hydrofoil objects (airfoilprep) with the polars at several Reynolds numbers,
+        keyed as hydrofoils. If provided, the coefficients are looked up at the local Reynolds number of every station
+        on every iteration (bilinear interpolation of the (alpha, Re) grid), otherwise the polars of hydrofoils are used.
+        :param blade: BladeDefinition, radial layout of the hydrofoils. If provided, the polars of the design points are
+        blended from the sections of the blade (any number of design points), and hydrofoils is not used.
         """
         # Define the fluid properties.
         self.density = fluid_properties['density']
@@ -42,8 +69,18 @@ class StandardRotor:
         self.optimal_speed = operative_state['optimal_speed']
         self.tip_speed_ratio = tip_speed_ratio
         self.omega = self.optimal_speed * self.tip_speed_ratio / self.blade_radius
-        # Define polar data of the hydrofoils.
-        self.hydrofoils = hydrofoils
+        self.pitch = 0.0
+        # Define polar data of the hydrofoils (blended at the evaluated design points if the blade layout is provided).
+        self.blade = blade
+        self.hydrofoils = hydrofoils if blade is None else blade.station_data(self.radial_design_points / self.blade_radius)
+        self.induction_engine = check_induction_engine(induction_engine)
+        self.polar_interpolation = check_interpolation_mode(polar_interpolation)
+        self.reynolds_hydrofoils = reynolds_hydrofoils
+        self.stacked_polars = {}
+        self.geometry = None
+        self.convergence = ConvergenceController() if convergence is None else convergence
+        self.convergence_report = None
+        self.results = None
         self.W_velocities = []
         self.AoA = []
         self.induction_axial = []
@@ -52,154 +89,466 @@ class StandardRotor:
         self.coefficient_x = []
         self.coefficient_y = []
         self.phi_angle = []
+        self.reynolds_numbers = []
         self.total_power = []
         self.total_thrust = []
 
-    def evaluate_bemt(self):
+    def evaluate_bemt(self, batched: bool = False):
         """
         Function to evaluate the StandardRotor object using the Blade Element Momentum Theory (BEMT).
         The iterative process is computed just for one specific Tip Speed Ratio (TSR).
+        :param batched: bool, if True all the radial stations are solved at once as NumPy arrays.
         """
+        if batched:
+            return self.evaluate_bemt_batched()
         name_hydrofoil = list(self.hydrofoils.keys())
         # Invert name_hydrofoil list.
         name_hydrofoil = name_hydrofoil[::-1]
-        AoA = []
-        W_velocity = []
-        induction_axial = []
-        induction_tangential = []
-        total_losses = []
-        cx_coefficient = []
-        cy_coefficient = []
-        phi_angle = []
+        # Preallocate the results of the stations, they are stored in place as every station converges.
+        results = StationResults(len(name_hydrofoil), STANDARD_ROTOR_FIELDS)
+        records = []
+        # Warm start from the last solution of the rotor (if available).
+        previous = self.previous_induction(len(name_hydrofoil)) if self.convergence.warm_start == 'previous' else None
+        # Get the (cached) interpolators of the polars, they are only evaluated inside the BEMT loop.
+        if self.blade is None:
+            interpolators = [get_polar_interpolator(name, self.hydrofoils[name], self.polar_interpolation) for name in name_hydrofoil]
+        else:
+            interpolators = self.blade.station_interpolators(self.radial_design_points / self.blade_radius, self.polar_interpolation)
+        stacked_polars = self.get_stacked_polars()
+        reynolds_polars = self.get_reynolds_polars()
+        reynolds = None
+        # Get the (cached) geometry of the stations, only the terms depending on the inductions are computed in the loop.
+        geometry = self.get_geometry()
+        U_inf = self.optimal_speed
+        blade_speed = geometry.tangential_speed(self.omega)
+        beta = geometry.twist + self.pitch
         for i in tqdm(range(len(name_hydrofoil))):
-            # Basic Hydrofoil Data Information (local radius, alpha, cl, cd).
-            hydrofoil_data = self.hydrofoils[name_hydrofoil[i]]
+            # Basic Hydrofoil Data Information (local radius, polar interpolator).
             local_radius = self.radial_design_points[i]
-            alphas = hydrofoil_data['alpha']
-            cl = hydrofoil_data['cl']
-            cd = hydrofoil_data['cd']
-            # Initialize the variables for the BEMT analysis.
+            interpolator = interpolators[i]
+            # Initialize the variables for the BEMT analysis (warm started from the previous station or solution).
             a = 0.0
             b = 0.0
+            if self.convergence.warm_start == 'neighbour' and i > 0:
+                a = results['induction_axial'][i - 1:i].copy()
+                b = results['induction_tangential'][i - 1:i].copy()
+            elif previous is not None:
+                a = previous[0][i:i + 1]
+                b = previous[1][i:i + 1]
             # Initialize the iterative process for the convergence of the BEMT analysis.
-            error_ind_axial = 0.10
-            error_ind_tangential = 0.10
-            while error_ind_axial > 0.001 or error_ind_tangential > 0.001:
-                # Reallocate the geometrical and hydrodynamic properties.
-                U_inf = self.optimal_speed
-                Radius = self.blade_radius
-                radius_hub = self.radius_hub_pctg * Radius
-                radius = local_radius
-                Nb = self.no_blades
-                TipSR = self.tip_speed_ratio
-                Omega = self.omega
-                TipSr = Omega * radius / U_inf
-
+            state = self.convergence.start(a, b, active=self.induction_engine != 'bracketed')
+            if self.induction_engine == 'bracketed':
+                # Solve Ning's residual in phi, so the fixed-point iteration is not required.
+                [phi_radians, reynolds] = self.solve_inflow_angles(stacked_polars, [i])
+                [alpha, C_x, C_y, F_total, k_a, k_b] = self.station_state(stacked_polars, [i], phi_radians, reynolds)
+                a = axial_induction(k_a, F_total)
+                b = tangential_induction(k_b)
+                phi = np.rad2deg(phi_radians)
+                U_disk = U_inf * (1 - a)
+                U_tang = blade_speed[i] * (1 + b)
+                W = np.sqrt((U_disk * (1 - a)) ** 2 + (U_tang * (1 + b)) ** 2)
+            while np.any(state.active):
                 # Compute the relative velocities.
                 U_disk = U_inf * (1 - a)
-                U_tang = Omega * radius * (1 + b)
+                U_tang = blade_speed[i] * (1 + b)
 
                 # Compute the inflow angles.
                 phi = np.rad2deg(np.arctan(U_disk / U_tang))
                 phi_radians = np.deg2rad(phi)
-                beta = self.blade_twist[i]
-                alpha = phi - self.blade_twist[i]
+                alpha = phi - beta[i]
 
-                # Compute the blade solidity at local radius.
-                sigma_r = Nb * self.blade_chord[i] / (2 * np.pi * radius)
-
-                # Calculating the polar coefficient at the i-th radial position.
-                coeff_lift = np.interp(alpha, alphas, cl)
-                coeff_drag = np.interp(alpha, alphas, cd)
+                # Calculating the polar coefficient at the i-th radial position (and at its local Reynolds number).
+                if reynolds_polars is None:
+                    [coeff_lift, coeff_drag] = interpolator(alpha)
+                else:
+                    reynolds = self.local_reynolds([i], a, b)
+                    [coeff_lift, coeff_drag] = reynolds_polars(alpha, [i], reynolds)
                 C_x = coeff_lift * np.cos(phi_radians) + coeff_drag * np.sin(phi_radians)
                 C_y = coeff_lift * np.sin(phi_radians) - coeff_drag * np.cos(phi_radians)
 
-                cl_i2 = make_interp_spline(alphas, cl)(alpha)
-                cd_i2 = make_interp_spline(alphas, cd)(alpha)
-                hydro_eff2 = cl_i2 / cd_i2
-
                 # Compute tip and root losses.
-                F_tip = (2 / np.pi) * np.arccos(np.exp(-(((Nb / 2) * (1 - (radius / Radius))) / ((radius / Radius) * (np.sin(phi_radians))))))
-                F_root = (2 / np.pi) * np.arccos(np.exp(-((Nb / 2) * ((radius - radius_hub) / (radius * np.sin(phi_radians))))))
-                F_total = F_tip * F_root
+                F_total = geometry.losses(phi_radians, i)
 
-                # Compute axial and tangential induction factors.
-                def fa(variable_a: float):
-                    return variable_a / (1 - variable_a) - (sigma_r * C_x) / (4 * F_total * (np.sin(phi_radians)) ** 2)
+                # Compute the new axial and tangential induction factors.
+                [k_a, k_b] = momentum_coefficients(geometry.solidity[i], C_x, C_y, F_total, phi_radians)
+                a_new, b_new = induction_update(self.induction_engine, a, b, k_a, k_b, F_total)
 
-                def fb(variable_b: float):
-                    return variable_b / (1 + variable_b) - (sigma_r * C_y) / (4 * F_total * np.sin(phi_radians) * np.cos(phi_radians))
+                # Update the induction factors with the relaxation and acceleration of the controller.
+                [a, b] = state.update([0], a_new, b_new)
 
-                # Compute the new axial and tangential induction factors.
-                a_new = fsolve(fa, a)
-                b_new = fsolve(fb, b)
+                W = np.sqrt((U_disk * (1 - a)) ** 2 + (U_tang * (1 + b)) ** 2)
+            results.store(i, W_velocities=W, AoA=alpha, induction_axial=a, induction_tangential=b, total_losses=F_total,
+                          coefficient_x=C_x, coefficient_y=C_y, phi_angle=phi)
+            if reynolds is not None:
+                results.store(i, reynolds_numbers=reynolds)
+            records.extend({**record, 'station': i, 'radius': float(local_radius)} for record in state.records())
+        self.store_results(results)
+        self.convergence_report = convergence_report(records)
+        return
 
-                error_ind_axial = abs(a_new - a)
-                error_ind_tangential = abs(b_new - b)
+    def store_results(self, results: StationResults):
+        """
+        Function to store the results of the stations of an evaluation, both as the structured results of the
+        rotor and as its lists of results (W_velocities, AoA, induction_axial, ...).
+        :param results: StationResults, results of the radial stations.
+        """
+        self.results = results
+        for name, values in results.to_lists().items():
+            setattr(self, name, values)
 
-                a = a_new
-                b = b_new
+    def previous_induction(self, no_stations: int):
+        """
+        Function to get the last solution of the rotor as warm start of a new evaluation.
+        :param no_stations: int, number of radial stations.
+        :return: a, b: ndarray, axial and tangential induction factors (None if the rotor was not solved yet).
+        """
+        if len(self.induction_axial) != no_stations or len(self.induction_tangential) != no_stations:
+            return None
+        a = np.array(self.induction_axial, dtype=float)
+        b = np.array(self.induction_tangential, dtype=float)
+        if not (np.all(np.isfinite(a)) and np.all(np.isfinite(b))):
+            return None
+        return a, b
 
-                W = np.sqrt((U_disk * (1 - a)) ** 2 + (U_tang * (1 + b)) ** 2)
-            AoA.append(alpha)
-            W_velocity.append(W)
-            induction_axial.append(a)
-            induction_tangential.append(b)
-            total_losses.append(F_total)
-            cx_coefficient.append(C_x)
-            cy_coefficient.append(C_y)
-            phi_angle.append(phi)
-            self.W_velocities = W_velocity
-            self.W_velocities = [item for sublist in self.W_velocities for item in sublist]
-            self.AoA = AoA
-            self.AoA = [item for sublist in self.AoA for item in sublist]
-            self.induction_axial = induction_axial
-            self.induction_axial = [item for sublist in self.induction_axial for item in sublist]
-            self.induction_tangential = induction_tangential
-            self.induction_tangential = [item for sublist in self.induction_tangential for item in sublist]
-            self.total_losses = total_losses
-            self.total_losses = [item for sublist in self.total_losses for item in sublist]
-            self.coefficient_x = cx_coefficient
-            self.coefficient_x = [item for sublist in self.coefficient_x for item in sublist]
-            self.coefficient_y = cy_coefficient
-            self.coefficient_y = [item for sublist in self.coefficient_y for item in sublist]
-            self.phi_angle = phi_angle
-            self.phi_angle = [item for sublist in self.phi_angle for item in sublist]
+    def station_state(self, stacked_polars: StackedPolarInterpolator, index, phi_radians, reynolds=None):
+        """
+        Function to compute the hydrodynamic state of several radial stations for given inflow angles.
+        Every quantity depends only on the inflow angle, hence the function is shared by the fixed-point
+        engines and by the bracketed engine. The inflow angles can be a 2-D array (points, stations).
+        :param stacked_polars: StackedPolarInterpolator, interpolator of the polars of all the stations.
+        :param index: list or ndarray, indices of the radial stations.
+        :param phi_radians: ndarray, inflow angles of the radial stations [rad].
+        :param reynolds: ndarray, local Reynolds numbers of the radial stations (polars of the stacked interpolator if None).
+        :return: alpha, C_x, C_y, F_total, k_a, k_b.
+        """
+        geometry = self.get_geometry()
+
+        # Compute the angle of attack.
+        alpha = np.rad2deg(phi_radians) - geometry.twist[index] - self.pitch
+
+        # Calculating the polar coefficients at the radial positions (and at their local Reynolds numbers).
+        if reynolds is None:
+            [coeff_lift, coeff_drag] = stacked_polars(alpha, index)
+        else:
+            [coeff_lift, coeff_drag] = self.get_reynolds_polars()(alpha, index, reynolds)
+        C_x = coeff_lift * np.cos(phi_radians) + coeff_drag * np.sin(phi_radians)
+        C_y = coeff_lift * np.sin(phi_radians) - coeff_drag * np.cos(phi_radians)
+
+        # Compute tip and root losses.
+        F_total = geometry.losses(phi_radians, index)
+
+        # Compute the right-hand side of the momentum equations.
+        [k_a, k_b] = momentum_coefficients(geometry.solidity[index], C_x, C_y, F_total, phi_radians)
+        return alpha, C_x, C_y, F_total, k_a, k_b
+
+    def inflow_residual(self, stacked_polars: StackedPolarInterpolator, index, phi_radians, reynolds=None):
+        """
+        Function to compute Ning's residual in the inflow angle for several radial stations.
+        :param stacked_polars: StackedPolarInterpolator, interpolator of the polars of all the stations.
+        :param index: list or ndarray, indices of the radial stations.
+        :param phi_radians: ndarray, inflow angles of the radial stations [rad].
+        :param reynolds: ndarray, local Reynolds numbers of the radial stations (polars of the stacked interpolator if None).
+        :return: residual: ndarray.
+        """
+        [_, _, _, F_total, k_a, k_b] = self.station_state(stacked_polars, index, phi_radians, reynolds)
+        lambda_r = self.get_geometry().tangential_speed(self.omega, index) / self.optimal_speed
+        return inflow_residual(phi_radians, lambda_r, k_a, k_b, F_total, high_load=False)
+
+    def get_geometry(self):
+        """
+        Function to get the geometry of the radial stations (see RotorGeometry). The geometry is built once per
+        blade and reused by every evaluation of the rotor (e.g. sweeps), it is only rebuilt if the design points,
+        the chord or the twist of the blade changed.
+        :return: geometry: RotorGeometry.
+        """
+        if self.geometry is None or not self.geometry.matches(self.radial_design_points, self.blade_chord, self.blade_twist):
+            self.geometry = RotorGeometry(self.blade_radius, self.no_blades, self.radius_hub_pctg, self.radial_design_points,
+                                          self.blade_chord, self.blade_twist, self.initial_point_pctg)
+        return self.geometry
+
+    def get_stacked_polars(self):
+        """
+        Function to get the interpolator of the polars of all the radial stations. The interpolator is
+        built once per interpolation mode and reused by every evaluation of the rotor (e.g. sweeps), and
+        with a blade definition it is shared by every rotor of the same design points.
+        :return: stacked_polars: StackedPolarInterpolator.
+        """
+        if self.polar_interpolation not in self.stacked_polars and self.blade is not None:
+            self.stacked_polars[self.polar_interpolation] = self.blade.station_polars(self.radial_design_points / self.blade_radius,
+                                                                                      self.polar_interpolation)
+        if self.polar_interpolation not in self.stacked_polars:
+            name_hydrofoil = list(self.hydrofoils.keys())
+            # Invert name_hydrofoil list.
+            name_hydrofoil = name_hydrofoil[::-1]
+            self.stacked_polars[self.polar_interpolation] = StackedPolarInterpolator(
+                [get_polar_interpolator(name, self.hydrofoils[name], self.polar_interpolation) for name in name_hydrofoil])
+        return self.stacked_polars[self.polar_interpolation]
+
+    def get_reynolds_polars(self):
+        """
+        Function to get the interpolator of the (alpha, Re) grids of all the radial stations. The grids are
+        built once with Hydrofoil.createDataGrid and reused by every evaluation of the rotor.
+        :return: reynolds_polars: StackedReynoldsInterpolator (None if the rotor is evaluated at fixed Reynolds numbers).
+        """
+        if self.reynolds_hydrofoils is None:
+            return None
+        if 'reynolds' not in self.stacked_polars:
+            name_hydrofoil = list(self.hydrofoils.keys())
+            # Invert name_hydrofoil list.
+            name_hydrofoil = name_hydrofoil[::-1]
+            self.stacked_polars['reynolds'] = StackedReynoldsInterpolator([self.reynolds_hydrofoils[name] for name in name_hydrofoil])
+        return self.stacked_polars['reynolds']
+
+    def local_reynolds(self, index, a, b):
+        """
+        Function to compute the local Reynolds number of several radial stations, Re = W c / nu, with the
+        relative velocity W of the current induction factors.
+        :param index: list or ndarray, indices of the radial stations.
+        :param a: float or ndarray, axial induction factors of the radial stations.
+        :param b: float or ndarray, tangential induction factors of the radial stations.
+        :return: reynolds: ndarray.
+        """
+        geometry = self.get_geometry()
+        W = np.sqrt((self.optimal_speed * (1 - a)) ** 2 + (geometry.tangential_speed(self.omega, index) * (1 + b)) ** 2)
+        return W * geometry.chord[index] / self.kinematic_viscosity
+
+    def solve_inflow_angles(self, stacked_polars: StackedPolarInterpolator, index):
+        """
+        Function to solve Ning's residual in the inflow angle for several radial stations (bracketed engine).
+        At local Reynolds numbers the residual is solved again with the Reynolds numbers of the last solution
+        (lagged update) until they change less than REYNOLDS_TOLERANCE, at most REYNOLDS_PASSES times.
+        :param stacked_polars: StackedPolarInterpolator, interpolator of the polars of all the stations.
+        :param index: list or ndarray, indices of the radial stations.
+        :return: phi_radians, reynolds: ndarray, inflow angles [rad] and local Reynolds numbers (None at fixed Reynolds numbers).
+        """
+        if self.reynolds_hydrofoils is None:
+            return solve_inflow_angle(lambda phi_grid: self.inflow_residual(stacked_polars, index, phi_grid), len(index)), None
+        reynolds = self.local_reynolds(index, 0.0, 0.0)
+        for _ in range(REYNOLDS_PASSES):
+            phi_radians = solve_inflow_angle(lambda phi_grid: self.inflow_residual(stacked_polars, index, phi_grid, reynolds), len(index))
+            [_, _, _, F_total, k_a, k_b] = self.station_state(stacked_polars, index, phi_radians, reynolds)
+            reynolds_new = self.local_reynolds(index, axial_induction(k_a, F_total), tangential_induction(k_b))
+            if np.all(np.abs(reynolds_new - reynolds) <= REYNOLDS_TOLERANCE * reynolds):
+                break
+            reynolds = reynolds_new
+        return phi_radians, reynolds
+
+    def evaluate_bemt_batched(self, tolerance: float = None, initial_axial=None, initial_tangential=None):
+        """
+        Function to evaluate the StandardRotor object using the Blade Element Momentum Theory (BEMT).
+        All the radial stations are updated at once as NumPy arrays, and every station is masked off
+        as soon as its axial and tangential induction factors converge. The results match the ones
+        obtained station by station with evaluate_bemt. The stations are solved together, hence the
+        'neighbour' warm start of the convergence controller does not apply.
+        :param tolerance: float, convergence tolerance of the induction factors (the one of the controller if None).
+        :param initial_axial: ndarray, initial axial induction factors of the stations (zeros by default).
+        :param initial_tangential: ndarray, initial tangential induction factors of the stations (zeros by default).
+        """
+        no_stations = len(self.hydrofoils)
+        U_inf = self.optimal_speed
+        geometry = self.get_geometry()
+        radius = geometry.radius[:no_stations]
+        blade_speed = geometry.tangential_speed(self.omega)
+
+        # Get the (cached) interpolator of every station.
+        stacked_polars = self.get_stacked_polars()
+        reynolds_polars = self.get_reynolds_polars()
+
+        # Initialize the variables for the BEMT analysis.
+        a = np.zeros(no_stations) if initial_axial is None else np.array(initial_axial, dtype=float)
+        b = np.zeros(no_stations) if initial_tangential is None else np.array(initial_tangential, dtype=float)
+        previous = self.previous_induction(no_stations) if self.convergence.warm_start == 'previous' else None
+        if previous is not None and initial_axial is None and initial_tangential is None:
+            [a, b] = previous
+        # Preallocate the results of the stations, they are stored in place by index.
+        results = StationResults(no_stations, STANDARD_ROTOR_FIELDS)
+        if self.induction_engine == 'bracketed':
+            # Solve Ning's residual in phi for every station, so the fixed-point iteration is not required.
+            index = np.arange(no_stations)
+            [phi_radians, reynolds] = self.solve_inflow_angles(stacked_polars, index)
+            [alpha, C_x, C_y, F_total, k_a, k_b] = self.station_state(stacked_polars, index, phi_radians, reynolds)
+            if reynolds is not None:
+                results.store(index, reynolds_numbers=reynolds)
+            a = axial_induction(k_a, F_total)
+            b = tangential_induction(k_b)
+            U_disk = U_inf * (1 - a)
+            U_tang = blade_speed[:no_stations] * (1 + b)
+            results.store(index, W_velocities=np.sqrt((U_disk * (1 - a)) ** 2 + (U_tang * (1 + b)) ** 2), AoA=alpha,
+                          total_losses=F_total, coefficient_x=C_x, coefficient_y=C_y, phi_angle=np.rad2deg(phi_radians))
+        state = self.convergence.start(a, b, tolerance, active=self.induction_engine != 'bracketed')
+        while np.any(state.active):
+            index = np.flatnonzero(state.active)
+            a_i = a[index]
+            b_i = b[index]
+
+            # Compute the relative velocities.
+            U_disk = U_inf * (1 - a_i)
+            U_tang = blade_speed[index] * (1 + b_i)
+
+            # Compute the inflow angles and the hydrodynamic state of the active stations.
+            phi = np.rad2deg(np.arctan(U_disk / U_tang))
+            phi_radians = np.deg2rad(phi)
+            reynolds = None if reynolds_polars is None else self.local_reynolds(index, a_i, b_i)
+            [alpha, C_x, C_y, F_total, k_a, k_b] = self.station_state(stacked_polars, index, phi_radians, reynolds)
+
+            # Compute the new axial and tangential induction factors.
+            a_new, b_new = induction_update(self.induction_engine, a_i, b_i, k_a, k_b, F_total)
+
+            # Update the induction factors with the controller, which masks off the converged stations.
+            [a_new, b_new] = state.update(index, a_new, b_new)
+
+            # Store the state of the active stations.
+            a[index] = a_new
+            b[index] = b_new
+            results.store(index, W_velocities=np.sqrt((U_disk * (1 - a_new)) ** 2 + (U_tang * (1 + b_new)) ** 2), AoA=alpha,
+                          total_losses=F_total, coefficient_x=C_x, coefficient_y=C_y, phi_angle=phi)
+            if reynolds is not None:
+                results.store(index, reynolds_numbers=reynolds)
+        results.store(slice(None), induction_axial=a, induction_tangential=b)
+        self.store_results(results)
+        self.convergence_report = convergence_report(state.records(radius))
         return
 
-    def evaluate_performance(self, interpolation_range: int = 70):
+    def evaluate_performance(self, interpolation_range: int = 70, integration: str = 'analytic'):
         """
         Function to evaluate the performance of the StandardRotor object.
+        The thrust and power are integrated over the segments of the blade with one of the following rules:
+        analytic:  exact integral of every segment with the loads frozen at its lower bound (default).
+        trapezoid: trapezoidal rule of the loads interpolated at the segment grid.
+        simpson:   Simpson's rule of the loads interpolated at the segment grid (high accuracy).
+        quad:      adaptive quadrature of every segment, as the analytic rule (reference).
         :param interpolation_range: int, number of points to interpolate the performance data.
+        :param integration: str, integration rule ('analytic', 'trapezoid', 'simpson' or 'quad').
         """
-        # Compute interpolated variables.
-        segmented_radius = np.linspace(self.initial_point_pctg * self.blade_radius, self.blade_radius, interpolation_range + 1)
-        blades_loads_a = np.interp(segmented_radius, self.radial_design_points, self.induction_axial)
-        blades_loads_b = np.interp(segmented_radius, self.radial_design_points, self.induction_tangential)
-        blades_loads_f_total = np.interp(segmented_radius, self.radial_design_points, self.total_losses)
-        blades_loads_w = np.interp(segmented_radius, self.radial_design_points, self.W_velocities)
-        blades_loads_cx = np.interp(segmented_radius, self.radial_design_points, self.coefficient_x)
-        blades_loads_cy = np.interp(segmented_radius, self.radial_design_points, self.coefficient_y)
-        blades_loads_chord = np.interp(segmented_radius, self.radial_design_points, self.blade_chord)
-        blades_loads_phi = np.interp(segmented_radius, self.radial_design_points, self.phi_angle)
-        blade_loads_thrust = []
-        blade_loads_power = []
-        for i in range(len(segmented_radius) - 1):
-            lower_bound = segmented_radius[i]
-            upper_bound = segmented_radius[i + 1]
-            thrust = integrate.quad(
-                lambda r: 4 * np.pi * r * self.density * self.optimal_speed ** 2 * blades_loads_a[i] * (1 - blades_loads_a[i]) * blades_loads_f_total[
-                    i],
-                lower_bound.astype(float), upper_bound.astype(float))
-            blade_loads_thrust.append(thrust[0])
-            power = integrate.quad(
-                lambda r: 4 * np.pi * r ** 3 * self.density * self.optimal_speed * self.omega * blades_loads_b[i] * (1 - blades_loads_a[i]) *
-                          blades_loads_f_total[i],
-                lower_bound.astype(float), upper_bound.astype(float))
-            blade_loads_power.append(power[0])
-        # Sum all elements of the list in blade_loads_thrust.
-        total_thrust = sum(blade_loads_thrust)
-        total_power = sum(blade_loads_power)
+        if integration not in INTEGRATION_RULES:
+            raise ValueError(f"Integration rule {integration} is not available. Please select one of {INTEGRATION_RULES}.")
+        # Compute interpolated variables (the segmented blade and its weights are cached in the geometry).
+        geometry = self.get_geometry()
+        [segmented_radius, thrust_weights, power_weights] = geometry.segment_weights(interpolation_range)
+        blades_loads_a = np.interp(segmented_radius, geometry.radius, self.induction_axial)
+        blades_loads_b = np.interp(segmented_radius, geometry.radius, self.induction_tangential)
+        blades_loads_f_total = np.interp(segmented_radius, geometry.radius, self.total_losses)
+
+        # Thrust and power per unit length are 4 pi rho U^2 a (1-a) F r and 4 pi rho U Omega b (1-a) F r^3.
+        thrust_factor = 4 * np.pi * self.density * self.optimal_speed ** 2 * blades_loads_a * (1 - blades_loads_a) * blades_loads_f_total
+        power_factor = 4 * np.pi * self.density * self.optimal_speed * self.omega * blades_loads_b * (1 - blades_loads_a) * blades_loads_f_total
+        lower_bound = segmented_radius[:-1]
+        upper_bound = segmented_radius[1:]
+        if integration == 'analytic':
+            total_thrust = np.sum(thrust_factor[:-1] * thrust_weights)
+            total_power = np.sum(power_factor[:-1] * power_weights)
+        elif integration == 'trapezoid':
+            total_thrust = integrate.trapezoid(thrust_factor * segmented_radius, segmented_radius)
+            total_power = integrate.trapezoid(power_factor * segmented_radius ** 3, segmented_radius)
+        elif integration == 'simpson':
+            total_thrust = integrate.simpson(thrust_factor * segmented_radius, x=segmented_radius)
+            total_power = integrate.simpson(power_factor * segmented_radius ** 3, x=segmented_radius)
+        else:
+            total_thrust = sum(integrate.quad(lambda r, factor=factor: factor * r, lower, upper)[0]
+                               for factor, lower, upper in zip(thrust_factor[:-1], lower_bound, upper_bound))
+            total_power = sum(integrate.quad(lambda r, factor=factor: factor * r ** 3, lower, upper)[0]
+                              for factor, lower, upper in zip(power_factor[:-1], lower_bound, upper_bound))
+        total_thrust = float(total_thrust)
+        total_power = float(total_power)
         self.total_thrust = total_thrust
         self.total_power = total_power
         return total_thrust, total_power
+
+    def evaluate_operating_point(self, tip_speed_ratio: float, inflow_speed: float, pitch: float = 0.0,
+                                 initial_axial=None, initial_tangential=None, interpolation_range: int = 70):
+        """
+        Function to move the StandardRotor object to an operating point and evaluate its performance.
+        :param tip_speed_ratio: float, tip speed ratio of the operating point.
+        :param inflow_speed: float, inflow speed of the operating point [m/s].
+        :param pitch: float, blade pitch angle added to the twist [deg].
+        :param initial_axial: ndarray, initial axial induction factors of the stations (zeros by default).
+        :param initial_tangential: ndarray, initial tangential induction factors of the stations (zeros by default).
+        :param interpolation_range: int, number of points to interpolate the performance data.
+        :return: performance: dict, thrust, power, torque, Cp, Ct and Cq of the operating point.
+        """
+        self.optimal_speed = inflow_speed
+        self.tip_speed_ratio = tip_speed_ratio
+        self.omega = inflow_speed * tip_speed_ratio / self.blade_radius
+        self.pitch = pitch
+        self.evaluate_bemt_batched(initial_axial=initial_axial, initial_tangential=initial_tangential)
+        [thrust, power] = self.evaluate_performance(interpolation_range=interpolation_range)
+        rotor_area = np.pi * self.blade_radius ** 2
+        dynamic_pressure = 0.5 * self.density * inflow_speed ** 2
+        power_coefficient = power / (dynamic_pressure * rotor_area * inflow_speed)
+        return {'tip_speed_ratio': tip_speed_ratio,
+                'inflow_speed': inflow_speed,
+                'pitch': pitch,
+                'omega': self.omega,
+                'thrust': thrust,
+                'power': power,
+                'torque': power / self.omega,
+                'Cp': power_coefficient,
+                'Ct': thrust / (dynamic_pressure * rotor_area),
+                'Cq': power_coefficient / tip_speed_ratio}
+
+    def station_results(self):
+        """
+        Function to get the results of the radial stations of the last evaluation of the rotor.
+        :return: results: dict, radial design points and hydrodynamic state of every station.
+        """
+        return {'radial_design_points': self.radial_design_points,
+                'induction_axial': self.induction_axial,
+                'induction_tangential': self.induction_tangential,
+                'total_losses': self.total_losses,
+                'AoA': self.AoA,
+                'phi_angle': self.phi_angle,
+                'W_velocities': self.W_velocities,
+                'coefficient_x': self.coefficient_x,
+                'coefficient_y': self.coefficient_y,
+                'reynolds_numbers': self.reynolds_numbers}
+
+    def evaluate_sweep(self, tip_speed_ratios, inflow_speeds=None, warm_start: bool = True, interpolation_range: int = 70,
+                       writer: ResultsWriter = None, station_writer: ResultsWriter = None):
+        """
+        Function to evaluate the StandardRotor object over several operating points (Tip Speed Ratios and
+        inflow speeds) in one call. The polar interpolators and the geometry are reused by every operating
+        point, and the tip speed ratios are solved in ascending order, so each one is warm-started from the
+        converged induction factors of its neighbour. The operating point of the rotor and the results of its
+        last evaluation are restored afterwards, even if the sweep fails. With a writer the performance of every
+        operating point is streamed to the file as soon as it is solved (i.e. in ascending tip speed ratio for
+        every inflow speed) instead of being collected in memory.
+        :param tip_speed_ratios: list or ndarray, tip speed ratios to be evaluated.
+        :param inflow_speeds: list or ndarray, inflow speeds to be evaluated [m/s] (by default the optimal speed).
+        :param warm_start: bool, if True each tip speed ratio starts from the inductions of the previous one.
+        :param interpolation_range: int, number of points to interpolate the performance data.
+        :param writer: ResultsWriter, sink of the performance of the operating points (returned as a pd.DataFrame if None).
+        :param station_writer: ResultsWriter, sink of the results of the radial stations of every operating point (not kept if None).
+        :return: performance: pd.DataFrame, thrust, power, torque, Cp, Ct and Cq of every operating point, in the order
+        of the inflow speeds and of the given tip speed ratios (None with a writer).
+        """
+        tip_speed_ratios = np.atleast_1d(np.asarray(tip_speed_ratios, dtype=float))
+        inflow_speeds = np.atleast_1d(self.optimal_speed if inflow_speeds is None else np.asarray(inflow_speeds, dtype=float))
+        # Solve in ascending order for the warm start, the rows are returned in the given order.
+        order = np.argsort(tip_speed_ratios, kind='stable')
+        state = {name: getattr(self, name) for name in SWEEP_STATE}
+        records = []
+        try:
+            for inflow_speed in inflow_speeds:
+                a = None
+                b = None
+                for tsr in tip_speed_ratios[order]:
+                    record = self.evaluate_operating_point(tsr, inflow_speed, self.pitch, initial_axial=a, initial_tangential=b,
+                                                           interpolation_range=interpolation_range)
+                    if writer is None:
+                        records.append(record)
+                    else:
+                        writer.write(record)
+                    if station_writer is not None:
+                        station_writer.write_frame({'tip_speed_ratio': tsr, 'inflow_speed': inflow_speed, 'pitch': self.pitch,
+                                                    **self.station_results()})
+                    if warm_start:
+                        a = self.induction_axial
+                        b = self.induction_tangential
+        finally:
+            for name, value in state.items():
+                setattr(self, name, value)
+        if writer is not None:
+            return None
+        # Position of every solved operating point in the given order of the tip speed ratios.
+        rows = (np.arange(len(inflow_speeds))[:, np.newaxis] * len(order) + np.argsort(order)).ravel()
+        return pd.DataFrame(records).iloc[rows].reset_index(drop=True)
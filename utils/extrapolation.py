@@ -1,6 +1,8 @@
 import numpy as np
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 from airfoilprep import Polar
 from airfoilprep import Hydrofoil
+from utils.extrapolation_cache import ExtrapolationCache
 
 
 def create_objects(hydrofoils: dict):
@@ -21,29 +23,153 @@ def create_objects(hydrofoils: dict):
     return polars_obj, hydrofoils_obj
 
 
-def extrapolate_hydrofoil_data(hydrofoils: dict):
+def extrapolate_hydrofoil(hydrofoil: Hydrofoil, cache: ExtrapolationCache = None):
+    """
+    Function for extrapolating the data of a single hydrofoil to the entire rotor
+    blade configurations alpha angles. By default -180 to 180 degrees.
+    :param hydrofoil: Hydrofoil, hydrofoil to be extrapolated.
+    :param cache: ExtrapolationCache, on-disk cache of the extrapolated polars (optional).
+    :return: hydrofoil_extrapolated: Hydrofoil.
+    """
+    parameters = extrapolation_parameters(hydrofoil)
+    if cache is not None:
+        return cache.extrapolate_hydrofoil(hydrofoil, **parameters)
+    return hydrofoil.extrapolate(**parameters)
+
+
+def extrapolation_parameters(hydrofoil: Hydrofoil):
+    """
+    Function for getting the parameters of the extrapolation of a hydrofoil (see Polar.extrapolate).
+    :param hydrofoil: Hydrofoil, hydrofoil to be extrapolated.
+    :return: parameters: dict, maximum drag coefficient (cdmax), aspect ratio (AR) and minimum drag coefficient (cdmin).
+    """
+    cd_list = hydrofoil.polars[0].cd
+    cd_min = np.min(cd_list)
+    aspect_ratio = 10
+    cd_max = 1.11 + 0.018 * aspect_ratio
+    return {'cdmax': cd_max, 'AR': aspect_ratio, 'cdmin': cd_min}
+
+
+def extrapolate_polar(polar: Polar, parameters: dict):
+    """
+    Function for extrapolating a single polar, i.e. the task of the process pools.
+    :param polar: Polar, polar to be extrapolated.
+    :param parameters: dict, parameters of the extrapolation (see extrapolation_parameters).
+    :return: polar_extrapolated: Polar.
+    """
+    return polar.extrapolate(**parameters)
+
+
+def extrapolation_tasks(hydrofoils: dict, cache: ExtrapolationCache = None):
+    """
+    Function for looking up the polars of the hydrofoils in the cache and listing the ones to be extrapolated.
+    The cache is only read here (and written by the caller), so it stays in the calling process and its
+    counters are kept up to date, whereas a copy sent to the worker processes would be discarded.
+    :param hydrofoils: dict, dictionary containing the hydrofoil data (Hydrofoil objects).
+    :param cache: ExtrapolationCache, on-disk cache of the extrapolated polars (optional).
+    :return: polars, tasks: dict of the extrapolated polars of every hydrofoil (None if not cached), and list of
+    (hydrofoil, polar index, cache key, polar, parameters) of the polars to be extrapolated.
+    """
+    polars = {}
+    tasks = []
+    for hydrofoil, data in hydrofoils.items():
+        parameters = extrapolation_parameters(data)
+        polars[hydrofoil] = []
+        for i, polar in enumerate(data.polars):
+            key = None if cache is None else cache.key(polar, **parameters)
+            polars[hydrofoil].append(None if cache is None else cache.lookup(key, type(polar)))
+            if polars[hydrofoil][i] is None:
+                tasks.append((hydrofoil, i, key, polar, parameters))
+    return polars, tasks
+
+
+def extrapolate_hydrofoil_data(hydrofoils: dict, max_workers: int = 1, chunk_size: int = 8, cache: ExtrapolationCache = None):
     """
     Function for extrapolating the hydrofoil data to the entire rotor
     blade configurations alpha angles. By default -180 to 180 degrees.
+    The hydrofoils can be extrapolated in parallel with a process pool, giving the same results as the
+    serial path (on platforms that spawn processes, the calling script requires a __main__ guard).
     :param hydrofoils: dict, dictionary containing the hydrofoil data.
+    :param max_workers: int, number of worker processes (1 for the serial path, None for the number of processors).
+    :param chunk_size: int, number of hydrofoils sent to a worker per task.
+    :param cache: ExtrapolationCache, on-disk cache of the extrapolated polars, unchanged hydrofoils are not extrapolated again.
+    In the parallel path, the cache is read and written by the calling process and only the polars that are not
+    cached are sent to the workers.
     """
-    hydrofoils_extrapolated = {}
-    for hydrofoil, properties in hydrofoils.items():
-        cd_list = hydrofoils[hydrofoil].polars[0].cd
-        cd_min = np.min(cd_list)
-        aspect_ratio = 10
-        cd_max = 1.11 + 0.018 * aspect_ratio
-        hydrofoil_extrapolated = hydrofoils[hydrofoil].extrapolate(AR=aspect_ratio, cdmax=cd_max, cdmin=cd_min)
-        hydrofoils_extrapolated[hydrofoil] = hydrofoil_extrapolated
-    return hydrofoils_extrapolated
+    names = list(hydrofoils.keys())
+    if max_workers == 1:
+        extrapolated = [extrapolate_hydrofoil(hydrofoils[hydrofoil], cache) for hydrofoil in names]
+        return dict(zip(names, extrapolated))
+    [polars, tasks] = extrapolation_tasks(hydrofoils, cache)
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        results = executor.map(extrapolate_polar, [task[3] for task in tasks], [task[4] for task in tasks], chunksize=chunk_size)
+        for (hydrofoil, i, key, _, _), polar in zip(tasks, results):
+            polars[hydrofoil][i] = polar
+            if cache is not None:
+                cache.put(key, polar)
+    return {hydrofoil: Hydrofoil(polars[hydrofoil]) for hydrofoil in names}
 
 
-def save_aerodyn_files(hydrofoils_extra: dict, path: str):
+def save_aerodyn_files(hydrofoils_extra: dict, path: str, max_workers: int = 1):
     """
     Function for saving the aerodynamic data files of the hydrofoils.
+    The files can be written in parallel with a thread pool, in which case a single summary is printed.
     :param hydrofoils_extra: dict, dictionary containing the extrapolated hydrofoil data.
     :param path: str, path to the folder where the aerodynamic data files will be saved.
+    :param max_workers: int, number of writer threads (1 for the serial path, None for the default of the pool).
+    """
+    if max_workers == 1:
+        for hydrofoil in hydrofoils_extra.keys():
+            hydrofoils_extra[hydrofoil].writeToAerodynFile(f"{path}/{hydrofoil}.dat")
+            print(f"File {hydrofoil}.dat saved successfully. (\u2713)")
+        return None
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(lambda hydrofoil: hydrofoils_extra[hydrofoil].writeToAerodynFile(f"{path}/{hydrofoil}.dat"), hydrofoils_extra))
+    print(f"{len(hydrofoils_extra)} files saved successfully in {path}. (\u2713)")
+    return None
+
+
+def extrapolate_and_save(hydrofoils: dict, path: str, max_workers: int = None, io_workers: int = None,
+                         cache: ExtrapolationCache = None):
+    """
+    Function for extrapolating the hydrofoil data and saving the aerodynamic data files in a single parallel stage.
+    The hydrofoils are extrapolated with a process pool and every file is written by a thread pool as soon as its
+    hydrofoil is extrapolated, so the extrapolation and the file writes overlap. The results are the same as the
+    ones of extrapolate_hydrofoil_data and save_aerodyn_files (on platforms that spawn processes, the calling
+    script requires a __main__ guard).
+    :param hydrofoils: dict, dictionary containing the hydrofoil data (Hydrofoil objects).
+    :param path: str, path to the folder where the aerodynamic data files will be saved.
+    :param max_workers: int, number of worker processes (None for the number of processors).
+    :param io_workers: int, number of writer threads (None for the default of the pool).
+    :param cache: ExtrapolationCache, on-disk cache of the extrapolated polars (optional).
+    :return: hydrofoils_extrapolated: dict, dictionary containing the extrapolated hydrofoil data.
     """
-    for hydrofoil in hydrofoils_extra.keys():
-        hydrofoils_extra[hydrofoil].writeToAerodynFile(f"{path}/{hydrofoil}.dat")
-        print(f"File {hydrofoil}.dat saved successfully. (\u2713)")
\ No newline at end of file
+    names = list(hydrofoils.keys())
+    [polars, tasks] = extrapolation_tasks(hydrofoils, cache)
+    pending = {hydrofoil: sum(polar is None for polar in polars[hydrofoil]) for hydrofoil in names}
+    with ProcessPoolExecutor(max_workers=max_workers) as executor, ThreadPoolExecutor(max_workers=io_workers) as writer:
+        extrapolated = {}
+        writes = []
+
+        def write(hydrofoil):
+            extrapolated[hydrofoil] = Hydrofoil(polars[hydrofoil])
+            writes.append(writer.submit(extrapolated[hydrofoil].writeToAerodynFile, f"{path}/{hydrofoil}.dat"))
+
+        # The cached hydrofoils are written at once, the other ones as soon as their last polar is extrapolated.
+        for hydrofoil in names:
+            if pending[hydrofoil] == 0:
+                write(hydrofoil)
+        futures = {executor.submit(extrapolate_polar, polar, parameters): (hydrofoil, i, key)
+                   for hydrofoil, i, key, polar, parameters in tasks}
+        for future in as_completed(futures):
+            [hydrofoil, i, key] = futures[future]
+            polars[hydrofoil][i] = future.result()
+            if cache is not None:
+                cache.put(key, polars[hydrofoil][i])
+            pending[hydrofoil] -= 1
+            if pending[hydrofoil] == 0:
+                write(hydrofoil)
+        for write_future in writes:
+            write_future.result()
+    print(f"{len(names)} hydrofoils extrapolated and saved successfully in {path}. (\u2713)")
+    return {hydrofoil: extrapolated[hydrofoil] for hydrofoil in names}
@@ -0,0 +1,224 @@
+import os
+import hashlib
+import zipfile
+import numpy as np
+from airfoilprep import Hydrofoil
+
+# Version of the cached extrapolations, the entries of another version are never hit.
+CACHE_VERSION = 1
+# Default bounds of the cache (number of entries and size on disk [bytes]).
+CACHE_MAX_ENTRIES = 4096
+CACHE_MAX_BYTES = 256 * 1024 ** 2
+# Fraction of the bounds kept by an eviction, so a full cache is not scanned again on every new entry.
+CACHE_EVICTION_RATIO = 0.9
+
+
+class ExtrapolationCache:
+    """
+    Class for a persistent on-disk memo cache of Polar.extrapolate. Every extrapolated polar is stored as an
+    .npz file named after the hash of the source polar (Re, alpha, cl, cd and cm) and of the extrapolation
+    parameters (cdmax, AR, cdmin and nalpha), hence a changed polar or parameter is a new entry and repeated
+    runs skip the extrapolation completely. The modification time of an entry records its last use, and the
+    least recently used entries are evicted once the cache exceeds its number of entries or size on disk.
+    The number of entries and the size are tracked in memory (seeded by a scan of the folder), hence the folder
+    is only scanned again when a bound is exceeded. The counters of a copy sent to another process are not merged
+    back, so the parallel paths of utils.extrapolation read and write the cache in the calling process only.
+    On a hit, the Viterna parameters (cdmax, A, B) that Polar.extrapolate sets on the source polar are not set.
+    """
+
+    def __init__(self, path: str, max_entries: int = CACHE_MAX_ENTRIES, max_bytes: int = CACHE_MAX_BYTES):
+        """
+        Constructor of the ExtrapolationCache class.
+        :param path: str, path to the folder of the cache (created if it does not exist).
+        :param max_entries: int, maximum number of cached polars.
+        :param max_bytes: int, maximum size of the cache on disk [bytes].
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(path, exist_ok=True)
+        entries = self.entries()
+        self.no_entries = len(entries)
+        self.total_bytes = sum(entry[1] for entry in entries)
+
+    @staticmethod
+    def key(polar, cdmax, AR=None, cdmin=0.001, nalpha=15):
+        """
+        Function to compute the key of an extrapolation, i.e. the SHA-1 digest of the polar and of the parameters.
+        :param polar: Polar, polar to be extrapolated.
+        :param cdmax: float, maximum drag coefficient.
+        :param AR: float, aspect ratio (optional).
+        :param cdmin: float, minimum drag coefficient.
+        :param nalpha: int, number of points added in each segment of Viterna's method.
+        :return: key: str.
+        """
+        digest = hashlib.sha1()
+        digest.update(repr((CACHE_VERSION, type(polar).__name__, float(polar.Re), float(cdmax),
+                            None if AR is None else float(AR), float(cdmin), int(nalpha))).encode())
+        for values in (polar.alpha, polar.cl, polar.cd, polar.cm):
+            values = np.ascontiguousarray(values, dtype=np.float64)
+            digest.update(str(values.shape).encode())
+            digest.update(values.tobytes())
+        return digest.hexdigest()
+
+    def entry_path(self, key: str):
+        """
+        Function to get the path of the file of an entry.
+        :param key: str, key of the entry.
+        :return: path: str.
+        """
+        return os.path.join(self.path, f"{key}.npz")
+
+    def get(self, key: str, polar_type):
+        """
+        Function to get a cached extrapolation (its last use is updated).
+        :param key: str, key of the entry.
+        :param polar_type: type, class of the returned polar.
+        :return: polar: Polar (None if the entry is not cached).
+        """
+        path = self.entry_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                polar = polar_type(float(data['Re']), data['alpha'], data['cl'], data['cd'], data['cm'])
+            os.utime(path)
+        except (OSError, KeyError, ValueError, zipfile.BadZipFile):
+            # A missing or damaged entry is a miss, it is overwritten by the next put.
+            return None
+        return polar
+
+    def lookup(self, key: str, polar_type):
+        """
+        Function to get a cached extrapolation and count it as a hit or a miss.
+        :param key: str, key of the entry.
+        :param polar_type: type, class of the returned polar.
+        :return: polar: Polar (None if the entry is not cached).
+        """
+        polar = self.get(key, polar_type)
+        if polar is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return polar
+
+    def put(self, key: str, polar):
+        """
+        Function to store an extrapolation. The file is written next to the entry and then renamed, so
+        concurrent processes never read a partial entry. The cache is evicted if it exceeds its bounds.
+        :param key: str, key of the entry.
+        :param polar: Polar, extrapolated polar.
+        """
+        path = self.entry_path(key)
+        temporary_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez(temporary_path, Re=np.array(polar.Re, dtype=float), alpha=polar.alpha, cl=polar.cl, cd=polar.cd, cm=polar.cm)
+        size = os.path.getsize(temporary_path)
+        try:
+            # A replaced entry (e.g. a damaged one) does not add a new entry.
+            self.total_bytes -= os.path.getsize(path)
+            self.no_entries -= 1
+        except OSError:
+            pass
+        os.replace(temporary_path, path)
+        self.no_entries += 1
+        self.total_bytes += size
+        if self.no_entries > self.max_entries or self.total_bytes > self.max_bytes:
+            self.evict()
+        return None
+
+    def entries(self):
+        """
+        Function to scan the entries of the cache.
+        :return: entries: list, (last use [ns], size [bytes], file name) of every entry.
+        """
+        entries = []
+        for file in os.listdir(self.path):
+            if not file.endswith('.npz') or file.endswith('.tmp.npz'):
+                continue
+            try:
+                status = os.stat(os.path.join(self.path, file))
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime_ns, status.st_size, file))
+        return entries
+
+    def evict(self):
+        """
+        Function to remove the least recently used entries until the cache is within CACHE_EVICTION_RATIO of its
+        bounds. The folder is scanned again, so the entries written by other processes are accounted for.
+        """
+        entries = sorted(self.entries())
+        no_entries = len(entries)
+        total_bytes = sum(entry[1] for entry in entries)
+        max_entries = int(CACHE_EVICTION_RATIO * self.max_entries)
+        max_bytes = CACHE_EVICTION_RATIO * self.max_bytes
+        for _, size, file in entries:
+            if no_entries <= max_entries and total_bytes <= max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.path, file))
+            except FileNotFoundError:
+                pass
+            no_entries = no_entries - 1
+            total_bytes = total_bytes - size
+        self.no_entries = no_entries
+        self.total_bytes = total_bytes
+        return None
+
+    def extrapolate_polar(self, polar, cdmax, AR=None, cdmin=0.001, nalpha=15):
+        """
+        Function to extrapolate a polar through the cache (see Polar.extrapolate).
+        :param polar: Polar, polar to be extrapolated.
+        :param cdmax: float, maximum drag coefficient.
+        :param AR: float, aspect ratio (optional).
+        :param cdmin: float, minimum drag coefficient.
+        :param nalpha: int, number of points added in each segment of Viterna's method.
+        :return: polar: Polar, extrapolated polar.
+        """
+        key = self.key(polar, cdmax, AR, cdmin, nalpha)
+        extrapolated = self.lookup(key, type(polar))
+        if extrapolated is not None:
+            return extrapolated
+        extrapolated = polar.extrapolate(cdmax, AR, cdmin, nalpha)
+        self.put(key, extrapolated)
+        return extrapolated
+
+    def extrapolate_hydrofoil(self, hydrofoil: Hydrofoil, cdmax, AR=None, cdmin=0.001):
+        """
+        Function to extrapolate every polar of a hydrofoil through the cache (see Hydrofoil.extrapolate).
+        :param hydrofoil: Hydrofoil, hydrofoil to be extrapolated.
+        :param cdmax: float, maximum drag coefficient.
+        :param AR: float, aspect ratio (optional).
+        :param cdmin: float, minimum drag coefficient.
+        :return: hydrofoil: Hydrofoil, hydrofoil with +/-180 degree extensions.
+        """
+        return Hydrofoil([self.extrapolate_polar(polar, cdmax, AR, cdmin) for polar in hydrofoil.polars])
+
+    def invalidate(self, polar, cdmax, AR=None, cdmin=0.001, nalpha=15):
+        """
+        Function to remove the cached extrapolation of a polar with the given parameters.
+        :return: removed: bool, True if the entry was cached.
+        """
+        path = self.entry_path(self.key(polar, cdmax, AR, cdmin, nalpha))
+        try:
+            size = os.path.getsize(path)
+            os.remove(path)
+        except FileNotFoundError:
+            return False
+        self.no_entries -= 1
+        self.total_bytes -= size
+        return True
+
+    def clear(self):
+        """
+        Function to remove every entry of the cache.
+        """
+        for file in os.listdir(self.path):
+            if file.endswith('.npz'):
+                try:
+                    os.remove(os.path.join(self.path, file))
+                except FileNotFoundError:
+                    pass
+        self.no_entries = 0
+        self.total_bytes = 0
+        return None
@@ -0,0 +1,151 @@
+import numpy as np
+from scipy.optimize import fsolve, brentq
+
+# Available engines for the update of the axial and tangential induction factors.
+# fsolve:    numerical root of a/(1-a) = k_a and b/(1+b) = k_b (legacy behaviour).
+# analytic:  closed-form roots of the momentum equations, a = k_a/(1+k_a) and b = k_b/(1-k_b).
+# glauert:   closed-form roots with Buhl's empirical correction in the high-load region (a > 0.4).
+# bracketed: bracketed root of Ning's single residual in the inflow angle phi.
+INDUCTION_ENGINES = ('fsolve', 'analytic', 'glauert', 'bracketed')
+
+
+def check_induction_engine(engine: str):
+    """
+    Function for checking that the selected induction engine is available.
+    :param engine: str, name of the induction engine.
+    :return: engine: str, name of the induction engine.
+    """
+    if engine not in INDUCTION_ENGINES:
+        raise ValueError(f"Induction engine {engine} is not available. Please select one of {INDUCTION_ENGINES}.")
+    return engine
+
+
+def momentum_coefficients(sigma_r, C_x, C_y, F_total, phi_radians):
+    """
+    Function for computing the right-hand side of the axial and tangential momentum equations,
+    i.e. a/(1-a) = k_a and b/(1+b) = k_b.
+    :param sigma_r: float or ndarray, local blade solidity.
+    :param C_x: float or ndarray, axial force coefficient.
+    :param C_y: float or ndarray, tangential force coefficient.
+    :param F_total: float or ndarray, total (tip and root) losses.
+    :param phi_radians: float or ndarray, inflow angle [rad].
+    :return: k_a, k_b.
+    """
+    k_a = (sigma_r * C_x) / (4 * F_total * (np.sin(phi_radians)) ** 2)
+    k_b = (sigma_r * C_y) / (4 * F_total * np.sin(phi_radians) * np.cos(phi_radians))
+    return k_a, k_b
+
+
+def axial_induction(k_a, F_total, high_load: bool = False):
+    """
+    Function for computing the axial induction factor in closed form.
+    :param k_a: float or ndarray, right-hand side of the axial momentum equation.
+    :param F_total: float or ndarray, total (tip and root) losses.
+    :param high_load: bool, if True Buhl's empirical correction is applied for k_a > 2/3 (a > 0.4).
+    :return: a: float or ndarray, axial induction factor.
+    """
+    a = k_a / (1 + k_a)
+    if high_load:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g1 = 2 * F_total * k_a - (10 / 9 - F_total)
+            g2 = np.maximum(2 * F_total * k_a - F_total * (4 / 3 - F_total), 0.0)
+            g3 = 2 * F_total * k_a - (25 / 9 - 2 * F_total)
+            a_buhl = np.where(np.abs(g3) < 1e-6, 1 - 1 / (2 * np.sqrt(g2)), (g1 - np.sqrt(g2)) / g3)
+        a = np.where(k_a > 2 / 3, a_buhl, a)
+    return a
+
+
+def tangential_induction(k_b):
+    """
+    Function for computing the tangential induction factor in closed form.
+    :param k_b: float or ndarray, right-hand side of the tangential momentum equation.
+    :return: b: float or ndarray, tangential induction factor.
+    """
+    return k_b / (1 - k_b)
+
+
+def induction_update(engine: str, a, b, k_a, k_b, F_total):
+    """
+    Function for updating the axial and tangential induction factors with the selected engine.
+    :param engine: str, name of the induction engine ('fsolve', 'analytic' or 'glauert').
+    :param a: float or ndarray, current axial induction factor (initial guess for fsolve).
+    :param b: float or ndarray, current tangential induction factor (initial guess for fsolve).
+    :param k_a: float or ndarray, right-hand side of the axial momentum equation.
+    :param k_b: float or ndarray, right-hand side of the tangential momentum equation.
+    :param F_total: float or ndarray, total (tip and root) losses.
+    :return: a_new, b_new: ndarray, updated induction factors (at least one-dimensional).
+    """
+    if engine == 'fsolve':
+        a_new = fsolve(lambda variable_a: variable_a / (1 - variable_a) - k_a, a)
+        b_new = fsolve(lambda variable_b: variable_b / (1 + variable_b) - k_b, b)
+    else:
+        a_new = axial_induction(k_a, F_total, high_load=engine == 'glauert')
+        b_new = tangential_induction(k_b)
+    return np.atleast_1d(a_new), np.atleast_1d(b_new)
+
+
+def inflow_residual(phi_radians, lambda_r, k_a, k_b, F_total, high_load: bool = False):
+    """
+    Function for computing Ning's residual in the inflow angle,
+    R(phi) = sin(phi) / (1 - a) - cos(phi) / (lambda_r * (1 + b)).
+    The momentum form is written without singularities, as 1/(1-a) = 1 + k_a and 1/(1+b) = 1 - k_b.
+    :param phi_radians: float or ndarray, inflow angle [rad].
+    :param lambda_r: float or ndarray, local tip speed ratio (Omega * r / U_inf).
+    :param k_a: float or ndarray, right-hand side of the axial momentum equation.
+    :param k_b: float or ndarray, right-hand side of the tangential momentum equation.
+    :param F_total: float or ndarray, total (tip and root) losses.
+    :param high_load: bool, if True Buhl's empirical correction is applied to the axial induction.
+    :return: residual: float or ndarray.
+    """
+    if high_load:
+        axial_term = np.sin(phi_radians) / (1 - axial_induction(k_a, F_total, high_load=True))
+    else:
+        axial_term = np.sin(phi_radians) * (1 + k_a)
+    return axial_term - np.cos(phi_radians) * (1 - k_b) / lambda_r
+
+
+def solve_inflow_angle(residual, no_stations: int, no_points: int = 64, tolerance: float = 1e-10):
+    """
+    Function for solving Ning's residual R(phi) = 0 with a bracketed root finder.
+    The residual is scanned on a coarse grid of inflow angles in (0, pi) and the first sign change
+    of every station (preferably from negative to positive) is used as bracket. A single station is
+    solved with Brent's method, while several stations are solved at once with a vectorized bisection.
+    Stations without a sign change keep the grid point with the smallest residual.
+    :param residual: callable, residual function R(phi) vectorized over an array with no_stations columns.
+    :param no_stations: int, number of radial stations to be solved.
+    :param no_points: int, number of points of the bracketing grid.
+    :param tolerance: float, tolerance of the inflow angle [rad].
+    :return: phi_radians: ndarray, inflow angle of every station [rad].
+    """
+    # Scan the residual to bracket the root of every station.
+    epsilon = 1e-6
+    phi_grid = np.linspace(epsilon, np.pi - epsilon, no_points)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        residual_grid = residual(np.repeat(phi_grid[:, np.newaxis], no_stations, axis=1))
+    finite = np.isfinite(residual_grid[:-1]) & np.isfinite(residual_grid[1:])
+    sign_change = (residual_grid[:-1] * residual_grid[1:] <= 0) & finite
+    # Rising sign changes (windmill state, R(eps) < 0 < R(pi/2)) are preferred over the spurious ones close to phi = 0.
+    rising = (residual_grid[:-1] <= 0) & (residual_grid[1:] > 0) & finite
+    sign_change = np.where(np.any(rising, axis=0), rising, sign_change)
+    found = np.any(sign_change, axis=0)
+    first = np.argmax(sign_change, axis=0)
+    lower = phi_grid[first]
+    upper = phi_grid[first + 1]
+    phi_radians = phi_grid[np.nanargmin(np.where(np.isfinite(residual_grid), np.abs(residual_grid), np.nan), axis=0)]
+
+    # Refine the bracketed roots.
+    if no_stations == 1:
+        if found[0]:
+            phi_radians[0] = brentq(lambda phi: float(residual(np.array([phi]))[0]), lower[0], upper[0], xtol=tolerance)
+        return phi_radians
+    residual_lower = residual_grid[first, np.arange(no_stations)]
+    while np.any(upper - lower > tolerance):
+        middle = 0.5 * (lower + upper)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            residual_middle = residual(middle)
+        same_sign = residual_middle * residual_lower > 0
+        lower = np.where(same_sign, middle, lower)
+        residual_lower = np.where(same_sign, residual_middle, residual_lower)
+        upper = np.where(same_sign, upper, middle)
+    phi_radians[found] = 0.5 * (lower + upper)[found]
+    return phi_radians
@@ -1,10 +1,92 @@
 import numpy as np
-import pandas as pd
+import threading
+import warnings
 import matplotlib
 matplotlib.use('Agg')
 from tqdm import tqdm
-import matplotlib.pyplot as plt
-from scipy.optimize import fsolve
+from matplotlib.figure import Figure
+from utils.induction import check_induction_engine, momentum_coefficients, induction_update
+from utils.induction import axial_induction, tangential_induction, inflow_residual, solve_inflow_angle
+from scipy.optimize import root_scalar, brentq, bisect
+from utils.convergence import ConvergenceController, convergence_report
+from utils.blade_definition import BladeDefinition, design_positions
+from utils.polar_interpolation import polar_content_hash
+from utils.results_writer import ResultsWriter
+from utils.station_results import StationResults, OPTIMAL_ROTOR_FIELDS
+
+# Available solvers for the optimal chord, i.e. the root of a(chord) = target_induction.
+CHORD_SOLVERS = ('increment', 'bisection', 'secant', 'brent')
+# Default tolerance of the optimal chord [m] of the root-finding solvers, and step of the legacy 'increment' search [m].
+CHORD_TOLERANCE = 1e-6
+CHORD_INCREMENT = 1e-5
+# Convergence tolerance of the induction factors while solving the optimal chord.
+INNER_TOLERANCE = 1e-10
+
+# Polynomial fits of the hydrofoils computed so far, keyed by (hydrofoil name, content hash).
+_polar_fit_cache = {}
+
+
+def fit_polar(name: str, hydrofoil_data: dict):
+    """
+    Function for fitting the polar of a hydrofoil with polynomial functions and finding its maximum
+    hydrodynamic efficiency point, i.e. the optimal angle of attack and its lift and drag coefficients.
+    :param name: str, name of the hydrofoil.
+    :param hydrofoil_data: dict, dictionary containing the hydrofoil data ('alpha', 'cl', 'cd').
+    :return: fit: dict, data and fit of the hydrodynamic efficiency and optimal point of the hydrofoil.
+    """
+    alpha = hydrofoil_data['alpha']
+    cl = hydrofoil_data['cl']
+    cd = hydrofoil_data['cd']
+    hydro_eff = [cl[j] / cd[j] for j in range(len(cl))]
+
+    # Fitting the hydrofoil data with a polynomial function.
+    coeff_hydro_eff = np.polyfit(alpha, hydro_eff, deg=7)
+    coeff_cl = np.polyfit(alpha, cl, deg=7)
+    coeff_cd = np.polyfit(alpha, cd, deg=7)
+
+    # Compute extended polars for the hydrofoil data.
+    alpha_extended = np.linspace(min(alpha), max(alpha), num=100)
+    hydro_eff_extended = np.polyval(coeff_hydro_eff, alpha_extended)
+    cl_extended = np.polyval(coeff_cl, alpha_extended)
+    cd_extended = np.polyval(coeff_cd, alpha_extended)
+
+    # Get the index of the maximum efficiency point.
+    max_hydro_eff_index = np.argmax(hydro_eff_extended)
+    return {'hydrofoil': name, 'alpha': alpha, 'hydro_eff': hydro_eff, 'alpha_extended': alpha_extended,
+            'hydro_eff_extended': hydro_eff_extended, 'optimal_alpha': alpha_extended[max_hydro_eff_index],
+            'optimal_hydro_eff': hydro_eff_extended[max_hydro_eff_index], 'optimal_cl': cl_extended[max_hydro_eff_index],
+            'optimal_cd': cd_extended[max_hydro_eff_index]}
+
+
+def get_polar_fit(name: str, hydrofoil_data: dict):
+    """
+    Function for getting the polynomial fit of a hydrofoil. The fit is computed only the first time and cached
+    by hydrofoil name and content hash of the polar, hence it is shared by every rotor designed with the polar.
+    :param name: str, name of the hydrofoil.
+    :param hydrofoil_data: dict, dictionary containing the hydrofoil data ('alpha', 'cl', 'cd').
+    :return: fit: dict, see fit_polar.
+    """
+    key = (name, polar_content_hash(hydrofoil_data))
+    if key not in _polar_fit_cache:
+        _polar_fit_cache[key] = fit_polar(name, hydrofoil_data)
+    return _polar_fit_cache[key]
+
+
+def cached_polar_fits():
+    """
+    Function for getting the polynomial fits cached so far, e.g. to share them with other processes.
+    :return: polar_fits: dict, fits keyed by (hydrofoil name, content hash).
+    """
+    return dict(_polar_fit_cache)
+
+
+def update_polar_fits(polar_fits: dict):
+    """
+    Function for adding polynomial fits (see cached_polar_fits) to the cache.
+    :param polar_fits: dict, fits keyed by (hydrofoil name, content hash).
+    """
+    _polar_fit_cache.update(polar_fits)
+    return None
 
 
 class OptimalRotor:
@@ -13,7 +95,18 @@ class OptimalRotor:
     The optimal rotor object contains the fluid properties, operative state, and hydrofoil data.
     The object should be used just for the optimal calculation of the blade chord and twist angle.
     """
-    def __init__(self, fluid_properties: dict, operative_state: dict, hydrofoils: dict):
+    def __init__(self, fluid_properties: dict, operative_state: dict, hydrofoils: dict, induction_engine: str = 'analytic',
+                 convergence: ConvergenceController = None, blade: BladeDefinition = None):
+        """
+        Constructor of the OptimalRotor class.
+        :param fluid_properties: dict, dictionary containing the fluid properties.
+        :param operative_state: dict, dictionary containing the operative state data.
+        :param hydrofoils: dict, dictionary containing the hydrofoil data (one per design point, in reversed order).
+        :param induction_engine: str, engine for the induction factors ('fsolve', 'analytic', 'glauert' or 'bracketed').
+        :param convergence: ConvergenceController, settings of the fixed-point iteration (plain iteration if None).
+        :param blade: BladeDefinition, radial layout of the hydrofoils. If provided, the polars of the design points are
+        blended from the sections of the blade (any number of design points), and hydrofoils is not used.
+        """
         self.density = fluid_properties['density']
         self.kinematic_viscosity = fluid_properties['kinematic_viscosity']
         self.dynamic_viscosity = fluid_properties['dynamic_viscosity']
@@ -26,7 +119,16 @@ class OptimalRotor:
         self.initial_point_pctg = operative_state['initial_point_pctg']
         self.final_point_pctg = operative_state['final_point_pctg']
         self.no_design_points = operative_state['no_design_points']
-        self.hydrofoils_data = hydrofoils
+        self.blade = blade
+        if blade is None:
+            self.hydrofoils_data = hydrofoils
+        else:
+            # The polars are blended at the evaluated design points, i.e. the last one at 97.5% of its radius.
+            self.hydrofoils_data = blade.station_data(design_positions(operative_state))
+        self.induction_engine = check_induction_engine(induction_engine)
+        self.convergence = ConvergenceController() if convergence is None else convergence
+        self.convergence_report = None
+        self.results = None
         self.optimal_chord = []
         self.optimal_phis = []
         self.optimal_alphas = []
@@ -38,6 +140,7 @@ class OptimalRotor:
         self.tang_velocities = []
         self.force_x_coeff = []
         self.force_y_coeff = []
+        self.polar_fits = []
 
     def get_design_points(self):
         """
@@ -60,183 +163,254 @@ class OptimalRotor:
             print("The number of design points does not match with the number of hydrofoils data. Please check the data.")
         return None
 
-    def get_optimal_chord_twist(self, path):
+    def get_optimal_chord_twist(self, path: str = None, chord_solver: str = 'brent', chord_tolerance: float = None,
+                                target_induction: float = 1 / 3, progress: bool = True):
         """
         Function to compute the optimal chord and twist angle for the ocean current turbine blade design.
         The optimal chord and twist angle are computed using the Blade Element Momentum Theory (BEMT).
-        :param path: str, path to the folder where polar plots will be saved.
+        The polynomial fits of the hydrofoil efficiency are only recorded in polar_fits, the polar plots
+        are rendered afterwards by save_polar_plots (or not at all). With the 'neighbour' warm start of the
+        convergence controller, the chord solvers start every station at the induction factors of the previous one.
+        :param path: str, path to the folder where polar plots will be saved (no plots if None).
+        :param chord_solver: str, solver for a(chord) = target_induction ('increment', 'bisection', 'secant' or 'brent').
+        :param chord_tolerance: float, tolerance of the optimal chord [m] (step of the 'increment' solver), by default
+        CHORD_TOLERANCE, or CHORD_INCREMENT (the legacy 1e-5 m search) for the 'increment' solver.
+        :param target_induction: float, axial induction factor of the optimal rotor (the legacy search stopped at 0.333).
+        :param progress: bool, if True the progress bar of the design points is shown.
         """
+        if chord_solver not in CHORD_SOLVERS:
+            raise ValueError(f"Chord solver {chord_solver} is not available. Please select one of {CHORD_SOLVERS}.")
+        if chord_tolerance is None:
+            chord_tolerance = CHORD_INCREMENT if chord_solver == 'increment' else CHORD_TOLERANCE
         # Define the design points (in terms of local radius) and the hydrofoils considered for the analysis.
-        # By default, the hydrofoils are considered to be in the same order as the design points.
-        # TODO: Create a function to reorder the relation between the hydrofoils and the design points.
+        # The design points take the hydrofoils in the reversed order of the hydrofoils dictionary, i.e. of the folder
+        # listing (not sorted). The hydrofoil of every radial position is set explicitly with a BladeDefinition (blade),
+        # whose stations are stored in this reversed order.
         design_points = self.design_points
         design_points[-1] = design_points[-1] * 0.975
-        design_hydrofoils = list(self.hydrofoils_data.keys())
-        # TODO: Verify that the order of the hydrofoils is correct based on the hydrofoil positions along the blade.
-        design_hydrofoils = design_hydrofoils[::-1]
-
-        # Defining lists where the optimal chord and twist angle will be stored.
-        chords = []
-        phis = []
-        alphas = []
-        betas = []
-        losses = []
-        blade_solidity = []
-        disk_velocities = []
-        tang_velocities = []
-        force_x_coeff = []
-        force_y_coeff = []
+        design_hydrofoils = list(self.hydrofoils_data.keys())[::-1]
+
+        # Preallocate the results where the optimal chord and twist angle will be stored.
+        results = StationResults(len(design_hydrofoils), OPTIMAL_ROTOR_FIELDS)
+        polar_fits = []
+        records = []
+        [a_neighbour, b_neighbour] = [0.0, 0.0]
 
         # Initialize the iterative process to compute the optimal chord and twist angle.
-        for i in tqdm(range(len(design_hydrofoils))):
-            # Extracting the polar data for the selected hydrofoil.
+        for i in tqdm(range(len(design_hydrofoils)), disable=not progress):
+            # Extracting the (cached) polynomial fit of the selected hydrofoil and its optimal point.
             hydrofoil = design_hydrofoils[i]
             local_radius = design_points[i]
-            alpha = self.hydrofoils_data[hydrofoil]['alpha']
-            cl = self.hydrofoils_data[hydrofoil]['cl']
-            cd = self.hydrofoils_data[hydrofoil]['cd']
-            hydro_eff = [cl[j] / cd[j] for j in range(len(cl))]
-
-            # Fitting the hydrofoil data with a polynomial function.
-            coeff_hydro_eff = np.polyfit(alpha, hydro_eff, deg=7)
-            coeff_cl = np.polyfit(alpha, cl, deg=7)
-            coeff_cd = np.polyfit(alpha, cd, deg=7)
-
-            # Compute extended polars for the hydrofoil data.
-            alpha_extended = np.linspace(min(alpha), max(alpha), num=100)
-            hydro_eff_extended = np.polyval(coeff_hydro_eff, alpha_extended)
-            cl_extended = np.polyval(coeff_cl, alpha_extended)
-            cd_extended = np.polyval(coeff_cd, alpha_extended)
-
-            # Get the index of the maximum efficiency point.
-            max_hydro_eff_index = np.argmax(hydro_eff_extended)
-            optimal_alpha = alpha_extended[max_hydro_eff_index]
-            optimal_cl = cl_extended[max_hydro_eff_index]
-            optimal_cd = cd_extended[max_hydro_eff_index]
-
-            # Plot the Hydrodynamic Efficiency of the Hydrofoils.
-            plt.figure(figsize=(10, 6))
-            plt.plot(alpha, hydro_eff, 'o', label='Hydrofoil Data')
-            plt.plot(alpha_extended, hydro_eff_extended, label='Polynomial Fit', color='teal')
-            plt.plot(optimal_alpha, np.max(hydro_eff_extended), 'ro', label='Optimal Point')
-            plt.xlabel("Angle of Attack [deg]")
-            plt.ylabel("Hydrodynamic Efficiency [-]")
-            plt.title(f"Hydrodynamic Efficiency of Hydrofoil {hydrofoil}")
-            plt.legend()
-            plt.minorticks_on()
-            plt.grid(which='major', linestyle='-', linewidth='0.5', color='grey', alpha=0.25)
-            plt.grid(which='minor', linestyle=':', linewidth='0.5', color='grey', alpha=0.30)
-            plt.savefig(f"{path}/hydrofoil_{hydrofoil}_efficiency.png", dpi=300)
+            fit = get_polar_fit(hydrofoil, self.hydrofoils_data[hydrofoil])
+            [optimal_alpha, optimal_cl, optimal_cd] = [fit['optimal_alpha'], fit['optimal_cl'], fit['optimal_cd']]
+
+            # Record the Hydrodynamic Efficiency fit of the Hydrofoils, it is plotted after the design loop.
+            polar_fits.append(fit)
 
             # Initialize the chord and axial and tangential induction factors.
             chord = 0.01 * self.blade_radius
             [beta, phi, F_total, sigma_r, U_disk, U_tang, C_x, C_y] = [0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0, 0.0]
             a = 0.0
             b = 0.0
-            # Initialize the iterative process to compute the optimal chord and twist angle.
-            while a < 0.333:
-                # Initialize the axial and tangential induction errors.
-                error_ind_axial = 0.10
-                error_ind_tangential = 0.10
-                while error_ind_axial > 0.001 or error_ind_tangential > 0.001:
-                    # Reallocate the geometrical and hydrodynamic variables.
-                    # TODO: Figure out how to avoid the reallocation of the geometrical and hydrodynamic variables.
-                    U_inf = self.optimal_speed
-                    Radius = self.blade_radius
-                    radius_hub = self.radius_hub_pctg * Radius
-                    radius = local_radius
-                    Nb = self.no_blades
-                    TipSR = self.tip_speed_ratio
-                    Omega = U_inf * TipSR / Radius
-
-                    # Compute the relative velocities.
-                    U_disk = U_inf * (1 - a)
-                    U_tang = Omega * radius * (1 + b)
-
-                    # Compute the flow angles at the local radius.
-                    phi = np.rad2deg(np.arctan(U_disk / U_tang))
-                    alpha = optimal_alpha
-                    beta = phi - alpha
-                    phi_radians = np.deg2rad(phi)
-
-                    # Compute the axial and tangential force factors.
-                    coeff_lift = optimal_cl
-                    coeff_drag = optimal_cd
-                    C_x = coeff_lift * np.cos(phi_radians) + coeff_drag * np.sin(phi_radians)
-                    C_y = coeff_lift * np.sin(phi_radians) - coeff_drag * np.cos(phi_radians)
-
-                    # Compute the local blade solidity.
-                    sigma_r = Nb * chord / (2 * np.pi * radius)
-
-                    # Compute the tip and root losses.
-                    F_tip = (2 / np.pi) * np.arccos(np.exp(-(((Nb / 2) * (1 - (radius / Radius))) / ((radius / Radius) * (np.sin(phi_radians))))))
-                    F_root = (2 / np.pi) * np.arccos(np.exp(-((Nb / 2) * ((radius - radius_hub) / (radius * np.sin(phi_radians))))))
-                    F_total = F_tip * F_root
-
-                    # Compute the axial and tangential induction factors.
-                    # TODO: Try to define the functions as global functions.
-                    def fa(variable_a: float):
-                        return variable_a / (1 - variable_a) - (sigma_r * C_x) / (4 * F_total * (np.sin(phi_radians)) ** 2)
-
-                    def fb(variable_b: float):
-                        return variable_b / (1 + variable_b) - (sigma_r * C_y) / (4 * F_total * np.sin(phi_radians) * np.cos(phi_radians))
-
-                    # Compute the axial and tangential induction factors.
-                    # TODO: Check why the type checker is not working.
-                    # noinspection PyTypeChecker
-                    a_new = fsolve(fa, a)
-                    # TODO: Check why the type checker is not working.
-                    # noinspection PyTypeChecker
-                    b_new = fsolve(fb, b)
-
-                    # Compute the axial and tangential induction errors.
-                    # TODO: Check why the type checker is not working.
-                    # noinspection PyTypeChecker
-                    error_ind_axial = abs(float(a_new) - a)
-                    # TODO: Check why the type checker is not working.
-                    # noinspection PyTypeChecker
-                    error_ind_tangential = abs(float(b_new) - b)
-
-                    # Update the axial and tangential induction factors.
-                    a = a_new
-                    b = b_new
-                chord = chord + 0.00001
-            chords.append(chord)
-            betas.append(beta)
-            phis.append(phi)
-            alphas.append(alpha)
-            losses.append(F_total)
-            blade_solidity.append(sigma_r)
-            disk_velocities.append(U_disk)
-            tang_velocities.append(U_tang)
-            force_x_coeff.append(C_x)
-            force_y_coeff.append(C_y)
-        # TODO: Create a function to transform a list of lists into a single list.
-        # TODO: Check why some variables are stored as lists of lists.
-        self.optimal_chord = chords
-        self.optimal_betas = betas
-        self.optimal_betas = [item for sublist in self.optimal_betas for item in sublist]
-        self.optimal_phis = phis
-        self.optimal_phis = [item for sublist in self.optimal_phis for item in sublist]
-        self.optimal_alphas = alphas
-        self.total_losses = losses
-        self.total_losses = [item for sublist in self.total_losses for item in sublist]
-        self.solidity = blade_solidity
-        self.disk_velocities = disk_velocities
-        self.disk_velocities = [item for sublist in self.disk_velocities for item in sublist]
-        self.tang_velocities = tang_velocities
-        self.tang_velocities = [item for sublist in self.tang_velocities for item in sublist]
-        self.force_x_coeff = force_x_coeff
-        self.force_x_coeff = [item for sublist in self.force_x_coeff for item in sublist]
-        self.force_y_coeff = force_y_coeff
-        self.force_y_coeff = [item for sublist in self.force_y_coeff for item in sublist]
+            alpha = optimal_alpha
+            if chord_solver == 'increment':
+                # Increase the chord until the target axial induction factor is reached.
+                while a < target_induction:
+                    [a, b, beta, phi, F_total, sigma_r, U_disk, U_tang, C_x, C_y] = self.solve_station(
+                        local_radius=local_radius, chord=chord, alpha=optimal_alpha, coeff_lift=optimal_cl, coeff_drag=optimal_cd, a=a, b=b)
+                    chord = chord + chord_tolerance
+            else:
+                # Solve a(chord) = target_induction as a scalar root-finding problem.
+                chord = self.solve_chord(local_radius=local_radius, alpha=optimal_alpha, coeff_lift=optimal_cl, coeff_drag=optimal_cd,
+                                         solver=chord_solver, tolerance=chord_tolerance, target_induction=target_induction,
+                                         a=a_neighbour, b=b_neighbour)
+                [a, b, beta, phi, F_total, sigma_r, U_disk, U_tang, C_x, C_y] = self.solve_station(
+                    local_radius=local_radius, chord=chord, alpha=optimal_alpha, coeff_lift=optimal_cl, coeff_drag=optimal_cd,
+                    a=a_neighbour, b=b_neighbour, tolerance=INNER_TOLERANCE, diagnostics=records)
+                if self.convergence.warm_start == 'neighbour':
+                    [a_neighbour, b_neighbour] = [float(np.ravel(a)[0]), float(np.ravel(b)[0])]
+            results.store(i, optimal_chord=chord, optimal_betas=beta, optimal_phis=phi, optimal_alphas=alpha, total_losses=F_total,
+                          solidity=sigma_r, disk_velocities=U_disk, tang_velocities=U_tang, force_x_coeff=C_x, force_y_coeff=C_y)
+        # The one-element arrays of the station solver are stored as plain values, one record per design point.
+        self.results = results
+        for name, values in results.to_lists().items():
+            setattr(self, name, values)
+        self.polar_fits = polar_fits
+        self.convergence_report = convergence_report([{**record, 'station': i, 'radius': float(design_points[i])}
+                                                      for i, record in enumerate(records)])
+        if path is not None:
+            self.save_polar_plots(path=path)
+        return None
+
+    def save_polar_plots(self, path: str, background: bool = False, dpi: int = 300):
+        """
+        Function to save the hydrodynamic efficiency plots of the hydrofoils recorded by get_optimal_chord_twist.
+        The figures are created without pyplot, so they are released once saved and can be rendered in a
+        background thread while the analysis continues.
+        :param path: str, path to the folder where polar plots will be saved.
+        :param background: bool, if True the plots are rendered in a background thread.
+        :param dpi: int, resolution of the saved plots.
+        :return: thread: threading.Thread rendering the plots (None if background is False).
+        """
+        polar_fits = list(self.polar_fits)
+        if background:
+            thread = threading.Thread(target=save_polar_plots, args=(polar_fits, path, dpi))
+            thread.start()
+            return thread
+        save_polar_plots(polar_fits, path, dpi)
         return None
 
-    def save_properties(self, path: str):
+    def station_state(self, local_radius, chord, coeff_lift, coeff_drag, phi_radians):
+        """
+        Function to compute the hydrodynamic state of a design point for a given inflow angle.
+        :param local_radius: float, local radius of the design point [m].
+        :param chord: float, local chord of the blade [m].
+        :param coeff_lift: float, lift coefficient at the optimal angle of attack.
+        :param coeff_drag: float, drag coefficient at the optimal angle of attack.
+        :param phi_radians: float or ndarray, inflow angle [rad].
+        :return: C_x, C_y, F_total, sigma_r, k_a, k_b.
         """
-        Function to save the properties of the optimal rotor object into a pd Dataframe.
+        Radius = self.blade_radius
+        radius_hub = self.radius_hub_pctg * Radius
+        radius = local_radius
+        Nb = self.no_blades
+
+        # Compute the axial and tangential force factors.
+        C_x = coeff_lift * np.cos(phi_radians) + coeff_drag * np.sin(phi_radians)
+        C_y = coeff_lift * np.sin(phi_radians) - coeff_drag * np.cos(phi_radians)
+
+        # Compute the local blade solidity.
+        sigma_r = Nb * chord / (2 * np.pi * radius)
+
+        # Compute the tip and root losses.
+        F_tip = (2 / np.pi) * np.arccos(np.exp(-(((Nb / 2) * (1 - (radius / Radius))) / ((radius / Radius) * (np.sin(phi_radians))))))
+        F_root = (2 / np.pi) * np.arccos(np.exp(-((Nb / 2) * ((radius - radius_hub) / (radius * np.sin(phi_radians))))))
+        F_total = F_tip * F_root
+
+        # Compute the right-hand side of the momentum equations.
+        [k_a, k_b] = momentum_coefficients(sigma_r, C_x, C_y, F_total, phi_radians)
+        return C_x, C_y, F_total, sigma_r, k_a, k_b
+
+    def solve_chord(self, local_radius, alpha, coeff_lift, coeff_drag, solver: str = 'brent', tolerance: float = 1e-6,
+                    target_induction: float = 1 / 3, a: float = 0.0, b: float = 0.0):
+        """
+        Function to compute the chord of a design point whose axial induction factor equals the target one,
+        i.e. the root of a(chord) - target_induction = 0. The analytic Betz-optimal chord,
+        c = 8 * pi * r * (1 - cos(phi)) / (Nb * cl) with phi = 2/3 * arctan(1 / lambda_r),
+        is used as initial guess of the secant method and as starting point of the bracket. The bracketed
+        Brent's method is used whenever the secant method does not reach a physical root.
+        :param local_radius: float, local radius of the design point [m].
+        :param alpha: float, angle of attack [deg].
+        :param coeff_lift: float, lift coefficient at the angle of attack.
+        :param coeff_drag: float, drag coefficient at the angle of attack.
+        :param solver: str, root-finding method ('bisection', 'secant' or 'brent').
+        :param tolerance: float, tolerance of the chord [m].
+        :param target_induction: float, axial induction factor of the optimal rotor.
+        :param a: float, initial axial induction factor of the inner iterations.
+        :param b: float, initial tangential induction factor of the inner iterations.
+        :return: chord: float, chord of the design point [m].
+        """
+        # Analytic Betz-optimal chord.
+        lambda_r = self.omega_speed * local_radius / self.optimal_speed
+        phi_betz = (2 / 3) * np.arctan(1 / lambda_r)
+        chord_betz = 8 * np.pi * local_radius * (1 - np.cos(phi_betz)) / (self.no_blades * coeff_lift)
+
+        def residual(chord: float):
+            with np.errstate(divide='ignore', invalid='ignore'):
+                a_chord = self.solve_station(local_radius=local_radius, chord=chord, alpha=alpha, coeff_lift=coeff_lift,
+                                             coeff_drag=coeff_drag, a=a, b=b, tolerance=INNER_TOLERANCE)[0]
+            a_chord = float(np.ravel(a_chord)[0])
+            # Overloaded sections (a -> 1) break down the momentum equations and return NaN.
+            return a_chord - target_induction if np.isfinite(a_chord) else 1.0 - target_induction
+
+        if solver == 'secant':
+            # A secant method that stalls warns (e.g. "Tolerance of ... reached"), it falls back to Brent's method quietly.
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', RuntimeWarning)
+                solution = root_scalar(residual, x0=chord_betz, x1=1.05 * chord_betz, method='secant', xtol=tolerance)
+            # The secant method is not bracketed, hence the root is accepted only if it is physical.
+            if solution.converged and solution.root > 0 and abs(residual(solution.root)) < 1e-6:
+                return solution.root
+
+        # Bracket the root around the Betz-optimal chord, a(chord) increases with the chord.
+        lower = chord_betz
+        upper = chord_betz
+        while residual(lower) > 0:
+            lower = 0.5 * lower
+        while residual(upper) < 0:
+            upper = 1.5 * upper
+        if solver == 'bisection':
+            return bisect(residual, lower, upper, xtol=tolerance)
+        return brentq(residual, lower, upper, xtol=tolerance)
+
+    def solve_station(self, local_radius, chord, alpha, coeff_lift, coeff_drag, a=0.0, b=0.0, tolerance: float = None,
+                      diagnostics: list = None):
         """
-        properties = pd.DataFrame({
+        Function to solve the axial and tangential induction factors of a design point with the
+        selected induction engine, for a given chord and (optimal) angle of attack.
+        :param local_radius: float, local radius of the design point [m].
+        :param chord: float, local chord of the blade [m].
+        :param alpha: float, angle of attack [deg].
+        :param coeff_lift: float, lift coefficient at the angle of attack.
+        :param coeff_drag: float, drag coefficient at the angle of attack.
+        :param a: float, initial axial induction factor.
+        :param b: float, initial tangential induction factor.
+        :param tolerance: float, convergence tolerance of the induction factors (the one of the controller if None).
+        :param diagnostics: list, if given the convergence diagnostics of the design point are appended to it.
+        :return: a, b, beta, phi, F_total, sigma_r, U_disk, U_tang, C_x, C_y.
+        """
+        U_inf = self.optimal_speed
+        Omega = self.omega_speed
+        radius = local_radius
+        if self.induction_engine == 'bracketed':
+            # Solve Ning's residual in phi, so the fixed-point iteration is not required.
+            lambda_r = Omega * radius / U_inf
+
+            def residual(phi_grid):
+                [_, _, F, _, k_a, k_b] = self.station_state(radius, chord, coeff_lift, coeff_drag, phi_grid)
+                return inflow_residual(phi_grid, lambda_r, k_a, k_b, F)
+
+            phi_radians = solve_inflow_angle(residual, 1)
+            [C_x, C_y, F_total, sigma_r, k_a, k_b] = self.station_state(radius, chord, coeff_lift, coeff_drag, phi_radians)
+            a = axial_induction(k_a, F_total)
+            b = tangential_induction(k_b)
+            U_disk = U_inf * (1 - a)
+            U_tang = Omega * radius * (1 + b)
+            phi = np.rad2deg(phi_radians)
+            beta = phi - alpha
+            if diagnostics is not None:
+                diagnostics.extend(self.convergence.start(a, b, active=False).records())
+            return a, b, beta, phi, F_total, sigma_r, U_disk, U_tang, C_x, C_y
+
+        # Initialize the iteration of the axial and tangential induction factors.
+        state = self.convergence.start(a, b, tolerance)
+        while np.any(state.active):
+            # Compute the relative velocities.
+            U_disk = U_inf * (1 - a)
+            U_tang = Omega * radius * (1 + b)
+
+            # Compute the flow angles at the local radius.
+            phi = np.rad2deg(np.arctan(U_disk / U_tang))
+            beta = phi - alpha
+            phi_radians = np.deg2rad(phi)
+            [C_x, C_y, F_total, sigma_r, k_a, k_b] = self.station_state(radius, chord, coeff_lift, coeff_drag, phi_radians)
+
+            # Compute the axial and tangential induction factors.
+            a_new, b_new = induction_update(self.induction_engine, a, b, k_a, k_b, F_total)
+
+            # Update the axial and tangential induction factors with the relaxation and acceleration of the controller.
+            [a, b] = state.update([0], a_new, b_new)
+        if diagnostics is not None:
+            diagnostics.extend(state.records())
+        return a, b, beta, phi, F_total, sigma_r, U_disk, U_tang, C_x, C_y
+
+    def save_properties(self, path: str, file_format: str = 'csv'):
+        """
+        Function to save the properties of the optimal rotor object (optimal_rotor_properties file).
+        :param path: str, path to the folder where the properties will be saved.
+        :param file_format: str, format of the file ('csv', 'npy', 'parquet' or 'feather', see ResultsWriter).
+        """
+        properties = {
             'Design Points [m]': self.design_points,
             'Optimal Chord [m]': self.optimal_chord,
             'Optimal Twist Angle [deg]': self.optimal_betas,
@@ -247,6 +421,31 @@ class OptimalRotor:
             'Tangential Velocities [m/s]': self.tang_velocities,
             'Axial Force Coefficient [-]': self.force_x_coeff,
             'Tangential Force Coefficient [-]': self.force_y_coeff
-        })
-        properties.to_csv(path_or_buf=f"{path}/optimal_rotor_properties.csv", index=False)
+        }
+        with ResultsWriter(f"{path}/optimal_rotor_properties.{file_format}", file_format=file_format) as writer:
+            writer.write_frame(properties)
         return None
+
+
+def save_polar_plots(polar_fits: list, path: str, dpi: int = 300):
+    """
+    Function for saving the hydrodynamic efficiency plot of every hydrofoil.
+    :param polar_fits: list, polynomial fits of the hydrofoil efficiency recorded by OptimalRotor.get_optimal_chord_twist.
+    :param path: str, path to the folder where polar plots will be saved.
+    :param dpi: int, resolution of the saved plots.
+    """
+    for fit in polar_fits:
+        figure = Figure(figsize=(10, 6))
+        axes = figure.subplots()
+        axes.plot(fit['alpha'], fit['hydro_eff'], 'o', label='Hydrofoil Data')
+        axes.plot(fit['alpha_extended'], fit['hydro_eff_extended'], label='Polynomial Fit', color='teal')
+        axes.plot(fit['optimal_alpha'], fit['optimal_hydro_eff'], 'ro', label='Optimal Point')
+        axes.set_xlabel("Angle of Attack [deg]")
+        axes.set_ylabel("Hydrodynamic Efficiency [-]")
+        axes.set_title(f"Hydrodynamic Efficiency of Hydrofoil {fit['hydrofoil']}")
+        axes.legend()
+        axes.minorticks_on()
+        axes.grid(which='major', linestyle='-', linewidth='0.5', color='grey', alpha=0.25)
+        axes.grid(which='minor', linestyle=':', linewidth='0.5', color='grey', alpha=0.30)
+        figure.savefig(f"{path}/hydrofoil_{fit['hydrofoil']}_efficiency.png", dpi=dpi)
+    return None
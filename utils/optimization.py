@@ -0,0 +1,256 @@
+import numpy as np
+from scipy.optimize import minimize
+from utils.evaluation_bemt import StandardRotor
+from utils.induction import momentum_coefficients, axial_induction, tangential_induction
+
+# Step of the complex-step derivatives, the derivatives are exact to machine precision for any small step.
+COMPLEX_STEP = 1e-30
+# Convergence tolerance of the induction factors of the solutions used for the sensitivities.
+SENSITIVITY_TOLERANCE = 1e-12
+# Design variables of the blade optimization.
+DESIGN_VARIABLES = ('chord', 'twist', 'tip_speed_ratio')
+
+
+class RotorSensitivities:
+    """
+    Class for computing the power and thrust coefficients (Cp and Ct) of a StandardRotor and their sensitivities
+    with respect to the chord and twist of every station and to the tip speed ratio. The BEMT residual of every
+    station, R(x, p) = G(x, p) - x with x = (a, b), only depends on the station itself, hence its Jacobian is
+    block diagonal (2 x 2 per station). The partial derivatives of the station map G and of the tip and root
+    losses are computed with the complex step, one vectorized evaluation of all the stations per variable
+    (a, b, chord, twist and tip speed ratio), and the total derivatives with the adjoint of the converged
+    residual, i.e. a 2 x 2 solve per station. A gradient costs one BEMT solution and five station evaluations,
+    instead of the 2N + 1 BEMT solutions of finite differences. The loads are integrated with the analytic rule
+    of StandardRotor.evaluate_performance.
+    """
+
+    def __init__(self, rotor: StandardRotor, interpolation_range: int = 70, tolerance: float = SENSITIVITY_TOLERANCE):
+        """
+        Constructor of the RotorSensitivities class.
+        :param rotor: StandardRotor, rotor to be differentiated (polars at fixed Reynolds numbers, any induction
+        engine but 'glauert', whose converged state differs from the momentum equations used here).
+        :param interpolation_range: int, number of segments of the integration of the loads.
+        :param tolerance: float, convergence tolerance of the induction factors of the BEMT solutions.
+        """
+        if rotor.reynolds_hydrofoils is not None:
+            raise ValueError("The sensitivities are only available for polars at fixed Reynolds numbers.")
+        if rotor.induction_engine == 'glauert':
+            raise ValueError("The sensitivities are not available for the 'glauert' induction engine.")
+        self.rotor = rotor
+        self.tolerance = tolerance
+        self.no_stations = len(rotor.hydrofoils)
+        self.index = np.arange(self.no_stations)
+        # The radial invariants of the geometry (radius and losses) do not depend on the design variables.
+        self.geometry = rotor.get_geometry()
+        self.radius = self.geometry.radius[:self.no_stations]
+        self.stacked_polars = rotor.get_stacked_polars()
+        # Linear map from the stations to the points of the segmented blade (np.interp of every station).
+        [segmented_radius, thrust_weights, power_weights] = self.geometry.segment_weights(interpolation_range)
+        self.segment_map = np.column_stack([np.interp(segmented_radius, self.radius, column) for column in np.eye(self.no_stations)])
+        # Integrals of r and r^3 over every segment (the last point of the segmented blade has no segment).
+        self.thrust_weights = np.append(thrust_weights, 0.0)
+        self.power_weights = np.append(power_weights, 0.0)
+
+    def station_map(self, a, b, chord, twist, tip_speed_ratio):
+        """
+        Function to compute the fixed-point image of the induction factors and the total losses of every station.
+        Every operation accepts complex arguments, the polar coefficients are extended with their slopes.
+        :param a: ndarray, axial induction factors of the stations.
+        :param b: ndarray, tangential induction factors of the stations.
+        :param chord: ndarray, chord of the stations [m].
+        :param twist: ndarray, twist of the stations [deg].
+        :param tip_speed_ratio: float or ndarray, tip speed ratio.
+        :return: a_image, b_image, F_total: ndarray.
+        """
+        rotor = self.rotor
+        radius = self.radius
+        omega = rotor.optimal_speed * tip_speed_ratio / rotor.blade_radius
+
+        # Compute the inflow angles and the angles of attack.
+        phi_radians = np.arctan(rotor.optimal_speed * (1 - a) / (omega * radius * (1 + b)))
+        alpha = phi_radians * (180 / np.pi) - twist - rotor.pitch
+
+        # Calculating the polar coefficients, the imaginary part of alpha is carried by the slopes.
+        alpha_real = np.real(alpha)
+        [coeff_lift, coeff_drag] = self.stacked_polars(alpha_real, self.index)
+        if np.iscomplexobj(alpha):
+            [slope_lift, slope_drag] = self.stacked_polars.derivative(alpha_real, self.index)
+            coeff_lift = coeff_lift + 1j * np.imag(alpha) * slope_lift
+            coeff_drag = coeff_drag + 1j * np.imag(alpha) * slope_drag
+        C_x = coeff_lift * np.cos(phi_radians) + coeff_drag * np.sin(phi_radians)
+        C_y = coeff_lift * np.sin(phi_radians) - coeff_drag * np.cos(phi_radians)
+
+        # Compute tip and root losses.
+        F_total = self.geometry.losses(phi_radians, self.index)
+
+        # Compute the new axial and tangential induction factors (closed-form roots of the momentum equations).
+        sigma_r = rotor.no_blades * chord / (2 * np.pi * radius)
+        [k_a, k_b] = momentum_coefficients(sigma_r, C_x, C_y, F_total, phi_radians)
+        return axial_induction(k_a, F_total), tangential_induction(k_b), F_total
+
+    def solve(self, chord, twist, tip_speed_ratio, initial_axial=None, initial_tangential=None):
+        """
+        Function to solve the BEMT of the rotor for the given design, with the batched solver of the rotor.
+        :param chord: ndarray, chord of the stations [m].
+        :param twist: ndarray, twist of the stations [deg].
+        :param tip_speed_ratio: float, tip speed ratio.
+        :param initial_axial: ndarray, initial axial induction factors of the stations (zeros by default).
+        :param initial_tangential: ndarray, initial tangential induction factors of the stations (zeros by default).
+        :return: a, b: ndarray, converged induction factors of the stations.
+        """
+        rotor = self.rotor
+        rotor.blade_chord = list(chord)
+        rotor.blade_twist = list(twist)
+        rotor.tip_speed_ratio = tip_speed_ratio
+        rotor.omega = rotor.optimal_speed * tip_speed_ratio / rotor.blade_radius
+        rotor.evaluate_bemt_batched(tolerance=self.tolerance, initial_axial=initial_axial, initial_tangential=initial_tangential)
+        return np.array(rotor.induction_axial), np.array(rotor.induction_tangential)
+
+    def evaluate(self, chord, twist, tip_speed_ratio, initial_axial=None, initial_tangential=None):
+        """
+        Function to compute the power and thrust coefficients of a design and their gradients.
+        :param chord: ndarray, chord of the stations [m].
+        :param twist: ndarray, twist of the stations [deg].
+        :param tip_speed_ratio: float, tip speed ratio.
+        :param initial_axial: ndarray, initial axial induction factors of the stations (zeros by default).
+        :param initial_tangential: ndarray, initial tangential induction factors of the stations (zeros by default).
+        :return: results: dict, Cp, Ct, thrust, power, the converged a and b, and the gradients of Cp and Ct
+        ('dCp_dchord', 'dCp_dtwist', 'dCp_dtip_speed_ratio', 'dCt_dchord', 'dCt_dtwist', 'dCt_dtip_speed_ratio').
+        """
+        rotor = self.rotor
+        chord = np.asarray(chord, dtype=float)
+        twist = np.asarray(twist, dtype=float)
+        [a, b] = self.solve(chord, twist, tip_speed_ratio, initial_axial, initial_tangential)
+        [_, _, F] = self.station_map(a, b, chord, twist, tip_speed_ratio)
+
+        # Partial derivatives of the station map, one complex evaluation of all the stations per variable.
+        h = 1j * COMPLEX_STEP
+        partials = {'a': self.station_map(a + h, b, chord, twist, tip_speed_ratio),
+                    'b': self.station_map(a, b + h, chord, twist, tip_speed_ratio),
+                    'chord': self.station_map(a, b, chord + h, twist, tip_speed_ratio),
+                    'twist': self.station_map(a, b, chord, twist + h, tip_speed_ratio),
+                    'tip_speed_ratio': self.station_map(a, b, chord, twist, tip_speed_ratio + h)}
+        partials = {key: [np.imag(value) / COMPLEX_STEP for value in values] for key, values in partials.items()}
+
+        # Loads of the segmented blade, T = sum(wT 4 pi rho U^2 a (1-a) F) and P = sum(wP 4 pi rho U Omega b (1-a) F).
+        omega = rotor.optimal_speed * tip_speed_ratio / rotor.blade_radius
+        [a_s, b_s, F_s] = [self.segment_map @ values for values in (a, b, F)]
+        thrust_weights = 4 * np.pi * rotor.density * rotor.optimal_speed ** 2 * self.thrust_weights
+        power_weights = 4 * np.pi * rotor.density * rotor.optimal_speed * omega * self.power_weights
+        thrust = float(np.sum(thrust_weights * a_s * (1 - a_s) * F_s))
+        power = float(np.sum(power_weights * b_s * (1 - a_s) * F_s))
+        rotor_area = np.pi * rotor.blade_radius ** 2
+        thrust_scale = 0.5 * rotor.density * rotor.optimal_speed ** 2 * rotor_area
+        power_scale = thrust_scale * rotor.optimal_speed
+
+        # Derivatives of the coefficients with respect to the station values (a, b, F).
+        station_gradients = {
+            'Ct': [self.segment_map.T @ (thrust_weights * (1 - 2 * a_s) * F_s) / thrust_scale,
+                   np.zeros(self.no_stations),
+                   self.segment_map.T @ (thrust_weights * a_s * (1 - a_s)) / thrust_scale],
+            'Cp': [self.segment_map.T @ (-power_weights * b_s * F_s) / power_scale,
+                   self.segment_map.T @ (power_weights * (1 - a_s) * F_s) / power_scale,
+                   self.segment_map.T @ (power_weights * b_s * (1 - a_s)) / power_scale]}
+
+        # Jacobian of the residual R = G - x of every station, J[i] = [[dGa/da - 1, dGa/db], [dGb/da, dGb/db - 1]].
+        jacobian = np.empty((self.no_stations, 2, 2))
+        jacobian[:, 0, 0] = partials['a'][0] - 1
+        jacobian[:, 0, 1] = partials['b'][0]
+        jacobian[:, 1, 0] = partials['a'][1]
+        jacobian[:, 1, 1] = partials['b'][1] - 1
+
+        results = {'Cp': power / power_scale, 'Ct': thrust / thrust_scale, 'thrust': thrust, 'power': power, 'a': a, 'b': b}
+        for coefficient, [d_a, d_b, d_F] in station_gradients.items():
+            # Derivative of the coefficient with respect to the state, the losses depend on the state as well.
+            d_state = np.column_stack((d_a + d_F * partials['a'][2], d_b + d_F * partials['b'][2]))
+            # Adjoint of every station, J^T lambda = -dJ/dx.
+            adjoint = np.linalg.solve(np.transpose(jacobian, (0, 2, 1)), -d_state[..., np.newaxis])[..., 0]
+            for variable in DESIGN_VARIABLES:
+                [d_a_image, d_b_image, d_F_variable] = partials[variable]
+                gradient = d_F * d_F_variable + adjoint[:, 0] * d_a_image + adjoint[:, 1] * d_b_image
+                results[f"d{coefficient}_d{variable}"] = float(np.sum(gradient)) if variable == 'tip_speed_ratio' else gradient
+        # The power is proportional to the angular speed, hence to the tip speed ratio.
+        results['dCp_dtip_speed_ratio'] += results['Cp'] / tip_speed_ratio
+        return results
+
+
+def optimize_blade(rotor: StandardRotor, variables: tuple = ('chord', 'twist'), thrust_coefficient: float = None,
+                   chord_bounds: tuple = None, twist_bounds: tuple = (-45.0, 90.0), tip_speed_ratio_bounds: tuple = (1.0, 15.0),
+                   method: str = 'SLSQP', options: dict = None, interpolation_range: int = 70):
+    """
+    Function for optimizing the chord and twist of every station (and optionally the tip speed ratio) of a
+    StandardRotor to maximize its power coefficient, optionally with an upper bound of its thrust coefficient.
+    The objective and the constraint are evaluated together with their gradients (see RotorSensitivities) and
+    passed to scipy.optimize.minimize. Every BEMT solution is warm-started from the previous one. The rotor is
+    left at the optimal design.
+    :param rotor: StandardRotor, rotor to be optimized, its chord, twist and tip speed ratio are the initial design.
+    :param variables: tuple, design variables ('chord', 'twist' and/or 'tip_speed_ratio').
+    :param thrust_coefficient: float, maximum thrust coefficient (unconstrained if None).
+    :param chord_bounds: tuple, bounds of the chord [m] (by default 0.001 and 0.5 times the blade radius).
+    :param twist_bounds: tuple, bounds of the twist [deg].
+    :param tip_speed_ratio_bounds: tuple, bounds of the tip speed ratio.
+    :param method: str, method of scipy.optimize.minimize supporting bounds (and constraints if thrust_coefficient is given).
+    :param options: dict, options of scipy.optimize.minimize.
+    :param interpolation_range: int, number of segments of the integration of the loads.
+    :return: result: scipy.optimize.OptimizeResult, with the optimal 'chord', 'twist', 'tip_speed_ratio', 'Cp' and 'Ct'.
+    """
+    unknown = [variable for variable in variables if variable not in DESIGN_VARIABLES]
+    if unknown:
+        raise ValueError(f"Design variables {unknown} are not available. Please select some of {DESIGN_VARIABLES}.")
+    sensitivities = RotorSensitivities(rotor, interpolation_range=interpolation_range)
+    no_stations = sensitivities.no_stations
+    design = {'chord': np.asarray(rotor.blade_chord[:no_stations], dtype=float),
+              'twist': np.asarray(rotor.blade_twist[:no_stations], dtype=float),
+              'tip_speed_ratio': np.array([float(rotor.tip_speed_ratio)])}
+    chord_bounds = (0.001 * rotor.blade_radius, 0.5 * rotor.blade_radius) if chord_bounds is None else chord_bounds
+    variable_bounds = {'chord': chord_bounds, 'twist': twist_bounds, 'tip_speed_ratio': tip_speed_ratio_bounds}
+    sizes = [len(design[variable]) for variable in variables]
+    # The optimizer works on the design variables normalized by their bounds, x = (value - lower) / (upper - lower).
+    lower = np.concatenate([np.full(size, variable_bounds[variable][0], dtype=float) for variable, size in zip(variables, sizes)])
+    scale = np.concatenate([np.full(size, np.diff(variable_bounds[variable])[0], dtype=float) for variable, size in zip(variables, sizes)])
+    cache = {}
+
+    def evaluate(x):
+        # The objective and the constraint share the evaluation of every design.
+        key = x.tobytes()
+        if key not in cache:
+            values = dict(design)
+            for variable, part in zip(variables, np.split(lower + scale * x, np.cumsum(sizes)[:-1])):
+                values[variable] = part
+            arguments = (values['chord'], values['twist'], float(values['tip_speed_ratio'][0]))
+            results = sensitivities.evaluate(*arguments, *cache.get('previous', (None, None)))
+            if not np.all(np.isfinite(results['a'])) and 'previous' in cache:
+                # The warm start of a distant design can diverge, solve it again from zero induction.
+                results = sensitivities.evaluate(*arguments)
+            previous = cache.get('previous')
+            cache.clear()
+            if np.all(np.isfinite(results['a'])) and np.all(np.isfinite(results['b'])):
+                previous = (results['a'], results['b'])
+            if previous is not None:
+                cache['previous'] = previous
+            cache[key] = (values, results)
+        return cache[key]
+
+    def gradient(results, coefficient):
+        return scale * np.concatenate([np.atleast_1d(results[f"d{coefficient}_d{variable}"]) for variable in variables])
+
+    def objective(x):
+        results = evaluate(x)[1]
+        return -results['Cp'], -gradient(results, 'Cp')
+
+    constraints = []
+    if thrust_coefficient is not None:
+        constraints.append({'type': 'ineq', 'fun': lambda x: thrust_coefficient - evaluate(x)[1]['Ct'],
+                            'jac': lambda x: -gradient(evaluate(x)[1], 'Ct')})
+    x0 = (np.concatenate([design[variable] for variable in variables]) - lower) / scale
+    result = minimize(objective, x0, jac=True, bounds=[(0.0, 1.0)] * len(x0), constraints=constraints, method=method, options=options)
+
+    # Leave the rotor at the optimal design, the last solution of the rotor may be another design.
+    cache.pop(result.x.tobytes(), None)
+    [values, results] = evaluate(result.x)
+    result.chord = values['chord']
+    result.twist = values['twist']
+    result.tip_speed_ratio = float(values['tip_speed_ratio'][0])
+    result.Cp = results['Cp']
+    result.Ct = results['Ct']
+    return result
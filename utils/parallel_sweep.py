@@ -0,0 +1,96 @@
+import copy
+import itertools
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from utils.results_writer import ResultsWriter
+
+# Rotor of the worker process, it is sent once through the initializer of the pool.
+_worker_rotor = None
+
+
+def operating_grid(tip_speed_ratios, inflow_speeds, pitches=(0.0,)):
+    """
+    Function for creating the full-factorial grid of operating points.
+    :param tip_speed_ratios: list or ndarray, tip speed ratios.
+    :param inflow_speeds: list or ndarray, inflow speeds [m/s].
+    :param pitches: list or ndarray, blade pitch angles [deg].
+    :return: operating_points: pd.DataFrame, columns tip_speed_ratio, inflow_speed and pitch.
+    """
+    grid = itertools.product(np.atleast_1d(tip_speed_ratios), np.atleast_1d(inflow_speeds), np.atleast_1d(pitches))
+    return pd.DataFrame(list(grid), columns=['tip_speed_ratio', 'inflow_speed', 'pitch'], dtype=float)
+
+
+def _initialize_worker(rotor):
+    """
+    Function for initializing a worker process with its own copy of the rotor (geometry and polars).
+    :param rotor: StandardRotor, rotor to be evaluated.
+    """
+    global _worker_rotor
+    _worker_rotor = rotor
+    return None
+
+
+def _evaluate_chunk(operating_points: np.ndarray, interpolation_range: int, rotor=None):
+    """
+    Function for evaluating a chunk of operating points with the rotor of the worker process.
+    :param operating_points: ndarray, operating points (tip speed ratio, inflow speed, pitch) of the chunk.
+    :param interpolation_range: int, number of points to interpolate the performance data.
+    :param rotor: StandardRotor, rotor to be evaluated (the one of the worker process if None).
+    :return: records: list, performance of every operating point of the chunk.
+    """
+    rotor = _worker_rotor if rotor is None else rotor
+    return [rotor.evaluate_operating_point(tsr, inflow_speed, pitch, interpolation_range=interpolation_range)
+            for tsr, inflow_speed, pitch in operating_points]
+
+
+def evaluate_operating_points(rotor, operating_points, max_workers: int = None, chunk_size: int = 64,
+                              interpolation_range: int = 70, writer: ResultsWriter = None):
+    """
+    Function for evaluating independent operating points of a StandardRotor in parallel with a process pool.
+    The rotor (geometry and polar interpolators) is sent to every worker once through the initializer of
+    the pool, so only the operating points are pickled per task. The operating points are split in chunks
+    and the results are returned (or streamed to the writer as the chunks finish) in the same order as the
+    operating points.
+    :param rotor: StandardRotor, rotor to be evaluated.
+    :param operating_points: pd.DataFrame or ndarray, operating points with columns tip_speed_ratio,
+    inflow_speed and (optionally) pitch.
+    :param max_workers: int, number of worker processes (by default the number of processors). With
+    max_workers=1 the operating points are evaluated in the current process.
+    :param chunk_size: int, number of operating points sent to a worker per task.
+    :param interpolation_range: int, number of points to interpolate the performance data.
+    :param writer: ResultsWriter, sink of the performance of the operating points (returned as a pd.DataFrame if None).
+    :return: performance: pd.DataFrame, thrust, power, torque, Cp, Ct and Cq of every operating point (None with a writer).
+    """
+    if isinstance(operating_points, pd.DataFrame):
+        if 'pitch' not in operating_points:
+            operating_points = operating_points.assign(pitch=0.0)
+        operating_points = operating_points[['tip_speed_ratio', 'inflow_speed', 'pitch']].to_numpy(dtype=float)
+    operating_points = np.atleast_2d(np.asarray(operating_points, dtype=float))
+    if operating_points.shape[1] == 2:
+        operating_points = np.column_stack((operating_points, np.zeros(len(operating_points))))
+
+    # Build the polar interpolators and the geometry before the rotor is sent to the workers.
+    rotor = copy.copy(rotor)
+    rotor.get_stacked_polars()
+    rotor.get_geometry()
+    chunks = [operating_points[i:i + chunk_size] for i in range(0, len(operating_points), chunk_size)]
+    if max_workers == 1:
+        # The rotor is passed directly, so it is not kept by the module after the sweep.
+        return collect_chunks((_evaluate_chunk(chunk, interpolation_range, rotor) for chunk in chunks), writer)
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=_initialize_worker, initargs=(rotor,)) as executor:
+        return collect_chunks(executor.map(_evaluate_chunk, chunks, itertools.repeat(interpolation_range)), writer)
+
+
+def collect_chunks(results, writer: ResultsWriter = None):
+    """
+    Function for collecting the results of the chunks of operating points as they finish.
+    :param results: iterable, results (list of records) of every chunk in order.
+    :param writer: ResultsWriter, sink of the records (collected in a pd.DataFrame if None).
+    :return: performance: pd.DataFrame (None with a writer).
+    """
+    if writer is None:
+        return pd.DataFrame([record for chunk in results for record in chunk])
+    for chunk in results:
+        writer.write_rows(chunk)
+    return None
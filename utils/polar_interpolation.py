@@ -0,0 +1,358 @@
+import hashlib
+import numpy as np
+from collections import OrderedDict
+from scipy.interpolate import CubicSpline, PchipInterpolator, PPoly
+
+# Available interpolation modes for the polar coefficients.
+INTERPOLATION_MODES = ('linear', 'pchip', 'cubic', 'table')
+
+# Default step of the uniform alpha grid of the polar tables [deg].
+TABLE_STEP = 0.1
+
+# Maximum number of cached interpolators (the least recently used one is dropped first).
+INTERPOLATOR_CACHE_SIZE = 256
+
+# Interpolators built so far, keyed by (hydrofoil name, interpolation mode, content hash).
+_interpolator_cache = OrderedDict()
+
+
+def polar_content_hash(hydrofoil_data: dict):
+    """
+    Function for computing the content hash of the polar data of a hydrofoil.
+    :param hydrofoil_data: dict, dictionary containing the hydrofoil data ('alpha', 'cl', 'cd' and optionally 'cm').
+    :return: digest: str, SHA-1 hex digest of the alpha, cl, cd and cm arrays.
+    """
+    digest = hashlib.sha1()
+    for key in ('alpha', 'cl', 'cd', 'cm'):
+        if key in hydrofoil_data:
+            values = np.ascontiguousarray(hydrofoil_data[key], dtype=np.float64)
+            digest.update(f"{key}{values.shape}".encode())
+            digest.update(values.tobytes())
+    return digest.hexdigest()
+
+
+def check_interpolation_mode(mode: str):
+    """
+    Function for checking that the selected interpolation mode is available.
+    :param mode: str, name of the interpolation mode.
+    :return: mode: str, name of the interpolation mode.
+    """
+    if mode not in INTERPOLATION_MODES:
+        raise ValueError(f"Interpolation mode {mode} is not available. Please select one of {INTERPOLATION_MODES}.")
+    return mode
+
+
+class PolarTable:
+    """
+    Class for a compact lookup table of a polar. The lift, drag and moment coefficients are resampled
+    onto a uniform alpha grid and stored, together with their forward increments, in a single
+    contiguous (2, 3, n) float array. A lookup is then O(1) index arithmetic instead of a binary
+    search. Angles of attack outside the table are clamped to the end values.
+    """
+    __slots__ = ('Re', 'alpha_min', 'alpha_step', 'no_points', 'data')
+
+    def __init__(self, alpha, cl, cd, cm=None, Re=None, step: float = TABLE_STEP):
+        """
+        Constructor of the PolarTable class.
+        :param alpha: ndarray, angles of attack of the polar [deg] (increasing).
+        :param cl: ndarray, lift coefficients of the polar.
+        :param cd: ndarray, drag coefficients of the polar.
+        :param cm: ndarray, moment coefficients of the polar (zeros if not provided).
+        :param Re: float, Reynolds number of the polar.
+        :param step: float, step of the uniform alpha grid [deg].
+        """
+        alpha = np.asarray(alpha, dtype=float)
+        cm = np.zeros(len(alpha)) if cm is None else cm
+        self.Re = Re
+        self.no_points = int(np.ceil((alpha[-1] - alpha[0]) / step - 1e-9)) + 1
+        self.alpha_min = alpha[0]
+        self.alpha_step = (alpha[-1] - alpha[0]) / (self.no_points - 1)
+        alpha_uniform = self.alpha_min + self.alpha_step * np.arange(self.no_points)
+        # data[0] holds the coefficients (cl, cd, cm) and data[1] their increments to the next grid point.
+        self.data = np.zeros((2, 3, self.no_points))
+        for j, coefficient in enumerate((cl, cd, cm)):
+            self.data[0, j] = np.interp(alpha_uniform, alpha, np.asarray(coefficient, dtype=float))
+        self.data[1, :, :-1] = np.diff(self.data[0], axis=1)
+
+    @classmethod
+    def from_polar(cls, polar, step: float = TABLE_STEP):
+        """
+        Function to build the table of an airfoilprep Polar object.
+        :param polar: Polar, polar to be resampled.
+        :param step: float, step of the uniform alpha grid [deg].
+        :return: table: PolarTable.
+        """
+        return cls(polar.alpha, polar.cl, polar.cd, polar.cm, polar.Re, step)
+
+    @property
+    def alpha(self):
+        """
+        Uniform alpha grid of the table [deg].
+        """
+        return self.alpha_min + self.alpha_step * np.arange(self.no_points)
+
+    def lookup(self, alpha, coefficients: tuple = (0, 1, 2)):
+        """
+        Function to evaluate the coefficients of the table at the given angles of attack.
+        :param alpha: float or ndarray, angles of attack [deg].
+        :param coefficients: tuple, coefficients to be evaluated (0: cl, 1: cd, 2: cm).
+        :return: values: list, evaluated coefficients with the shape of alpha (NaN where alpha is NaN, as np.interp).
+        """
+        position = np.clip((np.asarray(alpha, dtype=float) - self.alpha_min) * (1.0 / self.alpha_step), 0, self.no_points - 1)
+        # A NaN angle (e.g. of a diverging iteration) reads the first row with a NaN weight, hence its values are NaN.
+        index = np.nan_to_num(position).astype(np.intp)
+        weight = position - index
+        return [self.data[0, j].take(index) + self.data[1, j].take(index) * weight for j in coefficients]
+
+    def __call__(self, alpha):
+        """
+        Function to evaluate the lift and drag coefficients at the given angles of attack.
+        :param alpha: float or ndarray, angles of attack [deg].
+        :return: cl, cd.
+        """
+        [cl, cd] = self.lookup(alpha, (0, 1))
+        return cl, cd
+
+
+class PolarInterpolator:
+    """
+    Class for interpolating the lift and drag coefficients of a single polar. The interpolator is
+    built once and only evaluated afterwards. Angles of attack outside the polar are clamped to
+    the end values, as np.interp does.
+    """
+
+    def __init__(self, alpha, cl, cd, mode: str = 'linear', cm=None):
+        """
+        Constructor of the PolarInterpolator class.
+        :param alpha: ndarray, angles of attack of the polar [deg] (strictly increasing).
+        :param cl: ndarray, lift coefficients of the polar.
+        :param cd: ndarray, drag coefficients of the polar.
+        :param mode: str, interpolation mode ('linear', 'pchip', 'cubic' or 'table').
+        :param cm: ndarray, moment coefficients of the polar (stored only by the table mode).
+        """
+        self.mode = check_interpolation_mode(mode)
+        self.alpha = np.asarray(alpha, dtype=float)
+        self.cl = np.asarray(cl, dtype=float)
+        self.cd = np.asarray(cd, dtype=float)
+        self.alpha_low = self.alpha[0]
+        self.alpha_high = self.alpha[-1]
+        # Piecewise polynomial of [cl, cd] (None for the linear and table modes).
+        coefficients = np.column_stack((self.cl, self.cd))
+        self.table = PolarTable(self.alpha, self.cl, self.cd, cm) if self.mode == 'table' else None
+        if self.mode == 'pchip':
+            self.ppoly = PchipInterpolator(self.alpha, coefficients, axis=0)
+        elif self.mode == 'cubic':
+            self.ppoly = CubicSpline(self.alpha, coefficients, axis=0)
+        else:
+            self.ppoly = None
+
+    def __call__(self, alpha):
+        """
+        Function to evaluate the lift and drag coefficients at the given angles of attack.
+        :param alpha: float or ndarray, angles of attack [deg].
+        :return: cl, cd.
+        """
+        if self.table is not None:
+            return self.table(alpha)
+        if self.ppoly is None:
+            return np.interp(alpha, self.alpha, self.cl), np.interp(alpha, self.alpha, self.cd)
+        values = self.ppoly(np.clip(alpha, self.alpha_low, self.alpha_high))
+        return values[..., 0], values[..., 1]
+
+
+def get_polar_interpolator(name: str, hydrofoil_data: dict, mode: str = 'linear'):
+    """
+    Function for getting the interpolator of a hydrofoil polar. The interpolator is built only the
+    first time and cached by hydrofoil name, interpolation mode and content hash of the polar, hence
+    an updated polar with the same name builds a new interpolator. At most INTERPOLATOR_CACHE_SIZE
+    interpolators are kept, the least recently used ones are dropped.
+    :param name: str, name of the hydrofoil.
+    :param hydrofoil_data: dict, dictionary containing the hydrofoil data ('alpha', 'cl', 'cd' and optionally 'cm').
+    :param mode: str, interpolation mode ('linear', 'pchip', 'cubic' or 'table').
+    :return: interpolator: PolarInterpolator.
+    """
+    key = (name, check_interpolation_mode(mode), polar_content_hash(hydrofoil_data))
+    interpolator = _interpolator_cache.get(key)
+    if interpolator is not None:
+        _interpolator_cache.move_to_end(key)
+        return interpolator
+    interpolator = PolarInterpolator(hydrofoil_data['alpha'], hydrofoil_data['cl'], hydrofoil_data['cd'], mode, hydrofoil_data.get('cm'))
+    _interpolator_cache[key] = interpolator
+    if len(_interpolator_cache) > INTERPOLATOR_CACHE_SIZE:
+        _interpolator_cache.popitem(last=False)
+    return interpolator
+
+
+def clear_polar_interpolators():
+    """
+    Function for clearing the cache of polar interpolators.
+    """
+    _interpolator_cache.clear()
+    return None
+
+
+class StackedPolarInterpolator:
+    """
+    Class for interpolating the polars of several radial stations with a single vectorized call.
+    Each polar is shifted by a constant offset in alpha, so the stacked table is monotonic and the
+    value of the i-th polar at an angle of attack alpha is found at alpha + offsets[i]. The piecewise
+    polynomials of the pchip and cubic modes are concatenated with constant pieces in the gaps, and
+    the uniform tables of the table mode are concatenated into a single flat array, so the stacked
+    evaluation is identical to the evaluation of every PolarInterpolator.
+    """
+
+    def __init__(self, interpolators: list):
+        """
+        Constructor of the StackedPolarInterpolator class.
+        :param interpolators: list, PolarInterpolator objects of the radial stations (same mode).
+        """
+        self.mode = interpolators[0].mode
+        self.offsets = 1000.0 * np.arange(len(interpolators))
+        self.alphas_low = np.array([interpolator.alpha_low for interpolator in interpolators])
+        self.alphas_high = np.array([interpolator.alpha_high for interpolator in interpolators])
+        if self.mode == 'table':
+            # Flat table of all the stations, the rows of the i-th station start at base[i].
+            tables = [interpolator.table for interpolator in interpolators]
+            self.table_min = np.array([table.alpha_min for table in tables])
+            self.table_step = np.array([table.alpha_step for table in tables])
+            self.table_points = np.array([table.no_points for table in tables])
+            self.table_base = np.concatenate(([0], np.cumsum(self.table_points)[:-1]))
+            self.table_data = np.ascontiguousarray(np.concatenate([table.data[:, :2] for table in tables], axis=2))
+            self.ppoly = None
+        elif self.mode == 'linear':
+            self.alphas = np.concatenate([interpolator.alpha + self.offsets[i] for i, interpolator in enumerate(interpolators)])
+            self.cl = np.concatenate([interpolator.cl for interpolator in interpolators])
+            self.cd = np.concatenate([interpolator.cd for interpolator in interpolators])
+            self.ppoly = None
+        else:
+            breakpoints = []
+            coefficients = []
+            for i, interpolator in enumerate(interpolators):
+                breakpoints.append(interpolator.ppoly.x + self.offsets[i])
+                coefficients.append(interpolator.ppoly.c)
+                if i < len(interpolators) - 1:
+                    # Constant piece in the gap, equal to the last value of the polar.
+                    gap = np.zeros((interpolator.ppoly.c.shape[0], 1, 2))
+                    gap[-1, 0, :] = [interpolator.cl[-1], interpolator.cd[-1]]
+                    coefficients.append(gap)
+            self.ppoly = PPoly(np.concatenate(coefficients, axis=1), np.concatenate(breakpoints), extrapolate=True)
+        # Derivative of the piecewise polynomial, built on the first evaluation of the slopes.
+        self.ppoly_derivative = None
+
+    def __call__(self, alpha, index):
+        """
+        Function to evaluate the lift and drag coefficients of several radial stations.
+        :param alpha: ndarray, angles of attack [deg], the last axis runs over the stations in index.
+        :param index: list or ndarray, indices of the radial stations.
+        :return: cl, cd.
+        """
+        if self.mode == 'table':
+            position = np.clip((alpha - self.table_min[index]) / self.table_step[index], 0, self.table_points[index] - 1)
+            # A NaN angle reads the first row of its station with a NaN weight, hence its values are NaN (see PolarTable).
+            row = np.nan_to_num(position).astype(np.intp)
+            weight = position - row
+            row = row + self.table_base[index]
+            cl = self.table_data[0, 0].take(row) + self.table_data[1, 0].take(row) * weight
+            cd = self.table_data[0, 1].take(row) + self.table_data[1, 1].take(row) * weight
+            return cl, cd
+        alpha_stacked = np.clip(alpha, self.alphas_low[index], self.alphas_high[index]) + self.offsets[index]
+        if self.ppoly is None:
+            return np.interp(alpha_stacked, self.alphas, self.cl), np.interp(alpha_stacked, self.alphas, self.cd)
+        values = self.ppoly(alpha_stacked)
+        return values[..., 0], values[..., 1]
+
+    def derivative(self, alpha, index):
+        """
+        Function to evaluate the slopes of the lift and drag coefficients of several radial stations, i.e. the
+        derivatives of the interpolants with respect to the angle of attack (zero where alpha is clamped).
+        :param alpha: ndarray, angles of attack [deg], the last axis runs over the stations in index.
+        :param index: list or ndarray, indices of the radial stations.
+        :return: dcl, dcd: ndarray, slopes of the lift and drag coefficients [1/deg].
+        """
+        inside = (alpha > self.alphas_low[index]) & (alpha < self.alphas_high[index])
+        if self.mode == 'table':
+            position = np.clip((alpha - self.table_min[index]) / self.table_step[index], 0, self.table_points[index] - 1)
+            row = np.nan_to_num(position).astype(np.intp) + self.table_base[index]
+            dcl = self.table_data[1, 0].take(row) / self.table_step[index]
+            dcd = self.table_data[1, 1].take(row) / self.table_step[index]
+            return np.where(inside, dcl, 0.0), np.where(inside, dcd, 0.0)
+        alpha_stacked = np.clip(alpha, self.alphas_low[index], self.alphas_high[index]) + self.offsets[index]
+        if self.ppoly is None:
+            segment = np.clip(np.searchsorted(self.alphas, alpha_stacked, side='right') - 1, 0, len(self.alphas) - 2)
+            step = self.alphas[segment + 1] - self.alphas[segment]
+            dcl = (self.cl[segment + 1] - self.cl[segment]) / step
+            dcd = (self.cd[segment + 1] - self.cd[segment]) / step
+            return np.where(inside, dcl, 0.0), np.where(inside, dcd, 0.0)
+        if self.ppoly_derivative is None:
+            self.ppoly_derivative = self.ppoly.derivative()
+        values = self.ppoly_derivative(alpha_stacked)
+        return np.where(inside, values[..., 0], 0.0), np.where(inside, values[..., 1], 0.0)
+
+
+class StackedReynoldsInterpolator:
+    """
+    Class for interpolating the polars of several radial stations at their local Reynolds numbers with a
+    single vectorized call. The (alpha, Re) grid of every station is built once with Hydrofoil.createDataGrid
+    and the coefficients are interpolated bilinearly, linearly in alpha (as the linear mode) and linearly in
+    Re (as Hydrofoil.getPolar blends the polars). The alpha axes are stacked with constant offsets, as in
+    StackedPolarInterpolator, and the Re axes are padded to the same number of columns by repeating the last
+    polar. Angles of attack and Reynolds numbers outside the grid are clamped to the end values, hence a
+    station with a single polar reproduces the linear mode exactly.
+    """
+
+    def __init__(self, hydrofoils: list):
+        """
+        Constructor of the StackedReynoldsInterpolator class.
+        :param hydrofoils: list, Hydrofoil objects (airfoilprep) of the radial stations.
+        """
+        grids = [hydrofoil.createDataGrid() for hydrofoil in hydrofoils]
+        no_stations = len(grids)
+        self.no_reynolds = np.array([len(grid[1]) for grid in grids])
+        self.no_columns = max(2, int(self.no_reynolds.max()))
+        self.offsets = 1000.0 * np.arange(no_stations)
+        self.alphas_low = np.array([grid[0][0] for grid in grids])
+        self.alphas_high = np.array([grid[0][-1] for grid in grids])
+        self.alphas = np.concatenate([np.asarray(grid[0], dtype=float) + self.offsets[i] for i, grid in enumerate(grids)])
+        # Reynolds numbers of every station, the padding columns have increasing dummy values and zero weight.
+        self.reynolds = np.zeros((no_stations, self.no_columns))
+        # Coefficients of every column of the stacked grid, shape (columns, stacked alpha).
+        self.cl = np.zeros((self.no_columns, len(self.alphas)))
+        self.cd = np.zeros((self.no_columns, len(self.alphas)))
+        start = 0
+        for i, (alpha, reynolds, cl, cd, _) in enumerate(grids):
+            stop = start + len(alpha)
+            no_reynolds = len(reynolds)
+            columns = np.minimum(np.arange(self.no_columns), no_reynolds - 1)
+            self.reynolds[i, :no_reynolds] = reynolds
+            self.reynolds[i, no_reynolds:] = reynolds[-1] + np.arange(1, self.no_columns - no_reynolds + 1)
+            self.cl[:, start:stop] = np.asarray(cl, dtype=float)[:, columns].T
+            self.cd[:, start:stop] = np.asarray(cd, dtype=float)[:, columns].T
+            start = stop
+        self.reynolds_low = self.reynolds[:, 0]
+        self.reynolds_high = self.reynolds[np.arange(no_stations), self.no_reynolds - 1]
+
+    def __call__(self, alpha, index, reynolds):
+        """
+        Function to evaluate the lift and drag coefficients of several radial stations.
+        :param alpha: ndarray, angles of attack [deg], the last axis runs over the stations in index.
+        :param index: list or ndarray, indices of the radial stations.
+        :param reynolds: ndarray, local Reynolds numbers, broadcastable to alpha.
+        :return: cl, cd.
+        """
+        index = np.asarray(index)
+        alpha_stacked = np.clip(alpha, self.alphas_low[index], self.alphas_high[index]) + self.offsets[index]
+        reynolds = np.broadcast_to(np.clip(reynolds, self.reynolds_low[index], self.reynolds_high[index]), alpha_stacked.shape)
+
+        # Interval of the Reynolds number in the grid of every station and weight of its upper column.
+        upper = np.clip(np.sum(self.reynolds[index] < reynolds[..., np.newaxis], axis=-1), 1, self.no_columns - 1)
+        row = index * self.no_columns + upper
+        reynolds_lower = self.reynolds.ravel().take(row - 1)
+        weight = (reynolds - reynolds_lower) / (self.reynolds.ravel().take(row) - reynolds_lower)
+
+        # Interpolate every column in alpha, then blend the two columns of the interval.
+        cl = np.stack([np.interp(alpha_stacked, self.alphas, column) for column in self.cl])
+        cd = np.stack([np.interp(alpha_stacked, self.alphas, column) for column in self.cd])
+        lower = (upper - 1)[np.newaxis]
+        [cl_lower, cl_upper] = [np.take_along_axis(cl, lower, 0)[0], np.take_along_axis(cl, lower + 1, 0)[0]]
+        [cd_lower, cd_upper] = [np.take_along_axis(cd, lower, 0)[0], np.take_along_axis(cd, lower + 1, 0)[0]]
+        return cl_lower + weight * (cl_upper - cl_lower), cd_lower + weight * (cd_upper - cd_lower)
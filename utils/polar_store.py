@@ -0,0 +1,194 @@
+import os
+import json
+import hashlib
+import numpy as np
+import yaml
+from airfoilprep.aerodyn import iter_aerodyn_tables
+from utils.preprocessing import YAML_LOADER, HYDROFOIL_SCHEMA, validate_data
+
+# Version of the layout of the polar store, a store with another version is rebuilt.
+STORE_VERSION = 1
+# Extensions of the polar files handled by the store.
+POLAR_EXTENSIONS = ('.yml', '.dat')
+# Array keys of the hydrofoil (.yml) files (see HYDROFOIL_SCHEMA), the scalar ones are kept in the index of the store.
+ARRAY_KEYS = ('alpha', 'cl', 'cd', 'cm', 'efficiency')
+
+
+def file_content_hash(path: str):
+    """
+    Function for computing the content hash of a file.
+    :param path: str, path to the file.
+    :return: digest: str, SHA-1 hex digest of the file.
+    """
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        digest.update(f.read())
+    return digest.hexdigest()
+
+
+def read_hydrofoil_file(path: str):
+    """
+    Function for reading a hydrofoil (.yml) file into the tables of the polar store. The file is validated
+    against HYDROFOIL_SCHEMA, as in load_hydrofoils.
+    :param path: str, path to the hydrofoil file.
+    :return: tables: list, a single dict with the alpha, cl, cd, cm and efficiency arrays and the scalar data.
+    """
+    with open(path, 'r') as f:
+        data = yaml.load(f, Loader=YAML_LOADER)
+    [data, errors] = validate_data(data, HYDROFOIL_SCHEMA, os.path.basename(path))
+    if errors:
+        raise ValueError(' '.join(errors))
+    return [{key: data[key] for key in HYDROFOIL_SCHEMA}]
+
+
+def read_aerodyn_file(path: str):
+    """
+    Function for reading the tables of an AeroDyn airfoil (.dat) file written by Hydrofoil.writeToAerodynFile.
+    The numeric block of every table is parsed at once (see airfoilprep.aerodyn.iter_aerodyn_tables).
+    :param path: str, path to the AeroDyn file.
+    :return: tables: list, one dict per table with the alpha, cl, cd and cm arrays and the Reynolds number.
+    """
+    return [{'alpha': table['alpha'], 'cl': table['cl'], 'cd': table['cd'], 'cm': table['cm'], 'reynolds': table['Re']}
+            for table in iter_aerodyn_tables(path)]
+
+
+class PolarStore:
+    """
+    Class for a compiled store of the polars of a folder of hydrofoil (.yml) or AeroDyn (.dat) files.
+    All the polars are kept in a single uncompressed .npz file: the arrays of every table are concatenated
+    and an index (JSON) records, for every source file, its path, modification time, size, content hash,
+    scalar data and the slices of its tables. Loading the store is a single read, and refreshing it parses
+    again only the files that were added or changed.
+    """
+
+    def __init__(self, store_path: str):
+        """
+        Constructor of the PolarStore class.
+        :param store_path: str, path to the .npz file of the store.
+        """
+        self.store_path = store_path
+        self.index = {}
+        self.tables = {}
+        self.changed = False
+
+    def load(self):
+        """
+        Function to load the store from disk (an empty store if the file does not exist or is outdated).
+        :return: store: PolarStore.
+        """
+        self.index = {}
+        self.tables = {}
+        if not os.path.exists(self.store_path):
+            return self
+        with np.load(self.store_path, allow_pickle=False) as data:
+            index = json.loads(str(data['index']))
+            if index.get('version') != STORE_VERSION:
+                return self
+            arrays = {key: data[key] for key in ARRAY_KEYS}
+        for path, entry in index['files'].items():
+            tables = []
+            for table in entry['tables']:
+                [start, stop] = table['slice']
+                values = {key: arrays[key][start:stop] for key in ARRAY_KEYS if key in table['arrays']}
+                values.update(table['scalars'])
+                tables.append(values)
+            self.index[path] = entry
+            self.tables[path] = tables
+        return self
+
+    def save(self):
+        """
+        Function to save the store to disk. The file is written next to the store and then renamed, so an
+        interrupted run never leaves a corrupted store.
+        """
+        arrays = {key: [] for key in ARRAY_KEYS}
+        files = {}
+        start = 0
+        for path, tables in self.tables.items():
+            entry = {key: value for key, value in self.index[path].items() if key != 'tables'}
+            entry['tables'] = []
+            for table in tables:
+                stop = start + len(table['alpha'])
+                for key in ARRAY_KEYS:
+                    arrays[key].append(np.asarray(table[key], dtype=float) if key in table else np.zeros(stop - start))
+                entry['tables'].append({'slice': [start, stop], 'arrays': [key for key in ARRAY_KEYS if key in table],
+                                        'scalars': {key: value for key, value in table.items() if key not in ARRAY_KEYS}})
+                start = stop
+            files[path] = entry
+        arrays = {key: np.concatenate(values) if values else np.zeros(0) for key, values in arrays.items()}
+        index = np.array(json.dumps({'version': STORE_VERSION, 'files': files}))
+        temporary_path = f"{self.store_path}.tmp.npz"
+        np.savez(temporary_path, index=index, **arrays)
+        os.replace(temporary_path, self.store_path)
+        self.changed = False
+        return None
+
+    def refresh(self, path: str):
+        """
+        Function to synchronize the store with a folder of polar files. Files whose modification time and size
+        are unchanged are trusted, files whose content hash is unchanged are kept, and only new or modified
+        files are parsed. The entries of deleted files are removed.
+        :param path: str, path to the folder containing the polar files.
+        :return: errors: list, files that could not be parsed and the reason.
+        """
+        errors = []
+        files = [os.path.join(path, file) for file in os.listdir(path) if file.endswith(POLAR_EXTENSIONS)]
+        for file in set(self.index) - set(files):
+            del self.index[file]
+            del self.tables[file]
+            self.changed = True
+        for file in files:
+            status = os.stat(file)
+            entry = self.index.get(file)
+            if entry is not None and entry['mtime'] == status.st_mtime_ns and entry['size'] == status.st_size:
+                continue
+            content_hash = file_content_hash(file)
+            if entry is not None and entry['hash'] == content_hash:
+                entry.update({'mtime': status.st_mtime_ns, 'size': status.st_size})
+                self.changed = True
+                continue
+            try:
+                tables = read_hydrofoil_file(file) if file.endswith('.yml') else read_aerodyn_file(file)
+            except (OSError, ValueError, IndexError, yaml.YAMLError) as error:
+                errors.append((file, str(error)))
+                self.index.pop(file, None)
+                self.tables.pop(file, None)
+                continue
+            self.index[file] = {'mtime': status.st_mtime_ns, 'size': status.st_size, 'hash': content_hash}
+            self.tables[file] = tables
+            self.changed = True
+        # Keep the order of the folder listing, as the rearrange functions of the preprocessing module do.
+        order = {file: i for i, file in enumerate(files)}
+        self.tables = dict(sorted(self.tables.items(), key=lambda item: order[item[0]]))
+        return errors
+
+
+def load_polar_store(path: str, store_path: str = None):
+    """
+    Function for loading every polar of a folder of hydrofoil (.yml) or AeroDyn (.dat) files through the
+    compiled polar store. The store is refreshed (only changed files are parsed again) and saved if needed.
+    The hydrofoil files are returned as hydrofoils_data_rearrange does, and the AeroDyn files (keyed by the
+    file name) as hydrofoils_ext_data_rearrange does, i.e. with the first table of every file.
+    :param path: str, path to the folder containing the polar files.
+    :param store_path: str, path to the .npz file of the store (by default next to the folder, {path}_store.npz).
+    :return: hydrofoils: dict, dictionary containing the hydrofoil data.
+    """
+    if not os.path.exists(path):
+        print(f"Folder {path} does not exist. Please check the path. (x)")
+        return None
+    store_path = f"{os.path.normpath(path)}_store.npz" if store_path is None else store_path
+    store = PolarStore(store_path).load()
+    errors = store.refresh(path)
+    for file, error in errors:
+        print(f"File {file} could not be loaded: {error} (x)")
+    if store.changed:
+        store.save()
+    hydrofoils = {}
+    for file, tables in store.tables.items():
+        table = dict(tables[0])
+        if file.endswith('.yml'):
+            hydrofoils[table['hydrofoil']] = table
+        else:
+            hydrofoils[os.path.splitext(os.path.basename(file))[0]] = table
+    print(f"Polar store {store_path} loaded with {len(hydrofoils)} polars. (\u2713)")
+    return hydrofoils
@@ -1,5 +1,19 @@
 import os
 import yaml
+import numpy as np
+
+# Use the C implementation of the YAML loader when it is available.
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Schemas of the data files, i.e. the type of every required key ('array', 'names', 'float', 'int' or 'str').
+HYDROFOIL_SCHEMA = {'alpha': 'array', 'cl': 'array', 'cd': 'array', 'cm': 'array', 'efficiency': 'array',
+                    'hydrofoil': 'str', 'reynolds': 'float', 'source': 'str'}
+FLUID_PROPERTIES_SCHEMA = {'density': 'float', 'kinematic_viscosity': 'float', 'dynamic_viscosity': 'float',
+                           'salinity': 'float', 'temperature': 'float'}
+OPERATIVE_STATE_SCHEMA = {'optimal_speed': 'float', 'tip_speed_ratio': 'float', 'angular_speed': 'float', 'rpm': 'float',
+                          'blade_radius': 'float', 'no_blades': 'int', 'radius_hub_pctg': 'float', 'initial_point_pctg': 'float',
+                          'final_point_pctg': 'float', 'no_design_points': 'int', 'operative_reynolds': 'float'}
+BLADE_DEFINITION_SCHEMA = {'positions': 'array', 'hydrofoils': 'names'}
 
 
 def hydrofoils_data_check(path: str):
@@ -127,3 +141,161 @@ def hydrofoils_ext_data_rearrange(hydrofoils_ext: dict):
         reynolds = hydrofoils_ext[hydrofoils_names[i]].polars[0].Re
         hydrofoils_extended[hydrofoils_names[i]] = {'alpha': alpha, 'cl': cl, 'cd': cd, 'cm': cm, 'reynolds': reynolds}
     return hydrofoils_extended
+
+
+def validate_data(data, schema: dict, name: str):
+    """
+    Function for validating (and typing) the data of a file against its schema. Every problem is collected
+    instead of stopping at the first one.
+    :param data: dict, data of the file as parsed from YAML.
+    :param schema: dict, type of every required key ('array', 'names', 'float', 'int' or 'str').
+    :param name: str, name of the file used in the error messages.
+    :return: typed_data, errors: dict with the arrays as float ndarrays and the scalars as Python types, list of errors.
+    """
+    if not isinstance(data, dict):
+        return None, [f"{name}: the file is not a mapping of keys to values."]
+    errors = []
+    typed_data = dict(data)
+    for key, kind in schema.items():
+        if key not in data:
+            errors.append(f"{name}: missing key '{key}'.")
+            continue
+        value = data[key]
+        try:
+            if kind == 'array':
+                typed_data[key] = np.asarray(value, dtype=float)
+                if typed_data[key].ndim != 1 or len(typed_data[key]) == 0:
+                    errors.append(f"{name}: key '{key}' must be a non-empty list of numbers.")
+            elif kind == 'names':
+                if not isinstance(value, list) or len(value) == 0:
+                    raise TypeError
+                typed_data[key] = [str(name) for name in value]
+            elif kind == 'float':
+                if isinstance(value, bool):
+                    raise TypeError
+                typed_data[key] = float(value)
+            elif kind == 'int':
+                if isinstance(value, bool) or float(value) != int(value):
+                    raise TypeError
+                typed_data[key] = int(value)
+            else:
+                typed_data[key] = str(value)
+        except (TypeError, ValueError):
+            errors.append(f"{name}: key '{key}' must be of type {kind}, found {value!r}.")
+    arrays = [key for key, kind in schema.items() if kind == 'array' and key in typed_data and isinstance(typed_data[key], np.ndarray)]
+    if arrays:
+        lengths = {key: len(typed_data[key]) for key in arrays if typed_data[key].ndim == 1}
+        lengths.update({key: len(typed_data[key]) for key, kind in schema.items() if kind == 'names' and isinstance(typed_data.get(key), list)})
+        if len(set(lengths.values())) > 1:
+            errors.append(f"{name}: the arrays have different lengths {lengths}.")
+        elif 'alpha' in lengths and np.any(np.diff(typed_data['alpha']) <= 0):
+            errors.append(f"{name}: key 'alpha' must be strictly increasing.")
+    return typed_data, errors
+
+
+def report_errors(errors: list, description: str):
+    """
+    Function for reporting all the errors found while loading the data at once.
+    :param errors: list, errors found.
+    :param description: str, description of the loaded data.
+    """
+    print(f"{len(errors)} problems found while loading {description}. Please check the files. (x)")
+    for error in errors:
+        print(f"  - {error}")
+    return None
+
+
+def load_hydrofoils(path: str):
+    """
+    Function for loading and validating the hydrofoil data files in a single pass. Every file is parsed
+    once, validated against HYDROFOIL_SCHEMA and returned with its polar as float arrays, in the same
+    dictionary data structure (and order) as hydrofoils_data_rearrange. All the problems of the folder
+    are reported together.
+    :param path: str, path to the folder containing the hydrofoil data files.
+    :return: hydrofoils: dict, dictionary containing the hydrofoil data (None if any problem is found).
+    """
+    if not os.path.isdir(path):
+        print(f"Folder {path} does not exist. Please check the path. (x)")
+        return None
+    hydrofoils = {}
+    errors = []
+    for file in os.listdir(path):
+        if not file.endswith(".yml"):
+            errors.append(f"{file}: the file does not have the correct extension (.yml).")
+            continue
+        try:
+            with open(f"{path}/{file}", 'r') as f:
+                data = yaml.load(f, Loader=YAML_LOADER)
+        except (OSError, yaml.YAMLError) as error:
+            errors.append(f"{file}: the file could not be parsed ({error}).")
+            continue
+        [data, file_errors] = validate_data(data, HYDROFOIL_SCHEMA, file)
+        errors.extend(file_errors)
+        if file_errors:
+            continue
+        if data['hydrofoil'] in hydrofoils:
+            errors.append(f"{file}: hydrofoil {data['hydrofoil']} is defined in more than one file.")
+            continue
+        hydrofoils[data['hydrofoil']] = data
+    if errors:
+        report_errors(errors, f"the hydrofoil data of folder {path}")
+        return None
+    print(f"Folder {path} loaded with {len(hydrofoils)} hydrofoils (i.e. design points). (\u2713)")
+    return hydrofoils
+
+
+def load_data_file(path: str, schema: dict):
+    """
+    Function for loading and validating a data file (e.g. fluid properties or operative state) in a single pass.
+    All the problems of the file are reported together.
+    :param path: str, path to the data file.
+    :param schema: dict, type of every required key ('array', 'names', 'float', 'int' or 'str').
+    :return: data: dict, typed data of the file (None if any problem is found).
+    """
+    if not os.path.exists(path) or not path.endswith(".yml"):
+        print(f"File {path} does not exist or does not have the correct extension. Please check the path. (x)")
+        return None
+    try:
+        with open(path, 'r') as f:
+            data = yaml.load(f, Loader=YAML_LOADER)
+    except (OSError, yaml.YAMLError) as error:
+        report_errors([f"{path}: the file could not be parsed ({error})."], f"file {path}")
+        return None
+    [data, errors] = validate_data(data, schema, path)
+    if errors:
+        report_errors(errors, f"file {path}")
+        return None
+    print(f"File {path} loaded. (\u2713)")
+    return data
+
+
+def load_fluid_properties(path: str):
+    """
+    Function for loading and validating the fluid properties data file in a single pass.
+    :param path: str, path to the fluid properties data file.
+    :return: data: dict, typed fluid properties (None if any problem is found).
+    """
+    return load_data_file(path, FLUID_PROPERTIES_SCHEMA)
+
+
+def load_operative_state(path: str):
+    """
+    Function for loading and validating the operative state data file in a single pass.
+    :param path: str, path to the operative state data file.
+    :return: data: dict, typed operative state (None if any problem is found).
+    """
+    return load_data_file(path, OPERATIVE_STATE_SCHEMA)
+
+
+def load_blade_definition(path: str):
+    """
+    Function for loading and validating the blade definition data file in a single pass, i.e. the radial
+    positions (fractions of the blade radius, increasing) and the hydrofoils of the sections of the blade.
+    :param path: str, path to the blade definition data file.
+    :return: data: dict, typed blade definition (None if any problem is found).
+    """
+    data = load_data_file(path, BLADE_DEFINITION_SCHEMA)
+    if data is not None and np.any(np.diff(data['positions']) <= 0):
+        report_errors([f"{path}: key 'positions' must be strictly increasing."], f"file {path}")
+        return None
+    return data
@@ -0,0 +1,213 @@
+import os
+import numpy as np
+import pandas as pd
+
+# Available formats of the results files.
+# csv:     text file, the chunks are appended as they are written (readable at any time).
+# npy:     NumPy structured array, the chunks are appended and the header is updated (readable at any time).
+# parquet: Apache Parquet file, one row group per chunk (requires pyarrow, readable once the writer is closed).
+# feather: Feather (Arrow IPC) file, one record batch per chunk (requires pyarrow, readable once the writer is closed).
+RESULT_FORMATS = ('csv', 'npy', 'parquet', 'feather')
+# Default number of rows buffered before a chunk is written.
+CHUNK_ROWS = 1024
+# Length of the header of the .npy files, it leaves room for any number of rows.
+NPY_HEADER_LENGTH = 1024
+
+
+class ResultsWriter:
+    """
+    Class for streaming tabular results (e.g. operating points of a sweep or radial stations) to a file in
+    chunks as they are computed. At most chunk_rows rows are held in memory, hence the memory is bounded
+    whatever the size of the sweep, and the rows written so far are kept if the run is interrupted (CSV and
+    .npy files can be read while the writer is open). The columns are fixed by the first row written. In the
+    .npy, Parquet and Feather files the numeric columns are stored as float64, so a column that holds integers in
+    its first rows keeps its later fractional values, and a chunk that cannot be stored safely raises an error.
+    """
+
+    def __init__(self, path: str, file_format: str = None, chunk_rows: int = CHUNK_ROWS):
+        """
+        Constructor of the ResultsWriter class.
+        :param path: str, path of the results file (overwritten if it exists).
+        :param file_format: str, format of the file ('csv', 'npy', 'parquet' or 'feather', by default the file extension).
+        :param chunk_rows: int, number of rows buffered before a chunk is written.
+        """
+        file_format = os.path.splitext(path)[1].lstrip('.').lower() if file_format is None else file_format
+        if file_format not in RESULT_FORMATS:
+            raise ValueError(f"Results format {file_format} is not available. Please select one of {RESULT_FORMATS}.")
+        if file_format in ('parquet', 'feather'):
+            try:
+                import pyarrow
+            except ImportError:
+                raise ImportError(f"Results format {file_format} requires pyarrow. Please install it or select 'csv' or 'npy'.")
+        self.path = path
+        self.file_format = file_format
+        self.chunk_rows = chunk_rows
+        self.columns = None
+        # Data types of the columns (.npy, Parquet and Feather), fixed by the first chunk.
+        self.column_dtypes = None
+        # Data type of the records (.npy) or schema of the tables (Parquet and Feather), fixed by the first chunk.
+        self.dtype = None
+        self.no_rows = 0
+        self.rows = []
+        self.buffer = []
+        self.buffered_rows = 0
+        self.file = None
+        self.writer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def write(self, row: dict):
+        """
+        Function to write a row of results, e.g. the performance of an operating point.
+        :param row: dict, values of the row keyed by column.
+        """
+        self.rows.append(row)
+        self.buffered_rows += 1
+        if self.buffered_rows >= self.chunk_rows:
+            self.flush()
+
+    def write_rows(self, rows: list):
+        """
+        Function to write several rows of results.
+        :param rows: list, rows of results (dict keyed by column).
+        """
+        for row in rows:
+            self.write(row)
+
+    def write_frame(self, frame):
+        """
+        Function to write a block of results, e.g. the radial stations of an operating point.
+        :param frame: pd.DataFrame or dict, columns of the block (arrays of the same length).
+        """
+        self.collect_rows()
+        frame = frame if isinstance(frame, pd.DataFrame) else pd.DataFrame(frame)
+        self.buffer.append(frame)
+        self.buffered_rows += len(frame)
+        if self.buffered_rows >= self.chunk_rows:
+            self.flush()
+
+    def collect_rows(self):
+        """
+        Function to gather the buffered rows into a block, keeping the order of the rows and blocks.
+        """
+        if self.rows:
+            self.buffer.append(pd.DataFrame(self.rows))
+            self.rows = []
+
+    def flush(self):
+        """
+        Function to write the buffered rows to the file.
+        """
+        self.collect_rows()
+        if not self.buffer:
+            return
+        chunk = pd.concat(self.buffer, ignore_index=True) if len(self.buffer) > 1 else self.buffer[0]
+        if self.columns is None:
+            self.columns = list(chunk.columns)
+        elif list(chunk.columns) != self.columns:
+            chunk = chunk.reindex(columns=self.columns)
+        self.buffer = []
+        self.buffered_rows = 0
+        if self.file_format == 'csv':
+            self.write_csv(chunk)
+        elif self.file_format == 'npy':
+            self.write_npy(self.typed_chunk(chunk))
+        else:
+            self.write_arrow(self.typed_chunk(chunk))
+        self.no_rows += len(chunk)
+
+    def typed_chunk(self, chunk: pd.DataFrame):
+        """
+        Function to convert a chunk to the data types of the columns. The numeric columns of the first chunk are
+        stored as float64, and every later chunk must be safely castable to the data types of the first one.
+        :param chunk: pd.DataFrame, rows to be written.
+        :return: chunk: pd.DataFrame, rows converted to the data types of the columns.
+        """
+        dtypes = {name: chunk[name].to_numpy().dtype for name in self.columns}
+        if self.column_dtypes is None:
+            self.column_dtypes = {name: np.dtype(np.float64) if dtype.kind in 'biuf' else dtype for name, dtype in dtypes.items()}
+        for name, dtype in dtypes.items():
+            if not np.can_cast(dtype, self.column_dtypes[name], 'safe'):
+                raise ValueError(f"Column {name} of type {dtype} cannot be stored safely as {self.column_dtypes[name]} in {self.path}.")
+        numeric = {name: dtype for name, dtype in self.column_dtypes.items() if dtype.kind != 'O'}
+        return chunk.astype(numeric) if numeric else chunk
+
+    def write_csv(self, chunk: pd.DataFrame):
+        """
+        Function to append a chunk to the CSV file, the header is written with the first chunk.
+        :param chunk: pd.DataFrame, rows to be written.
+        """
+        if self.file is None:
+            self.file = open(self.path, 'w', newline='')
+        chunk.to_csv(self.file, header=self.no_rows == 0, index=False)
+        self.file.flush()
+
+    def write_npy(self, chunk: pd.DataFrame):
+        """
+        Function to append a chunk to the .npy file. The records are appended at the end of the file and the
+        fixed-length header is rewritten with the new number of rows, so the file is always a valid array.
+        :param chunk: pd.DataFrame, rows to be written.
+        """
+        if self.file is None:
+            self.dtype = np.dtype([(name, self.column_dtypes[name]) for name in self.columns])
+            if self.dtype.hasobject:
+                raise ValueError(f"Columns {list(self.columns)} with non-numeric values cannot be stored in a .npy file.")
+            self.file = open(self.path, 'w+b')
+        records = np.empty(len(chunk), dtype=self.dtype)
+        for name in self.columns:
+            records[name] = chunk[name].to_numpy()
+        self.file.seek(0, os.SEEK_END)
+        if self.file.tell() == 0:
+            self.file.write(npy_header(self.dtype, 0))
+        self.file.write(records.tobytes())
+        self.file.seek(0)
+        self.file.write(npy_header(self.dtype, self.no_rows + len(chunk)))
+        self.file.flush()
+
+    def write_arrow(self, chunk: pd.DataFrame):
+        """
+        Function to write a chunk to the Parquet (row group) or Feather (record batch) file.
+        :param chunk: pd.DataFrame, rows to be written.
+        """
+        import pyarrow as pa
+        if self.writer is None:
+            # The schema is fixed by the first chunk, the next chunks are converted to it (see typed_chunk).
+            self.dtype = pa.Schema.from_pandas(chunk, preserve_index=False)
+            if self.file_format == 'parquet':
+                import pyarrow.parquet as pq
+                self.writer = pq.ParquetWriter(self.path, self.dtype)
+            else:
+                import pyarrow.ipc as ipc
+                self.writer = ipc.new_file(self.path, self.dtype)
+        self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.dtype, preserve_index=False))
+
+    def close(self):
+        """
+        Function to write the remaining rows and close the file.
+        """
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def npy_header(dtype: np.dtype, no_rows: int):
+    """
+    Function to create the header (format version 1.0) of a one-dimensional .npy file of fixed length.
+    :param dtype: np.dtype, data type of the records.
+    :param no_rows: int, number of records of the file.
+    :return: header: bytes.
+    """
+    header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (no_rows,)})
+    preamble_length = len(np.lib.format.MAGIC_PREFIX) + 4
+    header = header.ljust(NPY_HEADER_LENGTH - preamble_length - 1) + '\n'
+    if len(header) > NPY_HEADER_LENGTH - preamble_length:
+        raise ValueError(f"The header of the .npy file exceeds {NPY_HEADER_LENGTH} bytes, too many columns.")
+    return (np.lib.format.MAGIC_PREFIX + bytes([1, 0]) + len(header).to_bytes(2, 'little') + header.encode('latin1'))
@@ -0,0 +1,110 @@
+import numpy as np
+
+
+class RotorGeometry:
+    """
+    Class for the per-station invariants of a rotor, i.e. every geometrical quantity of the BEMT that does
+    not depend on the induction factors: local radius, chord, twist, solidity and the constant parts of the
+    exponents of Prandtl's tip and root losses. The arrays are computed once per blade and are read-only,
+    so the geometry is shared by the evaluation, the performance integration and the sweeps of a rotor,
+    and the solvers only compute the terms that change with the induction factors.
+    """
+    __slots__ = ('blade_radius', 'no_blades', 'radius_hub', 'radius', 'radius_ratio', 'chord', 'twist', 'solidity',
+                 'tip_exponent', 'root_exponent', 'initial_radius', 'segments')
+
+    def __init__(self, blade_radius: float, no_blades: int, radius_hub_pctg: float, radius, chord, twist,
+                 initial_point_pctg: float = None):
+        """
+        Constructor of the RotorGeometry class.
+        :param blade_radius: float, radius of the blade [m].
+        :param no_blades: int, number of blades.
+        :param radius_hub_pctg: float, radius of the hub as a fraction of the blade radius.
+        :param radius: list or ndarray, local radius of the stations [m].
+        :param chord: list or ndarray, chord of the stations [m].
+        :param twist: list or ndarray, twist of the stations [deg].
+        :param initial_point_pctg: float, start of the integrated blade as a fraction of the blade radius (first station if None).
+        """
+        radius = np.array(radius, dtype=float)
+        Nb = no_blades
+        set_slot = object.__setattr__
+        set_slot(self, 'blade_radius', blade_radius)
+        set_slot(self, 'no_blades', no_blades)
+        set_slot(self, 'radius_hub', radius_hub_pctg * blade_radius)
+        set_slot(self, 'radius', radius)
+        set_slot(self, 'radius_ratio', radius / blade_radius)
+        set_slot(self, 'chord', np.array(chord, dtype=float)[:len(radius)])
+        set_slot(self, 'twist', np.array(twist, dtype=float)[:len(radius)])
+        set_slot(self, 'solidity', Nb * self.chord / (2 * np.pi * radius))
+        # Losses F = (2 / pi) arccos(exp(-exponent / sin(phi))) of the tip and of the root.
+        set_slot(self, 'tip_exponent', (Nb / 2) * (1 - self.radius_ratio) / self.radius_ratio)
+        set_slot(self, 'root_exponent', (Nb / 2) * (radius - self.radius_hub) / radius)
+        set_slot(self, 'initial_radius', radius[0] if initial_point_pctg is None else initial_point_pctg * blade_radius)
+        # Segmented blades of the performance integration computed so far, keyed by the number of segments.
+        set_slot(self, 'segments', {})
+        for name in ('radius', 'radius_ratio', 'chord', 'twist', 'solidity', 'tip_exponent', 'root_exponent'):
+            getattr(self, name).flags.writeable = False
+
+    def __setattr__(self, name, value):
+        raise AttributeError("RotorGeometry is frozen, create a new geometry for a new blade.")
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        # Restore a pickled geometry (e.g. in the workers of a parallel sweep), the arrays are frozen again.
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+        for name in ('radius', 'radius_ratio', 'chord', 'twist', 'solidity', 'tip_exponent', 'root_exponent'):
+            getattr(self, name).flags.writeable = False
+
+    def matches(self, radius, chord, twist):
+        """
+        Function to check whether the geometry belongs to a blade, i.e. whether it can be reused.
+        :param radius: list or ndarray, local radius of the stations [m].
+        :param chord: list or ndarray, chord of the stations [m].
+        :param twist: list or ndarray, twist of the stations [deg].
+        :return: bool.
+        """
+        no_stations = len(self.radius)
+        return (np.array_equal(np.asarray(radius, dtype=float), self.radius)
+                and np.array_equal(np.asarray(chord, dtype=float)[:no_stations], self.chord)
+                and np.array_equal(np.asarray(twist, dtype=float)[:no_stations], self.twist))
+
+    def tangential_speed(self, omega: float, index=slice(None)):
+        """
+        Function to compute the blade speed of the stations, i.e. Omega * r.
+        :param omega: float, angular speed of the rotor [rad/s].
+        :param index: list, ndarray or slice, indices of the radial stations (all of them by default).
+        :return: ndarray.
+        """
+        return omega * self.radius[index]
+
+    def losses(self, phi_radians, index=slice(None)):
+        """
+        Function to compute the total (tip and root) losses of the stations for given inflow angles.
+        :param phi_radians: ndarray, inflow angles of the radial stations [rad].
+        :param index: list, ndarray or slice, indices of the radial stations (all of them by default).
+        :return: F_total: ndarray.
+        """
+        sin_phi = np.sin(phi_radians)
+        F_tip = (2 / np.pi) * np.arccos(np.exp(-self.tip_exponent[index] / sin_phi))
+        F_root = (2 / np.pi) * np.arccos(np.exp(-self.root_exponent[index] / sin_phi))
+        return F_tip * F_root
+
+    def segment_weights(self, interpolation_range: int):
+        """
+        Function to get the segmented blade of the performance integration and the integrals of r and r^3 over
+        every segment. They are computed once per number of segments.
+        :param interpolation_range: int, number of segments of the blade.
+        :return: segmented_radius, thrust_weights, power_weights: ndarray.
+        """
+        if interpolation_range not in self.segments:
+            segmented_radius = np.linspace(self.initial_radius, self.blade_radius, interpolation_range + 1)
+            lower_bound = segmented_radius[:-1]
+            upper_bound = segmented_radius[1:]
+            thrust_weights = (upper_bound ** 2 - lower_bound ** 2) / 2
+            power_weights = (upper_bound ** 4 - lower_bound ** 4) / 4
+            for values in (segmented_radius, thrust_weights, power_weights):
+                values.flags.writeable = False
+            self.segments[interpolation_range] = (segmented_radius, thrust_weights, power_weights)
+        return self.segments[interpolation_range]
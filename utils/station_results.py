@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+# Results of the radial stations of the StandardRotor (names of the attributes of the rotor).
+STANDARD_ROTOR_FIELDS = ('W_velocities', 'AoA', 'induction_axial', 'induction_tangential', 'total_losses',
+                         'coefficient_x', 'coefficient_y', 'phi_angle', 'reynolds_numbers')
+# Results of the design points of the OptimalRotor (names of the attributes of the rotor).
+OPTIMAL_ROTOR_FIELDS = ('optimal_chord', 'optimal_betas', 'optimal_phis', 'optimal_alphas', 'total_losses', 'solidity',
+                        'disk_velocities', 'tang_velocities', 'force_x_coeff', 'force_y_coeff')
+
+
+class StationResults:
+    """
+    Class for the results of the radial stations of a rotor, stored in a single preallocated NumPy structured
+    array (one record per station, one float field per result). The solvers fill the records in place as the
+    stations converge, either one station at a time or several stations at once by index, hence no per-station
+    lists are rebuilt and the one-element arrays of the scalar solvers are stored as plain values.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, no_stations: int, fields: tuple):
+        """
+        Constructor of the StationResults class.
+        :param no_stations: int, number of radial stations.
+        :param fields: tuple, names of the results of every station (e.g. STANDARD_ROTOR_FIELDS).
+        """
+        self.data = np.full(no_stations, np.nan, dtype=[(name, np.float64) for name in fields])
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, name: str):
+        return self.data[name]
+
+    @property
+    def fields(self):
+        return self.data.dtype.names
+
+    def store(self, index, **values):
+        """
+        Function to store the results of one station (scalars or one-element arrays) or of several stations
+        (arrays, in the order of index).
+        :param index: int, list or ndarray, indices of the radial stations.
+        :param values: float or ndarray, results keyed by field.
+        """
+        if np.isscalar(index):
+            index = slice(index, index + 1)
+        for name, value in values.items():
+            self.data[name][index] = value
+
+    def to_lists(self):
+        """
+        Function to get the results as lists, i.e. the attributes of the rotor classes.
+        :return: results: dict, list of the values of every station keyed by field.
+        """
+        return {name: self.data[name].tolist() for name in self.fields}
+
+    def to_frame(self):
+        """
+        Function to get the results as a pd.DataFrame (one row per station).
+        :return: results: pd.DataFrame.
+        """
+        return pd.DataFrame(self.data)